@@ -0,0 +1,92 @@
+import http from 'node:http';
+import { bulkInsert } from './src/services/bulkInsert.js';
+
+// Runs the vendas bulk writer against a local stand-in of the Supabase REST endpoint
+// The stand-in adds latency, fails ~10% of requests with 503 and rejects payloads over MAX_ROWS with 413
+// Usage: node bench_bulk_insert.js [rows]
+const ROWS = parseInt(process.argv[2]) || 50000;
+const LATENCY_MS = 40;
+const FAILURE_RATE = 0.1;
+const MAX_ROWS = 400;
+
+let stored = 0;
+let requests = 0;
+
+const server = http.createServer((req, res) => {
+    let body = '';
+    req.on('data', chunk => { body += chunk; });
+    req.on('end', () => {
+        requests++;
+        setTimeout(() => {
+            const rows = JSON.parse(body);
+            res.setHeader('Content-Type', 'application/json');
+            if (rows.length > MAX_ROWS) {
+                res.writeHead(413);
+                res.end(JSON.stringify({ message: 'Payload too large' }));
+            } else if (Math.random() < FAILURE_RATE) {
+                res.writeHead(503);
+                res.end(JSON.stringify({ message: 'Service unavailable' }));
+            } else {
+                stored += rows.length;
+                res.writeHead(201);
+                res.end('[]');
+            }
+        }, LATENCY_MS);
+    });
+});
+
+await new Promise(resolve => server.listen(0, '127.0.0.1', resolve));
+const baseUrl = `http://127.0.0.1:${server.address().port}/rest/v1`;
+
+// Same shape as supabase.from(table).insert(rows): resolves to { error, status }
+const standIn = {
+    from(table) {
+        return {
+            async insert(rows) {
+                try {
+                    const res = await fetch(`${baseUrl}/${table}`, {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify(rows)
+                    });
+                    if (res.ok) return { error: null, status: res.status };
+                    const { message } = await res.json();
+                    return { error: { message, code: '' }, status: res.status };
+                } catch (error) {
+                    return { error: { message: error.message, code: '' }, status: 0 };
+                }
+            }
+        };
+    }
+};
+
+const rows = Array.from({ length: ROWS }, (_, i) => ({
+    cliente_id: 1,
+    ano_referencia: 2025,
+    mes_ref: `Mês ${String((i % 12) + 1).padStart(2, '0')}`,
+    produto: `P${i % 5000}`,
+    quantidade: (i % 9) + 1,
+    valor: (i % 1000) / 10
+}));
+
+console.log(`--- Bulk insert: ${ROWS} rows, ${LATENCY_MS} ms latency, ${FAILURE_RATE * 100}% 503s, ${MAX_ROWS} rows max per request ---`);
+
+for (const concurrency of [1, 4, 8]) {
+    stored = 0;
+    requests = 0;
+    let progressCalls = 0;
+    const t0 = performance.now();
+    const result = await bulkInsert(standIn, 'vendas', rows, {
+        concurrency,
+        baseDelayMs: 20,
+        onProgress: () => { progressCalls++; }
+    });
+    const elapsed = performance.now() - t0;
+    console.log(
+        `concurrency ${String(concurrency).padEnd(2)} ${elapsed.toFixed(0).padStart(6)} ms  ` +
+        `stored ${stored}/${ROWS}  requests ${requests}  retried ${result.retried}  progress ${progressCalls}`
+    );
+    if (stored !== ROWS) process.exitCode = 1;
+}
+
+server.close();
@@ -0,0 +1,60 @@
+import { createChatService, fakeBackend } from './src/services/chat.js';
+
+// Exercises the assistant streaming path against the local fake backend
+// Reports time-to-first-token / total latency and checks cancellation and timeout
+// Usage: node bench_chat.js [questions]
+const QUESTIONS = parseInt(process.argv[2]) || 40;
+const FIRST_TOKEN_MS = 150;
+const TOKEN_MS = 5;
+const RESPOSTA = 'Os produtos que mais caíram em março foram a tinta acrílica branca e o esmalte sintético preto. '.repeat(3);
+
+const backend = fakeBackend({ firstTokenMs: FIRST_TOKEN_MS, tokenMs: TOKEN_MS, resposta: RESPOSTA });
+const fmt = (ms) => `${ms.toFixed(0)} ms`;
+
+console.log(`--- Chat streaming: ${QUESTIONS} questions, ${FIRST_TOKEN_MS} ms first token, ${TOKEN_MS} ms per piece ---`);
+
+for (const concurrency of [1, 4, 8]) {
+    const service = createChatService(backend);
+    let next = 0;
+    const t0 = performance.now();
+    const worker = async () => {
+        while (next < QUESTIONS) {
+            const i = next++;
+            await service.ask({ pergunta: `pergunta ${i}` });
+        }
+    };
+    await Promise.all(Array.from({ length: concurrency }, worker));
+    const elapsed = performance.now() - t0;
+    const m = service.metrics();
+    console.log(
+        `concurrency ${String(concurrency).padEnd(2)} ${fmt(elapsed).padStart(8)}  ` +
+        `${(QUESTIONS / (elapsed / 1000)).toFixed(1)} answers/s  ` +
+        `ttft p50 ${fmt(m.ttftP50)} p95 ${fmt(m.ttftP95)}  total p50 ${fmt(m.totalP50)} p95 ${fmt(m.totalP95)}`
+    );
+}
+
+// Cancellation: abort after the first piece arrives
+const service = createChatService(backend);
+const controller = new AbortController();
+const tCancel = performance.now();
+try {
+    await service.ask({ pergunta: 'cancelar' }, {
+        signal: controller.signal,
+        onToken: () => controller.abort()
+    });
+    console.log('cancel   NOT cancelled');
+    process.exitCode = 1;
+} catch (error) {
+    console.log(`cancel   ${error.name} after ${fmt(performance.now() - tCancel)}`);
+}
+
+// Timeout shorter than the first token
+const lento = createChatService(backend, { timeoutMs: FIRST_TOKEN_MS / 2 });
+const tTimeout = performance.now();
+try {
+    await lento.ask({ pergunta: 'timeout' });
+    console.log('timeout  NOT timed out');
+    process.exitCode = 1;
+} catch (error) {
+    console.log(`timeout  ${error.message} after ${fmt(performance.now() - tTimeout)}`);
+}
@@ -0,0 +1,45 @@
+import { parseCSV, parseCSVColumnar } from './src/utils/csvParser.js';
+
+// Compares the row-by-row parser with the columnar importer on a synthetic ERP export
+// Usage: node bench_csv_import.js [rows] [runs]
+// The speed-up depends on the machine and on GC timing; report the range over a few invocations.
+// Node v20.19.5, 200000 rows (9.7 MB), 15 runs, 10 invocations: 1.21x to 2.28x, median 1.64x
+const ROWS = parseInt(process.argv[2]) || 200000;
+const RUNS = parseInt(process.argv[3]) || 15;
+const FILENAME = 'Jucar Frotas 03.csv';
+
+function buildCSV(rows) {
+    const lines = ['Código;Descrição;Unidade;Qtd;Preço Unit.;Total Venda'];
+    for (let i = 0; i < rows; i++) {
+        const produto = i % 5000;
+        const qtd = (i % 17) - 2; // some zero/negative rows get filtered
+        const total = ((i * 37) % 1000000) / 100;
+        lines.push(`${10000 + produto};PRODUTO ${produto} 900ML;UN;${qtd};R$ 12,50;R$ ${total.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}`);
+    }
+    return lines.join('\n');
+}
+
+function bench(label, fn, content) {
+    fn(content, FILENAME); // warm-up
+    const times = [];
+    let result;
+    for (let i = 0; i < RUNS; i++) {
+        const t0 = performance.now();
+        result = fn(content, FILENAME);
+        times.push(performance.now() - t0);
+    }
+    times.sort((a, b) => a - b);
+    const median = times[Math.floor(RUNS / 2)];
+    console.log(`${label.padEnd(12)} median ${median.toFixed(1)} ms  min ${times[0].toFixed(1)} ms  (${result.data.length} registros)`);
+    return { median, result };
+}
+
+const content = buildCSV(ROWS);
+console.log(`--- CSV import benchmark: ${ROWS} rows, ${(content.length / 1024 / 1024).toFixed(1)} MB, ${RUNS} runs, node ${process.version} ---`);
+
+const legacy = bench('parseCSV', parseCSV, content);
+const columnar = bench('columnar', parseCSVColumnar, content);
+
+const same = JSON.stringify(legacy.result) === JSON.stringify(columnar.result);
+console.log(`Same output: ${same ? 'yes' : 'NO'}`);
+console.log(`Speed-up: ${(legacy.median / columnar.median).toFixed(2)}x`);
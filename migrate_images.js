@@ -0,0 +1,195 @@
+import { mkdir, writeFile, access } from 'node:fs/promises';
+import path from 'node:path';
+import { createClient } from '@supabase/supabase-js';
+import { supabaseBlobBackend, putContent, isContentPath } from './src/services/blobStore.js';
+import { sha256Hex } from './src/utils/hash.js';
+
+// Moves note/formula images to content-addressed objects in Supabase Storage
+// - anotacoes_imagens / formulas_imagens: BYTEA (raw or base64 text) -> object + imagem_hash, imagem set to NULL
+// - relatorios / anotacoes / tintas_personalizadas: imagens URL arrays -> content-addressed URLs
+// Rows are read in id order, BATCH at a time, so the whole table is never held in memory.
+// Re-running is safe: migrated rows are skipped and identical images are stored once.
+// Usage: node migrate_images.js [--dry-run] [--local <dir>] [--remove-old]
+//   --dry-run     store the objects but do not update any row
+//   --local       write objects to <dir> instead of Supabase Storage (implies --dry-run)
+//   --remove-old  delete the old non-content-addressed objects once their row is updated
+// Env: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (falls back to VITE_SUPABASE_URL / VITE_SUPABASE_ANON_KEY)
+const BATCH = 50;
+
+const args = process.argv.slice(2);
+const localDir = args.includes('--local') ? args[args.indexOf('--local') + 1] : null;
+const dryRun = args.includes('--dry-run') || localDir !== null;
+const removeOld = args.includes('--remove-old') && !dryRun;
+
+const url = process.env.SUPABASE_URL || process.env.VITE_SUPABASE_URL;
+const key = process.env.SUPABASE_SERVICE_ROLE_KEY || process.env.VITE_SUPABASE_ANON_KEY;
+if (!url || !key) {
+    console.error('Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY');
+    process.exit(1);
+}
+const supabase = createClient(url, key);
+
+// Local filesystem stand-in for the storage backend: <dir>/<bucket>/<path>
+function fsBlobBackend(dir) {
+    return {
+        name: 'fs',
+        async put(bucket, objectPath, data) {
+            const file = path.join(dir, bucket, objectPath);
+            try {
+                await access(file);
+                return { created: false };
+            } catch {
+                await mkdir(path.dirname(file), { recursive: true });
+                await writeFile(file, data instanceof Uint8Array ? data : new Uint8Array(await new Response(data).arrayBuffer()));
+                return { created: true };
+            }
+        },
+        async exists(bucket, objectPath) {
+            try {
+                await access(path.join(dir, bucket, objectPath));
+                return true;
+            } catch {
+                return false;
+            }
+        },
+        async remove() {},
+        publicUrl(bucket, objectPath) {
+            return `file://${path.resolve(dir, bucket, objectPath)}`;
+        }
+    };
+}
+
+const blobs = localDir ? fsBlobBackend(localDir) : supabaseBlobBackend(supabase);
+
+const stats = { rows: 0, images: 0, created: 0, reused: 0, bytes: 0, failed: 0 };
+
+const SIGNATURES = [
+    ['image/png', [0x89, 0x50, 0x4e, 0x47]],
+    ['image/jpeg', [0xff, 0xd8, 0xff]],
+    ['image/gif', [0x47, 0x49, 0x46]],
+    ['image/webp', [0x52, 0x49, 0x46, 0x46]]
+];
+const sniff = (bytes) => SIGNATURES.find(([, sig]) => sig.every((b, i) => bytes[i] === b))?.[0] ?? null;
+
+// PostgREST returns BYTEA as '\x<hex>'; older rows hold base64 text (optionally a data: URL) inside it
+function decodeBytea(value) {
+    let bytes = typeof value === 'string' && value.startsWith('\\x')
+        ? Uint8Array.from(Buffer.from(value.slice(2), 'hex'))
+        : Uint8Array.from(Buffer.from(value, 'base64'));
+    if (!sniff(bytes)) {
+        const text = Buffer.from(bytes).toString('latin1').replace(/^data:[^,]*,/, '').trim();
+        if (/^[A-Za-z0-9+/=\s]+$/.test(text)) bytes = Uint8Array.from(Buffer.from(text, 'base64'));
+    }
+    return { bytes, contentType: sniff(bytes) || 'application/octet-stream' };
+}
+
+async function store(bucket, bytes, contentType) {
+    const hash = await sha256Hex(bytes);
+    const stored = await putContent(blobs, bucket, hash, bytes, { contentType });
+    stats.images++;
+    stats[stored.created ? 'created' : 'reused']++;
+    if (stored.created) stats.bytes += bytes.length;
+    return { hash, ...stored };
+}
+
+// Read a table in id order without offsets: each batch starts after the last id seen
+async function* batches(table, columns, filter) {
+    let ultimo = 0;
+    while (true) {
+        const { data, error } = await filter(supabase.from(table).select(columns))
+            .gt('id', ultimo)
+            .order('id')
+            .limit(BATCH);
+        if (error) throw error;
+        if (data.length === 0) return;
+        yield data;
+        ultimo = data[data.length - 1].id;
+    }
+}
+
+async function migrateBytea(table, bucket) {
+    const rows = batches(table, 'id, imagem', q => q.is('imagem_hash', null).not('imagem', 'is', null));
+    for await (const batch of rows) {
+        await Promise.all(batch.map(async (row) => {
+            try {
+                const { bytes, contentType } = decodeBytea(row.imagem);
+                const { hash } = await store(bucket, bytes, contentType);
+                if (!dryRun) {
+                    const { error } = await supabase.from(table).update({ imagem_hash: hash, imagem: null }).eq('id', row.id);
+                    if (error) throw error;
+                }
+                stats.rows++;
+            } catch (error) {
+                stats.failed++;
+                console.error(`${table} #${row.id}:`, error.message || error);
+            }
+        }));
+        console.log(`${table}: up to #${batch[batch.length - 1].id}`);
+    }
+}
+
+const thumbOf = (objectPath) => {
+    const idx = objectPath.lastIndexOf('/');
+    return `${objectPath.slice(0, idx + 1)}thumbs/${objectPath.slice(idx + 1)}`;
+};
+
+async function download(bucket, objectPath) {
+    const { data, error } = await supabase.storage.from(bucket).download(objectPath);
+    if (error) throw error;
+    return { bytes: new Uint8Array(await data.arrayBuffer()), contentType: data.type };
+}
+
+async function migrateUrls(table, bucket) {
+    const rows = batches(table, 'id, imagens', q => q.not('imagens', 'is', null));
+    for await (const batch of rows) {
+        await Promise.all(batch.map(async (row) => {
+            try {
+                const antigos = [];
+                const imagens = await Promise.all(row.imagens.map(async (imagemUrl) => {
+                    const objectPath = imagemUrl.split(`/${bucket}/`)[1];
+                    if (!objectPath || isContentPath(objectPath)) return imagemUrl;
+
+                    const { bytes, contentType } = await download(bucket, objectPath);
+                    const stored = await store(bucket, bytes, contentType);
+                    // Carry the existing thumbnail over (also when the content was already stored without one);
+                    // images without one keep falling back to the original
+                    try {
+                        if (stored.created || !(await blobs.exists(bucket, thumbOf(stored.path)))) {
+                            const thumb = await download(bucket, thumbOf(objectPath));
+                            await blobs.put(bucket, thumbOf(stored.path), thumb.bytes, { contentType: thumb.contentType });
+                        }
+                    } catch { /* no thumbnail */ }
+                    antigos.push(objectPath, thumbOf(objectPath));
+                    return stored.url;
+                }));
+                if (antigos.length === 0) return;
+
+                if (!dryRun) {
+                    const { error } = await supabase.from(table).update({ imagens }).eq('id', row.id);
+                    if (error) throw error;
+                    if (removeOld) await blobs.remove(bucket, antigos);
+                }
+                stats.rows++;
+            } catch (error) {
+                stats.failed++;
+                console.error(`${table} #${row.id}:`, error.message || error);
+            }
+        }));
+        console.log(`${table}: up to #${batch[batch.length - 1].id}`);
+    }
+}
+
+console.log(`--- Image migration (${blobs.name}${dryRun ? ', dry run' : ''}, batches of ${BATCH}) ---`);
+const t0 = performance.now();
+
+await migrateBytea('anotacoes_imagens', 'anotacoes');
+await migrateBytea('formulas_imagens', 'tintas');
+await migrateUrls('relatorios', 'relatorios');
+await migrateUrls('anotacoes', 'anotacoes');
+await migrateUrls('tintas_personalizadas', 'tintas');
+
+console.log(
+    `rows ${stats.rows}  images ${stats.images}  stored ${stats.created} (${(stats.bytes / 1048576).toFixed(1)} MB)  ` +
+    `deduplicated ${stats.reused}  failed ${stats.failed}  in ${((performance.now() - t0) / 1000).toFixed(1)} s`
+);
+if (stats.failed > 0) process.exitCode = 1;
@@ -2,17 +2,21 @@ import { useState, useEffect } from 'react'
 import { auth } from '../../services/supabase'
 import { paintsService } from '../../services/paints'
 import { storageService } from '../../services/storage'
+import { medirConsultas } from '../../utils/queryMetrics'
 import Button from '../common/Button'
 import Card from '../common/Card'
 import Input from '../common/Input'
 import ImageUpload from '../common/ImageUpload'
 import ImageGallery from '../common/ImageGallery'
+import Highlight from '../common/Highlight'
 import './CustomPaints.css'
 
 export default function CustomPaints() {
     const [tintas, setTintas] = useState([])
     const [filteredTintas, setFilteredTintas] = useState([])
     const [loading, setLoading] = useState(true)
+    const [cursor, setCursor] = useState(null)
+    const [loadingMore, setLoadingMore] = useState(false)
     const [searchTerm, setSearchTerm] = useState('')
     const [showForm, setShowForm] = useState(false)
     const [editingTinta, setEditingTinta] = useState(null)
@@ -32,15 +36,26 @@ export default function CustomPaints() {
         loadTintas()
     }, [])
 
+    // Searches run on the server (or the search index) so they cover every paint, not only the loaded pages
     useEffect(() => {
-        filterTintas()
+        if (!searchTerm.trim()) {
+            setFilteredTintas(tintas)
+            return
+        }
+        let atual = true
+        paintsService.searchTintas(searchTerm)
+            .then(resultados => { if (atual) setFilteredTintas(resultados) })
+            .catch(error => console.error('Error searching paints:', error))
+        return () => { atual = false }
     }, [searchTerm, tintas])
 
     const loadTintas = async () => {
         setLoading(true)
         try {
-            const data = await paintsService.getTintas()
-            setTintas(data)
+            // Paints, authors and comment counts in one request per page
+            const page = await medirConsultas('tintas', () => paintsService.getTintasPage())
+            setTintas(page.rows)
+            setCursor(page.cursor)
         } catch (error) {
             console.error('Error loading paints:', error)
         } finally {
@@ -48,19 +63,18 @@ export default function CustomPaints() {
         }
     }
 
-    const filterTintas = () => {
-        let filtered = tintas
-
-        // Filter by search term
-        if (searchTerm) {
-            const term = searchTerm.toLowerCase()
-            filtered = filtered.filter(t =>
-                t.nome.toLowerCase().includes(term) ||
-                t.descricao?.toLowerCase().includes(term)
-            )
+    const loadMoreTintas = async () => {
+        if (!cursor || loadingMore) return
+        setLoadingMore(true)
+        try {
+            const page = await medirConsultas('tintas', () => paintsService.getTintasPage({ cursor }))
+            setTintas(prev => [...prev, ...page.rows])
+            setCursor(page.cursor)
+        } catch (error) {
+            console.error('Error loading paints:', error)
+        } finally {
+            setLoadingMore(false)
         }
-
-        setFilteredTintas(filtered)
     }
 
     const handleSaveTinta = async (e) => {
@@ -291,8 +305,8 @@ export default function CustomPaints() {
                         <Card key={tinta.id} className="paint-card" hover>
                             <div className="paint-card-header">
                                 <div>
-                                    <h3 className="paint-title">{tinta.nome}</h3>
-                                    {tinta.codigo && <p className="paint-code">#{tinta.codigo}</p>}
+                                    <h3 className="paint-title"><Highlight text={tinta.nome} query={searchTerm} /></h3>
+                                    {tinta.codigo && <p className="paint-code">#<Highlight text={tinta.codigo} query={searchTerm} /></p>}
                                 </div>
                                 {currentUser.id === tinta.usuario_id && (
                                     <div className="paint-actions">
@@ -307,7 +321,7 @@ export default function CustomPaints() {
                             </div>
 
                             {tinta.descricao && (
-                                <p className="paint-description">{tinta.descricao}</p>
+                                <p className="paint-description"><Highlight text={tinta.descricao} query={searchTerm} /></p>
                             )}
 
                             <div className="paint-formula">
@@ -340,7 +354,7 @@ export default function CustomPaints() {
                             <div className="comments-section">
                                 <div className="comments-header">
                                     <h5>
-                                        💬 Comentários ({comentarios[tinta.id]?.length || 0})
+                                        💬 Comentários ({comentarios[tinta.id]?.length ?? tinta.n_comentarios ?? 0})
                                     </h5>
                                     <Button
                                         variant="ghost"
@@ -411,6 +425,14 @@ export default function CustomPaints() {
                     ))}
                 </div>
             )}
+
+            {!loading && cursor && !searchTerm.trim() && (
+                <div className="paints-load-more">
+                    <Button variant="outline" onClick={loadMoreTintas} loading={loadingMore}>
+                        Carregar mais
+                    </Button>
+                </div>
+            )}
         </div>
     )
 }
@@ -14,6 +14,7 @@ import {
     Filler
 } from 'chart.js'
 import Card from '../common/Card'
+import { buildSalesContext } from '../../services/salesContext'
 import './ClientDashboard.css'
 
 // Register ChartJS components
@@ -32,14 +33,25 @@ ChartJS.register(
 
 const ITEMS_PER_PAGE = 10
 
-export default function ClientDashboard({ matrizData, vendas, cliente, ano, favoritos = [], onToggleFavorito }) {
+export default function ClientDashboard({
+    matrizData,
+    cube,
+    cliente,
+    ano,
+    anos = [],
+    anoComparacao = null,
+    onAnoComparacaoChange,
+    comparacao = null,
+    favoritos = [],
+    onToggleFavorito
+}) {
     // Pagination states
     const [paginaQueda, setPaginaQueda] = useState(0)
     const [paginaAlta, setPaginaAlta] = useState(0)
     const [paginaParados, setPaginaParados] = useState(0)
     const [paginaEssenciais, setPaginaEssenciais] = useState(0)
 
-    if (!matrizData || !vendas || vendas.length === 0) {
+    if (!matrizData || !cube || cube.registros === 0) {
         return (
             <Card className="dashboard-empty">
                 <div className="empty-state">
@@ -52,16 +64,16 @@ export default function ClientDashboard({ matrizData, vendas, cliente, ano, favo
     }
 
     // Calculate statistics
-    const totalVendas = vendas.reduce((sum, v) => sum + v.quantidade, 0)
+    const totalVendas = cube.totalQtdMes.reduce((sum, total) => sum + total, 0)
     const produtosUnicos = matrizData.produtos.length
     const mesesAtivos = matrizData.meses.length
     const mediaVendas = Math.round(totalVendas / mesesAtivos)
 
     // Top 5 products
     const top5Produtos = matrizData.produtos
-        .map(p => ({
+        .map((p, idx) => ({
             nome: p.produto,
-            total: matrizData.meses.reduce((sum, mes) => sum + (p[mes] || 0), 0)
+            total: cube.totalQtdProduto[idx]
         }))
         .sort((a, b) => b.total - a.total)
         .slice(0, 5)
@@ -69,37 +81,25 @@ export default function ClientDashboard({ matrizData, vendas, cliente, ano, favo
     const maxTotal = top5Produtos[0]?.total || 1
 
     // Sales by month for bar chart
-    const vendasPorMes = matrizData.meses.map(mes => ({
+    const vendasPorMes = matrizData.meses.map((mes, idx) => ({
         mes,
-        total: matrizData.produtos.reduce((sum, p) => sum + (p[mes] || 0), 0)
+        total: cube.totalQtdMes[idx]
     }))
 
-    // Map vendas to aggregated values data
-    const vendasAgrupadas = {}
-    vendas.forEach(v => {
-        const prodKey = v.produto_nome || v.produto // Use same key as matrix
-        const mesKey = v.mes_ref
-
-        if (!vendasAgrupadas[prodKey]) vendasAgrupadas[prodKey] = {}
-        if (!vendasAgrupadas[prodKey][mesKey]) vendasAgrupadas[prodKey][mesKey] = { qtd: 0, valor: 0 }
-
-        vendasAgrupadas[prodKey][mesKey].qtd += v.quantidade || 0
-        vendasAgrupadas[prodKey][mesKey].valor += v.valor_total || v.valor || 0
-    })
-
     // ===== ANÁLISE DO ANO TODO =====
 
     // Calcular TOTAL vendido de cada produto no ano
-    const produtosComTotal = matrizData.produtos.map(p => {
+    const M = matrizData.meses.length
+    const produtosComTotal = matrizData.produtos.map((p, pIdx) => {
         const vendasPorMesProduto = matrizData.meses.map((mes, idx) => {
-            // Get from aggregated map to ensure we have values
-            const dadosMes = vendasAgrupadas[p.produto]?.[mes] || { qtd: 0, valor: 0 }
+            // Read straight from the cube columns (product row pIdx, month idx)
+            const cell = pIdx * M + idx
 
             return {
                 mes,
                 idx,
-                quantidade: dadosMes.qtd,
-                valor: dadosMes.valor,
+                quantidade: cube.qtd[cell],
+                valor: cube.valor[cell],
                 nomeMes: mes
             }
         })
@@ -223,13 +223,7 @@ export default function ClientDashboard({ matrizData, vendas, cliente, ano, favo
     ]
 
     // Calcular valores totais por mês para o gráfico
-    const valoresPorMesMap = {}
-    vendas.forEach(v => {
-        const mesKey = v.mes_ref
-        valoresPorMesMap[mesKey] = (valoresPorMesMap[mesKey] || 0) + (v.valor_total || v.valor || 0)
-    })
-
-    const valoresPorMes = matrizData.meses.map(mes => valoresPorMesMap[mes] || 0)
+    const valoresPorMes = Array.from(cube.totalValorMes)
 
     // Doughnut Chart Data
     const doughnutData = {
@@ -295,6 +289,77 @@ export default function ClientDashboard({ matrizData, vendas, cliente, ano, favo
         maintainAspectRatio: false
     }
 
+    // Year comparison (older year -> newer year), deltas come precomputed from the comparison cube
+    let comparacaoView = null
+    if (comparacao && comparacao.anos.length === 2) {
+        const [anoBase, anoAtual] = comparacao.anos
+        const yoy = comparacao.yoy[anoAtual]
+        const totalBase = comparacao.porAno[anoBase].totalQtdMes.reduce((sum, t) => sum + t, 0)
+        const totalAtual = comparacao.porAno[anoAtual].totalQtdMes.reduce((sum, t) => sum + t, 0)
+
+        const ordem = comparacao.produtos.map((_, p) => p).sort((a, b) => yoy.qtdProduto[b] - yoy.qtdProduto[a])
+        const toItem = (p) => ({
+            nome: comparacao.produtos[p],
+            delta: yoy.qtdProduto[p],
+            pct: yoy.pctQtdProduto[p]
+        })
+
+        comparacaoView = {
+            anoBase,
+            anoAtual,
+            totalBase,
+            totalAtual,
+            variacaoTotal: totalBase > 0 ? Math.round(((totalAtual - totalBase) / totalBase) * 100) : null,
+            cresceram: ordem.filter(p => yoy.qtdProduto[p] > 0).slice(0, 5).map(toItem),
+            cairam: ordem.filter(p => yoy.qtdProduto[p] < 0).reverse().slice(0, 5).map(toItem),
+            barData: {
+                labels: comparacao.meses,
+                datasets: [
+                    {
+                        label: String(anoBase),
+                        data: Array.from(comparacao.porAno[anoBase].totalQtdMes),
+                        backgroundColor: '#6b7280',
+                        borderRadius: 4
+                    },
+                    {
+                        label: String(anoAtual),
+                        data: Array.from(comparacao.porAno[anoAtual].totalQtdMes),
+                        backgroundColor: '#3b82f6',
+                        borderRadius: 4
+                    }
+                ]
+            },
+            barOptions: {
+                ...barOptions,
+                plugins: {
+                    legend: { display: true, labels: { color: '#9ca3af' } },
+                    tooltip: {
+                        callbacks: {
+                            afterBody: (items) => {
+                                const pct = yoy.pctQtdMes[items[0].dataIndex]
+                                return Number.isNaN(pct) ? '' : `Variação: ${pct >= 0 ? '+' : ''}${Math.round(pct)}%`
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    // Compact, token-budgeted summary of the year (cached per cube) for pasting into an assistant
+    const copiarResumo = async () => {
+        const { text, tokens } = buildSalesContext(cube, { cliente: cliente.nome, ano, favoritos })
+        try {
+            await navigator.clipboard.writeText(text)
+            alert(`Resumo copiado (~${tokens} tokens).`)
+        } catch (error) {
+            console.error('Erro ao copiar resumo:', error)
+            alert('Não foi possível copiar o resumo.')
+        }
+    }
+
+    const formatPct = (pct) => (Number.isNaN(pct) ? 'NOVO' : `${pct >= 0 ? '+' : ''}${Math.round(pct)}%`)
+
     return (
         <div className="client-dashboard">
             {/* Header com Alertas */}
@@ -302,6 +367,31 @@ export default function ClientDashboard({ matrizData, vendas, cliente, ano, favo
                 <div>
                     <h2>Análise Anual: {ano}</h2>
                     <p className="dashboard-subtitle">Visão geral de desempenho do cliente {cliente.nome}</p>
+                    <button className="pagination-btn" onClick={copiarResumo} title="Resumo compacto para o assistente">
+                        📋 Copiar resumo
+                    </button>
+                    {onAnoComparacaoChange && anos.length > 1 && (
+                        <label className="compare-toggle">
+                            <input
+                                type="checkbox"
+                                checked={anoComparacao !== null}
+                                onChange={(e) => onAnoComparacaoChange(
+                                    e.target.checked ? anos.find(a => a !== ano) : null
+                                )}
+                            />
+                            Comparar com outro ano
+                            {anoComparacao !== null && (
+                                <select
+                                    value={anoComparacao}
+                                    onChange={(e) => onAnoComparacaoChange(parseInt(e.target.value))}
+                                >
+                                    {anos.filter(a => a !== ano).map(a => (
+                                        <option key={a} value={a}>{a}</option>
+                                    ))}
+                                </select>
+                            )}
+                        </label>
+                    )}
                 </div>
                 <div className="alerts-container">
                     {alertas.map((alerta, idx) => (
@@ -708,6 +798,75 @@ export default function ClientDashboard({ matrizData, vendas, cliente, ano, favo
                 </Card>
             </div>
 
+            {/* Comparação entre anos */}
+            {comparacaoView && (
+                <>
+                    <div className="section-title">
+                        <h3>📅 Comparação {comparacaoView.anoBase} × {comparacaoView.anoAtual}</h3>
+                        <p>
+                            {comparacaoView.totalBase.toLocaleString('pt-BR')} → {comparacaoView.totalAtual.toLocaleString('pt-BR')} un
+                            {comparacaoView.variacaoTotal !== null && ` (${comparacaoView.variacaoTotal >= 0 ? '+' : ''}${comparacaoView.variacaoTotal}%)`}
+                        </p>
+                    </div>
+
+                    <Card className="chart-card">
+                        <h4 className="chart-title">📊 Vendas por Mês</h4>
+                        <p className="chart-subtitle">Quantidade mês a mês nos dois anos</p>
+                        <div className="chart-container bar-container">
+                            <Bar data={comparacaoView.barData} options={comparacaoView.barOptions} />
+                        </div>
+                    </Card>
+
+                    <div className="analysis-row">
+                        <Card className="analysis-card success">
+                            <div className="analysis-header">
+                                <span className="analysis-icon">🚀</span>
+                                <div>
+                                    <h4>Cresceram</h4>
+                                    <p>Maior aumento em unidades sobre {comparacaoView.anoBase}</p>
+                                </div>
+                            </div>
+                            <div className="analysis-list">
+                                {comparacaoView.cresceram.length > 0 ? comparacaoView.cresceram.map((p, idx) => (
+                                    <div key={idx} className="analysis-item">
+                                        <span className="item-name">{p.nome}</span>
+                                        <div className="item-stats">
+                                            <span className="item-change positive">{formatPct(p.pct)}</span>
+                                            <span className="item-detail">+{p.delta.toLocaleString('pt-BR')} un</span>
+                                        </div>
+                                    </div>
+                                )) : (
+                                    <div className="no-data-small">📊 Nenhum produto cresceu</div>
+                                )}
+                            </div>
+                        </Card>
+
+                        <Card className="analysis-card danger">
+                            <div className="analysis-header">
+                                <span className="analysis-icon">📉</span>
+                                <div>
+                                    <h4>Caíram</h4>
+                                    <p>Maior queda em unidades sobre {comparacaoView.anoBase}</p>
+                                </div>
+                            </div>
+                            <div className="analysis-list">
+                                {comparacaoView.cairam.length > 0 ? comparacaoView.cairam.map((p, idx) => (
+                                    <div key={idx} className="analysis-item">
+                                        <span className="item-name">{p.nome}</span>
+                                        <div className="item-stats">
+                                            <span className="item-change negative">{formatPct(p.pct)}</span>
+                                            <span className="item-detail">{p.delta.toLocaleString('pt-BR')} un</span>
+                                        </div>
+                                    </div>
+                                )) : (
+                                    <div className="no-data-small">✅ Nenhum produto caiu</div>
+                                )}
+                            </div>
+                        </Card>
+                    </div>
+                </>
+            )}
+
             {/* Observações e Insights */}
             <Card className="insights-card">
                 <h4 className="chart-title">💡 Observações e Insights</h4>
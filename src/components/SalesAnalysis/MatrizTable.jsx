@@ -0,0 +1,96 @@
+import { useState, useMemo, useEffect } from 'react'
+
+const PAGE_SIZE = 50
+
+// Product × month table that only renders one page of rows
+// Sorting runs over the whole list; cell classes come precomputed (getCellClass)
+export default function MatrizTable({ produtos, meses, getCellClass, pageSize = PAGE_SIZE, resetKey, renderAcao }) {
+    const [pagina, setPagina] = useState(0)
+    const [ordem, setOrdem] = useState({ coluna: null, desc: true })
+
+    // New filter or group: back to the first page
+    useEffect(() => {
+        setPagina(0)
+    }, [resetKey])
+
+    const ordenados = useMemo(() => {
+        if (!ordem.coluna) return produtos
+        const dir = ordem.desc ? -1 : 1
+        if (ordem.coluna === 'produto') {
+            return [...produtos].sort((a, b) => dir * a.produto.localeCompare(b.produto))
+        }
+        return [...produtos].sort((a, b) => dir * ((a[ordem.coluna] || 0) - (b[ordem.coluna] || 0)))
+    }, [produtos, ordem])
+
+    const totalPaginas = Math.max(1, Math.ceil(ordenados.length / pageSize))
+    const paginaAtual = Math.min(pagina, totalPaginas - 1)
+    const visiveis = ordenados.slice(paginaAtual * pageSize, (paginaAtual + 1) * pageSize)
+
+    const ordenarPor = (coluna) => {
+        setOrdem(atual => ({
+            coluna,
+            // Text ascending first, quantities descending first
+            desc: atual.coluna === coluna ? !atual.desc : coluna !== 'produto'
+        }))
+        setPagina(0)
+    }
+
+    const seta = (coluna) => (ordem.coluna === coluna ? (ordem.desc ? ' ▼' : ' ▲') : '')
+
+    return (
+        <>
+            <div className="matriz-container">
+                <table className="matriz-table">
+                    <thead>
+                        <tr>
+                            {renderAcao && <th style={{ width: '40px' }}></th>}
+                            <th className="produto-col sortable" onClick={() => ordenarPor('produto')}>
+                                Produto{seta('produto')}
+                            </th>
+                            {meses.map(mes => (
+                                <th key={mes} className="sortable" onClick={() => ordenarPor(mes)}>
+                                    {mes}{seta(mes)}
+                                </th>
+                            ))}
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {visiveis.map(produto => (
+                            <tr key={produto.produto}>
+                                {renderAcao && <td>{renderAcao(produto)}</td>}
+                                <td className="produto-col">{produto.produto}</td>
+                                {meses.map(mes => (
+                                    <td key={mes} className={getCellClass(produto.produto, mes)}>
+                                        {produto[mes] || 0}
+                                    </td>
+                                ))}
+                            </tr>
+                        ))}
+                    </tbody>
+                </table>
+            </div>
+
+            {totalPaginas > 1 && (
+                <div className="matriz-pagination">
+                    <button
+                        className="matriz-pagination-btn"
+                        onClick={() => setPagina(Math.max(0, paginaAtual - 1))}
+                        disabled={paginaAtual === 0}
+                    >
+                        ← Anterior
+                    </button>
+                    <span className="matriz-pagination-info">
+                        {paginaAtual + 1} / {totalPaginas} · {ordenados.length.toLocaleString('pt-BR')} produtos
+                    </span>
+                    <button
+                        className="matriz-pagination-btn"
+                        onClick={() => setPagina(Math.min(totalPaginas - 1, paginaAtual + 1))}
+                        disabled={paginaAtual >= totalPaginas - 1}
+                    >
+                        Próximo →
+                    </button>
+                </div>
+            )}
+        </>
+    )
+}
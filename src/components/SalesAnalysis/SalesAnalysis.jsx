@@ -1,11 +1,14 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useMemo } from 'react'
 import { db } from '../../services/supabase'
 import { salesService } from '../../services/sales'
-import { parseCSV, readFileAsText } from '../../utils/csvParser'
+import { buildYearComparison, TENDENCIA_CLASSES } from '../../services/salesCube'
+import { extractMesRef, parseCSVColumnar, readFileAsText, readFileHead, streamCSVColumnar } from '../../utils/csvParser'
 import Button from '../common/Button'
 import Card from '../common/Card'
 import Input from '../common/Input'
 import ClientDashboard from './ClientDashboard'
+import MatrizTable from './MatrizTable'
+import SalesAssistant from './SalesAssistant'
 import { Line, Bar } from 'react-chartjs-2'
 import {
     Chart as ChartJS,
@@ -21,6 +24,9 @@ import {
 } from 'chart.js'
 import './SalesAnalysis.css'
 
+// Files above this size are imported in streaming mode (bounded memory)
+const STREAMING_THRESHOLD = 20 * 1024 * 1024
+
 // Register ChartJS components
 ChartJS.register(
     CategoryScale,
@@ -36,10 +42,14 @@ ChartJS.register(
 
 export default function SalesAnalysis({ userId }) {
     const [clientes, setClientes] = useState([])
+    const [clientesPorId, setClientesPorId] = useState(new Map())
     const [clienteSelecionado, setClienteSelecionado] = useState(null)
     const [anos, setAnos] = useState([])
+    const [registrosPorAno, setRegistrosPorAno] = useState({})
     const [anoSelecionado, setAnoSelecionado] = useState(null)
-    const [vendas, setVendas] = useState([])
+    const [anoComparacao, setAnoComparacao] = useState(null)
+    const [comparacao, setComparacao] = useState(null)
+    const [cube, setCube] = useState(null)
     const [loading, setLoading] = useState(false)
     const [error, setError] = useState(null)
     const [activeTab, setActiveTab] = useState('dashboard')
@@ -160,6 +170,7 @@ export default function SalesAnalysis({ userId }) {
             setAnos([])
             setAnoSelecionado(null)
         }
+        setAnoComparacao(null)
     }, [clienteSelecionado])
 
     // Load sales data when year changes
@@ -167,16 +178,18 @@ export default function SalesAnalysis({ userId }) {
         if (clienteSelecionado && anoSelecionado) {
             loadVendas()
         } else {
-            setVendas([])
+            setCube(null)
             setMatrizData(null)
+            setComparacao(null)
         }
         setSelectedFavorito(null)
-    }, [clienteSelecionado, anoSelecionado])
+    }, [clienteSelecionado, anoSelecionado, anoComparacao])
 
     const loadClientes = async () => {
         try {
-            const data = await db.getClientes(userId)
-            setClientes(data)
+            const { lista, porId } = await db.getClienteIndex(userId)
+            setClientes(lista)
+            setClientesPorId(porId)
             setError(null)
         } catch (err) {
             console.error('Failed to load clients', err)
@@ -186,8 +199,10 @@ export default function SalesAnalysis({ userId }) {
 
     const loadAnos = async () => {
         if (!clienteSelecionado) return
-        const anos = await salesService.getAnos(clienteSelecionado.id)
+        const contagem = await salesService.getAnosComContagem(clienteSelecionado.id)
+        const anos = contagem.map(a => a.ano)
         setAnos(anos)
+        setRegistrosPorAno(Object.fromEntries(contagem.map(a => [a.ano, a.registros])))
         if (anos.length > 0 && !anoSelecionado) {
             setAnoSelecionado(anos[0])
         }
@@ -197,11 +212,21 @@ export default function SalesAnalysis({ userId }) {
         if (!clienteSelecionado || !anoSelecionado) return
         setLoading(true)
         try {
-            const data = await salesService.getVendas(clienteSelecionado.id, anoSelecionado)
-            setVendas(data)
-            processMatriz(data)
+            // The comparison year comes in the same load as the selected one
+            const comparando = anoComparacao !== null && anoComparacao !== anoSelecionado
+            const cubes = await salesService.getCubes(
+                clienteSelecionado.id,
+                comparando ? [anoSelecionado, anoComparacao] : [anoSelecionado]
+            )
+            const data = cubes.get(anoSelecionado)
+            setCube(data)
+            setMatrizData(data.matriz)
+            setComparacao(comparando ? buildYearComparison(cubes) : null)
         } catch (error) {
             console.error('Error loading sales:', error)
+            setCube(null)
+            setMatrizData(null)
+            setComparacao(null)
         } finally {
             setLoading(false)
         }
@@ -213,46 +238,6 @@ export default function SalesAnalysis({ userId }) {
         setFavoritos(favs)
     }
 
-    const processMatriz = (vendasData) => {
-        if (!vendasData || vendasData.length === 0) {
-            setMatrizData(null)
-            return
-        }
-
-        // Group by product and month
-        const produtoMap = {}
-        const mesesSet = new Set()
-
-        vendasData.forEach(v => {
-            const produtoKey = v.produto_nome || v.produto
-            if (!produtoMap[produtoKey]) {
-                produtoMap[produtoKey] = {
-                    codigo: v.produto_codigo || v.produto
-                }
-            }
-            produtoMap[produtoKey][v.mes_ref] = (produtoMap[produtoKey][v.mes_ref] || 0) + v.quantidade
-            mesesSet.add(v.mes_ref)
-        })
-
-        // Sort months (Mês 01, Mês 02, etc.)
-        const meses = Array.from(mesesSet).sort((a, b) => {
-            const numA = parseInt(a.match(/\d+/)?.[0] || '0')
-            const numB = parseInt(b.match(/\d+/)?.[0] || '0')
-            return numA - numB
-        })
-
-        // Create matrix
-        const matriz = Object.entries(produtoMap).map(([produto, mesesData]) => {
-            const row = { produto, codigo: mesesData.codigo }
-            meses.forEach(mes => {
-                row[mes] = mesesData[mes] || 0
-            })
-            return row
-        })
-
-        setMatrizData({ produtos: matriz, meses })
-    }
-
     const [importConfirmation, setImportConfirmation] = useState(null)
 
     const handleFileUpload = async (files) => {
@@ -271,10 +256,10 @@ export default function SalesAnalysis({ userId }) {
 
         for (const file of files) {
             try {
-                // Peek content (first 5 lines) just to validate valid CSV
+                // Peek content (header + first rows) just to validate valid CSV
                 // But for mes extraction we just need name and content length check
-                const content = await readFileAsText(file)
-                const { mes } = parseCSV(content, file.name)
+                const content = await readFileHead(file)
+                const { mes } = parseCSVColumnar(content, file.name)
 
                 if (mes) {
                     if (mesMap[mes]) {
@@ -302,149 +287,118 @@ export default function SalesAnalysis({ userId }) {
         setImportConfirmation(null)
         setUploadProgress({ current: 0, total: filesAnalysis.length })
 
-        const allVendas = []
         let processedCount = 0
+        let importados = 0
+        let ignorados = 0
+        const erros = []
 
-        for (const item of filesAnalysis) {
-            if (item.mes === 'Erro') continue
-
+        // Each month is diffed against what is stored; only changed products are written
+        const importFile = async (item) => {
             try {
-                const content = await readFileAsText(item.file)
-                const { data, mes } = parseCSV(content, item.name)
-
-                // Delete existing data for this month
-                await salesService.deleteVendasMes(clienteSelecionado.id, anoSelecionado, mes)
-
-                // Prepare records
-                const records = data.map(d => ({
-                    cliente_id: clienteSelecionado.id,
-                    ano_referencia: anoSelecionado,
-                    arquivo_origem: item.name,
-                    ...d
-                }))
+                // Large files are streamed in batches; small ones are parsed in one go
+                const batches = item.file.size > STREAMING_THRESHOLD
+                    ? (async function* () {
+                        for await (const { data } of streamCSVColumnar(item.file, item.name)) yield data
+                    })()
+                    : [parseCSVColumnar(await readFileAsText(item.file), item.name).data]
+
+                const result = await salesService.importMesDelta(
+                    clienteSelecionado.id,
+                    anoSelecionado,
+                    extractMesRef(item.name),
+                    item.name,
+                    batches,
+                    (status, saved) => setUploadProgress(prev => ({ ...prev, status, saved }))
+                )
 
-                allVendas.push(...records)
+                if (!result.success) erros.push(`${item.name}: ${result.error}`)
+                else if (result.skipped) ignorados++
+                else importados += result.inserted + result.deleted
             } catch (error) {
                 console.error(`Error processing ${item.name}:`, error)
-                // Continue with other files logic?
+                erros.push(`${item.name}: ${error.message}`)
             }
             processedCount++
-            setUploadProgress({ current: processedCount, total: filesAnalysis.length })
+            setUploadProgress(prev => ({ ...prev, current: processedCount, total: filesAnalysis.length }))
         }
 
-        setUploadProgress({ current: filesAnalysis.length, total: filesAnalysis.length, status: 'Salvando no banco de dados...' })
+        // When two files map to the same month the last one wins (as warned in the confirmation)
+        const porMes = new Map()
+        filesAnalysis
+            .filter(item => item.mes !== 'Erro')
+            .forEach(item => porMes.set(extractMesRef(item.name), item))
 
-        // Import all at once
-        if (allVendas.length > 0) {
-            try {
-                const result = await salesService.importVendas(
-                    clienteSelecionado.id,
-                    anoSelecionado,
-                    allVendas,
-                    (status) => setUploadProgress(prev => ({ ...prev, status }))
-                )
-                if (result.success) {
-                    alert(`${allVendas.length} registros importados com sucesso!`)
-                    loadVendas()
-                    loadAnos() // Refresh years list
-                } else {
-                    alert(`Erro na importação: ${result.error}`)
-                }
-            } catch (error) {
-                console.error('Critical import error:', error)
-                alert(`Erro crítico ao salvar dados: ${error.message}`)
-            }
+        // One month at a time: months share products and the year folder (registered on unique
+        // keys), and each import ends by invalidating the client's cube
+        for (const item of porMes.values()) await importFile(item)
+
+        if (erros.length > 0) {
+            alert(`Erro na importação: ${erros.join('\n')}`)
+        } else {
+            alert(
+                `Importação concluída: ${importados} registro(s) alterado(s)` +
+                (ignorados > 0 ? `, ${ignorados} arquivo(s) sem mudanças ignorado(s).` : '.')
+            )
+        }
+        if (importados > 0) {
+            loadVendas()
+            loadAnos() // Refresh years list
         }
 
         setUploadProgress(null)
     }
 
+    const handleVerificarRollup = async () => {
+        if (!clienteSelecionado || !anoSelecionado) return
+        try {
+            const { ok, divergencias } = await salesService.verificarRollup(clienteSelecionado.id, anoSelecionado)
+            if (ok) {
+                alert('✅ Resumo mensal consistente com as vendas.')
+                return
+            }
+            const meses = [...new Set(divergencias.map(d => d.mes_ref))].join(', ')
+            if (window.confirm(`⚠️ ${divergencias.length} divergência(s) entre o resumo mensal e as vendas (${meses}).\n\nRecalcular o resumo desses meses agora?`)) {
+                await salesService.verificarRollup(clienteSelecionado.id, anoSelecionado, true)
+                loadVendas()
+            }
+        } catch (error) {
+            console.error('Erro ao verificar resumo mensal:', error)
+            alert(`Erro ao verificar resumo mensal: ${error.message}`)
+        }
+    }
+
     const handleToggleFavorito = async (produto) => {
         if (!clienteSelecionado) return
         await salesService.toggleFavorito(clienteSelecionado.id, produto)
         loadFavoritos()
     }
 
-    const getCellColor = (produto, mes, meses) => {
-        if (!matrizData || !meses) return ''
-
-        const mesIndex = meses.indexOf(mes)
-        if (mesIndex === 0) return '' // First month, no comparison
-
-        const row = matrizData.produtos.find(p => p.produto === produto)
-        if (!row) return ''
-
-        const currentValue = row[mes] || 0
-        const previousMes = meses[mesIndex - 1]
-        const previousValue = row[previousMes] || 0
-
-        if (currentValue > previousValue) return 'cell-up' // Blue - increased
-        if (currentValue < previousValue && currentValue > 0) return 'cell-down' // Yellow - decreased
-        if (currentValue === 0 && previousValue > 0) return 'cell-zero' // Red - stopped selling
-
-        return ''
-    }
-
-    const getTopProdutos = (mes, limit = 5) => {
-        if (!matrizData) return []
-        return matrizData.produtos
-            .filter(p => p[mes] > 0)
-            .sort((a, b) => b[mes] - a[mes])
-            .slice(0, limit)
-    }
-
-    const getBaixasProdutos = (mes, limit = 5) => {
-        if (!matrizData) return []
-        return matrizData.produtos
-            .filter(p => p[mes] > 0)
-            .sort((a, b) => a[mes] - b[mes])
-            .slice(0, limit)
-    }
-
-    const getEmAlta = (mes, meses, limit = 5) => {
-        if (!matrizData) return []
-        const mesIndex = meses.indexOf(mes)
-        if (mesIndex === 0) return []
-
-        const previousMes = meses[mesIndex - 1]
-        return matrizData.produtos
-            .map(p => ({
-                ...p,
-                delta: (p[mes] || 0) - (p[previousMes] || 0)
-            }))
-            .filter(p => p.delta > 0)
-            .sort((a, b) => b.delta - a.delta)
-            .slice(0, limit)
-    }
-
-    const getEmQueda = (mes, meses, limit = 5) => {
-        if (!matrizData) return []
-        const mesIndex = meses.indexOf(mes)
-        if (mesIndex === 0) return []
-
-        const previousMes = meses[mesIndex - 1]
-        return matrizData.produtos
-            .map(p => ({
-                ...p,
-                delta: (p[mes] || 0) - (p[previousMes] || 0)
-            }))
-            .filter(p => p.delta < 0)
-            .sort((a, b) => a.delta - b.delta)
-            .slice(0, limit)
+    // Trend classes are computed once per cube (cube.tendencia): up = blue, down = yellow, stopped = red
+    const getCellColor = (produto, mes) => {
+        if (!cube) return ''
+        const p = cube.produtoIndex.get(produto)
+        const m = cube.mesIndex.get(mes)
+        if (p === undefined || m === undefined) return ''
+        return TENDENCIA_CLASSES[cube.tendencia[p * cube.meses.length + m]]
     }
 
+    // Rankings come precomputed per month in the cube: switching months is a lookup
     const handleAnaliseChange = (mesSel) => {
         setMesSelecionadoAnalise(mesSel)
 
-        if (mesSel && matrizData) {
-            const topProds = getTopProdutos(mesSel)
-            const baixasProds = getBaixasProdutos(mesSel)
-            const altaProds = getEmAlta(mesSel, matrizData.meses)
-            const quedaProds = getEmQueda(mesSel, matrizData.meses)
+        const m = cube?.mesIndex.get(mesSel)
+        if (mesSel && matrizData && m !== undefined) {
+            const r = cube.rankings[m]
+            const linhas = (indices) => indices.map(p => matrizData.produtos[p])
+            const comDelta = (indices, deltas) => indices.map((p, i) => ({ ...matrizData.produtos[p], delta: deltas[i] }))
+
+            const topProds = linhas(r.top)
+            const baixasProds = linhas(r.baixas)
+            const altaProds = comDelta(r.alta, r.altaDelta)
+            const quedaProds = comDelta(r.queda, r.quedaDelta)
 
-            // Calculate totals
-            const totalVendasMes = matrizData.produtos.reduce((sum, p) => sum + (p[mesSel] || 0), 0)
-            const produtosVendidos = matrizData.produtos.filter(p => (p[mesSel] || 0) > 0).length
+            const totalVendasMes = cube.totalQtdMes[m]
+            const produtosVendidos = cube.vendidosMes[m]
 
             setAnaliseData({
                 mes: mesSel,
@@ -461,9 +415,17 @@ export default function SalesAnalysis({ userId }) {
         }
     }
 
-    const produtosFiltrados = matrizData?.produtos.filter(p =>
-        filtro === '' || p.produto.toLowerCase().includes(filtro.toLowerCase())
-    )
+    // Matrix rows matching a search term through the cube's product index
+    // (case/accent-insensitive, every word must match); an empty term returns every row
+    // Always a new array (callers sort it in place): an empty term copies the cube's own list
+    const buscarProdutos = (termo) => {
+        if (!matrizData || !cube) return []
+        const indices = cube.busca.search(termo)
+        return indices ? indices.map(p => matrizData.produtos[p]) : [...matrizData.produtos]
+    }
+
+    // Memoized so typing elsewhere does not re-filter (and re-sort) the whole catalog
+    const produtosFiltrados = useMemo(() => matrizData && buscarProdutos(filtro), [matrizData, cube, filtro])
 
     const produtosFavoritos = matrizData?.produtos?.filter(p => favoritos.includes(p.produto))
 
@@ -479,7 +441,7 @@ export default function SalesAnalysis({ userId }) {
                 setClienteSelecionado(null)
                 setAnos([])
                 setAnoSelecionado(null)
-                setVendas([])
+                setCube(null)
                 setMatrizData(null)
                 loadClientes()
             } catch (error) {
@@ -510,7 +472,7 @@ export default function SalesAnalysis({ userId }) {
                                 style={{ padding: 'var(--space-4)' }}
                                 value={clienteSelecionado?.id || ''}
                                 onChange={(e) => {
-                                    const cliente = clientes.find(c => c.id === parseInt(e.target.value))
+                                    const cliente = clientesPorId.get(parseInt(e.target.value))
                                     setClienteSelecionado(cliente || null)
                                 }}
                             >
@@ -526,6 +488,14 @@ export default function SalesAnalysis({ userId }) {
                                 const nome = prompt('Nome do novo cliente:')
                                 if (nome) {
                                     try {
+                                        // Resolved from the in-memory index, no round trip
+                                        const existenteId = await db.getClienteId(nome, userId)
+                                        if (existenteId) {
+                                            setClienteSelecionado(clientesPorId.get(existenteId))
+                                            alert(`O cliente "${nome}" já existe e foi selecionado.`)
+                                            return
+                                        }
+
                                         const clienteData = { nome }
                                         if (userId) clienteData.usuario_id = userId
 
@@ -569,7 +539,9 @@ export default function SalesAnalysis({ userId }) {
                                 >
                                     <option value="">Selecione um ano...</option>
                                     {anos.map(ano => (
-                                        <option key={ano} value={ano}>📁 {ano}</option>
+                                        <option key={ano} value={ano}>
+                                            📁 {ano} ({(registrosPorAno[ano] || 0).toLocaleString('pt-BR')} registros)
+                                        </option>
                                     ))}
                                 </select>
                             </div>
@@ -610,7 +582,7 @@ export default function SalesAnalysis({ userId }) {
                                             if (ok) {
                                                 alert(`Pasta ${anoSelecionado} excluída com sucesso!`)
                                                 setAnoSelecionado(null)
-                                                setVendas([])
+                                                setCube(null)
                                                 setMatrizData(null)
                                                 await loadAnos()
                                             } else {
@@ -665,6 +637,12 @@ export default function SalesAnalysis({ userId }) {
                         >
                             🔎 Análise Mensal
                         </button>
+                        <button
+                            className={`admin-tab ${activeTab === 'assistente' ? 'admin-tab--active' : ''}`}
+                            onClick={() => setActiveTab('assistente')}
+                        >
+                            🤖 Assistente
+                        </button>
                     </div>
 
                     <div className="sales-content">
@@ -672,9 +650,13 @@ export default function SalesAnalysis({ userId }) {
                         {activeTab === 'dashboard' && (
                             <ClientDashboard
                                 matrizData={matrizData}
-                                vendas={vendas}
+                                cube={cube}
                                 cliente={clienteSelecionado}
                                 ano={anoSelecionado}
+                                anos={anos}
+                                anoComparacao={anoComparacao}
+                                onAnoComparacaoChange={setAnoComparacao}
+                                comparacao={comparacao}
                                 favoritos={favoritos} // Passando favoritos (Essenciais)
                                 onToggleFavorito={handleToggleFavorito} // Para poder remover dos favoritos
                             />
@@ -697,7 +679,15 @@ export default function SalesAnalysis({ userId }) {
                                 {uploadProgress && (
                                     <div className="upload-progress">
                                         <p>{uploadProgress.status || `Processando arquivo ${uploadProgress.current} de ${uploadProgress.total}...`}</p>
-                                        <div className="loading-spinner"></div>
+                                        {uploadProgress.saved ? (
+                                            <progress
+                                                className="upload-progress-bar"
+                                                value={uploadProgress.saved.done}
+                                                max={uploadProgress.saved.total}
+                                            />
+                                        ) : (
+                                            <div className="loading-spinner"></div>
+                                        )}
                                     </div>
                                 )}
 
@@ -756,11 +746,14 @@ export default function SalesAnalysis({ userId }) {
                                     </div>
                                 )}
 
-                                {vendas.length > 0 && (
+                                {cube?.registros > 0 && (
                                     <div className="import-stats">
-                                        <p>✅ Total de registros: <strong>{vendas.length}</strong></p>
+                                        <p>✅ Total de registros: <strong>{cube.registros}</strong></p>
                                         <p>📦 Produtos únicos: <strong>{matrizData?.produtos.length || 0}</strong></p>
                                         <p>📅 Meses com dados: <strong>{matrizData?.meses.length || 0}</strong></p>
+                                        <Button variant="secondary" size="sm" onClick={handleVerificarRollup}>
+                                            🔍 Verificar consistência do resumo mensal
+                                        </Button>
                                     </div>
                                 )}
                             </Card>
@@ -893,29 +886,13 @@ export default function SalesAnalysis({ userId }) {
 
                                         {/* Tabela geral (filtrada) abaixo dos grupos */}
                                         {matrizData && produtosFiltrados && filtro.length > 0 && (
-                                            <div className="matriz-container" style={{ marginTop: 'var(--space-6)' }}>
-                                                <table className="matriz-table">
-                                                    <thead>
-                                                        <tr>
-                                                            <th className="produto-col">Produto</th>
-                                                            {matrizData.meses.map(mes => (
-                                                                <th key={mes}>{mes}</th>
-                                                            ))}
-                                                        </tr>
-                                                    </thead>
-                                                    <tbody>
-                                                        {produtosFiltrados.map((produto, idx) => (
-                                                            <tr key={idx}>
-                                                                <td className="produto-col">{produto.produto}</td>
-                                                                {matrizData.meses.map(mes => (
-                                                                    <td key={mes} className={getCellColor(produto.produto, mes, matrizData.meses)}>
-                                                                        {produto[mes] || 0}
-                                                                    </td>
-                                                                ))}
-                                                            </tr>
-                                                        ))}
-                                                    </tbody>
-                                                </table>
+                                            <div style={{ marginTop: 'var(--space-6)' }}>
+                                                <MatrizTable
+                                                    produtos={produtosFiltrados}
+                                                    meses={matrizData.meses}
+                                                    getCellClass={getCellColor}
+                                                    resetKey={filtro}
+                                                />
                                             </div>
                                         )}
 
@@ -958,9 +935,8 @@ export default function SalesAnalysis({ userId }) {
                                                 {/* Search Results with + button */}
                                                 {groupSearchTerm.length > 0 && (() => {
                                                     const savedNames = groupProducts[selectedGroup.id] || []
-                                                    const results = (matrizData?.produtos || []).filter(p =>
-                                                        p.produto.toLowerCase().includes(groupSearchTerm.toLowerCase())
-                                                    ).sort((a, b) => a.produto.localeCompare(b.produto))
+                                                    const results = buscarProdutos(groupSearchTerm)
+                                                        .sort((a, b) => a.produto.localeCompare(b.produto))
                                                     return results.length > 0 ? (
                                                         <Card className="search-results-card">
                                                             <p style={{ color: 'var(--color-text-muted)', marginBottom: 'var(--space-3)', fontSize: 'var(--font-size-sm)' }}>
@@ -999,8 +975,7 @@ export default function SalesAnalysis({ userId }) {
                                             // Get products for this group
                                             let produtosDoGrupo
                                             if (selectedGroup.id === 'todos') {
-                                                produtosDoGrupo = [...(matrizData?.produtos || [])]
-                                                    .filter(p => !groupSearchTerm || p.produto.toLowerCase().includes(groupSearchTerm.toLowerCase()))
+                                                produtosDoGrupo = buscarProdutos(groupSearchTerm)
                                                     .sort((a, b) => a.produto.localeCompare(b.produto))
                                             } else {
                                                 const savedNames = groupProducts[selectedGroup.id] || []
@@ -1193,42 +1168,21 @@ export default function SalesAnalysis({ userId }) {
 
                                                     {/* Table */}
                                                     {produtosDoGrupo.length > 0 ? (
-                                                        <div className="matriz-container">
-                                                            <table className="matriz-table">
-                                                                <thead>
-                                                                    <tr>
-                                                                        {selectedGroup.id !== 'todos' && <th style={{ width: '40px' }}></th>}
-                                                                        <th className="produto-col">Produto</th>
-                                                                        {meses.map(mes => (
-                                                                            <th key={mes}>{mes}</th>
-                                                                        ))}
-                                                                    </tr>
-                                                                </thead>
-                                                                <tbody>
-                                                                    {produtosDoGrupo.map((produto, idx) => (
-                                                                        <tr key={idx}>
-                                                                            {selectedGroup.id !== 'todos' && (
-                                                                                <td>
-                                                                                    <button
-                                                                                        className="remove-product-btn"
-                                                                                        onClick={() => removeProductFromGroup(selectedGroup.id, produto.produto)}
-                                                                                        title="Remover da pasta"
-                                                                                    >
-                                                                                        ✕
-                                                                                    </button>
-                                                                                </td>
-                                                                            )}
-                                                                            <td className="produto-col">{produto.produto}</td>
-                                                                            {meses.map(mes => (
-                                                                                <td key={mes} className={getCellColor(produto.produto, mes, meses)}>
-                                                                                    {produto[mes] || 0}
-                                                                                </td>
-                                                                            ))}
-                                                                        </tr>
-                                                                    ))}
-                                                                </tbody>
-                                                            </table>
-                                                        </div>
+                                                        <MatrizTable
+                                                            produtos={produtosDoGrupo}
+                                                            meses={meses}
+                                                            getCellClass={getCellColor}
+                                                            resetKey={`${selectedGroup.id}|${groupSearchTerm}`}
+                                                            renderAcao={selectedGroup.id !== 'todos' ? (produto) => (
+                                                                <button
+                                                                    className="remove-product-btn"
+                                                                    onClick={() => removeProductFromGroup(selectedGroup.id, produto.produto)}
+                                                                    title="Remover da pasta"
+                                                                >
+                                                                    ✕
+                                                                </button>
+                                                            ) : null}
+                                                        />
                                                     ) : (
                                                         <Card><p style={{ textAlign: 'center', color: 'var(--color-text-muted)' }}>
                                                             {selectedGroup.id === 'todos' ? 'Nenhum dado de vendas.' : 'Nenhum produto adicionado. Use a busca acima para adicionar produtos a esta pasta.'}
@@ -1255,35 +1209,31 @@ export default function SalesAnalysis({ userId }) {
                                                 onChange={(e) => setSearchTermFavoritos(e.target.value)}
                                             />
 
-                                            {searchTermFavoritos.length > 0 && (
-                                                <div className="search-results-dropdown">
-                                                    {matrizData?.produtos
-                                                        .filter(p =>
-                                                            p.produto.toLowerCase().includes(searchTermFavoritos.toLowerCase()) &&
-                                                            !favoritos.includes(p.produto)
-                                                        )
-                                                        .slice(0, 10) // Limit results
-                                                        .map((p, idx) => (
-                                                            <div
-                                                                key={idx}
-                                                                className="search-result-item"
-                                                                onClick={() => {
-                                                                    handleToggleFavorito(p.produto)
-                                                                    setSearchTermFavoritos('')
-                                                                }}
-                                                            >
-                                                                <span>{p.produto}</span>
-                                                                <span className="plus-icon">➕</span>
-                                                            </div>
-                                                        ))}
-                                                    {matrizData?.produtos.filter(p =>
-                                                        p.produto.toLowerCase().includes(searchTermFavoritos.toLowerCase()) &&
-                                                        !favoritos.includes(p.produto)
-                                                    ).length === 0 && (
-                                                            <div className="search-result-empty">Nenhum produto encontrado</div>
-                                                        )}
-                                                </div>
-                                            )}
+                                            {searchTermFavoritos.length > 0 && (() => {
+                                                const encontrados = buscarProdutos(searchTermFavoritos).filter(p => !favoritos.includes(p.produto))
+                                                return (
+                                                    <div className="search-results-dropdown">
+                                                        {encontrados
+                                                            .slice(0, 10) // Limit results
+                                                            .map((p, idx) => (
+                                                                <div
+                                                                    key={idx}
+                                                                    className="search-result-item"
+                                                                    onClick={() => {
+                                                                        handleToggleFavorito(p.produto)
+                                                                        setSearchTermFavoritos('')
+                                                                    }}
+                                                                >
+                                                                    <span>{p.produto}</span>
+                                                                    <span className="plus-icon">➕</span>
+                                                                </div>
+                                                            ))}
+                                                        {encontrados.length === 0 && (
+                                                                <div className="search-result-empty">Nenhum produto encontrado</div>
+                                                            )}
+                                                    </div>
+                                                )
+                                            })()}
                                         </div>
                                     )}
                                     {selectedFavorito && (
@@ -1653,6 +1603,16 @@ export default function SalesAnalysis({ userId }) {
                                 )}
                             </div>
                         )}
+
+                        {/* Assistente Tab */}
+                        {activeTab === 'assistente' && (
+                            <SalesAssistant
+                                cube={cube}
+                                cliente={clienteSelecionado}
+                                ano={anoSelecionado}
+                                favoritos={favoritos}
+                            />
+                        )}
                     </div>
                 </>
             )}
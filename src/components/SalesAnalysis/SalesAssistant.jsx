@@ -0,0 +1,134 @@
+import { useState, useRef, useEffect } from 'react'
+import { chatService } from '../../services/supabase'
+import { buildSalesContext } from '../../services/salesContext'
+import { respostaDireta, chaveResposta, respostaEmCache, guardarResposta } from '../../services/salesAnswers'
+import Button from '../common/Button'
+import Card from '../common/Card'
+import Input from '../common/Input'
+
+// Previous turns sent along with each question
+const HISTORICO_MAX = 6
+
+export default function SalesAssistant({ cube, cliente, ano, favoritos = [] }) {
+    const [pergunta, setPergunta] = useState('')
+    const [historico, setHistorico] = useState([]) // [{ role, content, metrics? }]
+    const [parcial, setParcial] = useState(null)
+    const [erro, setErro] = useState(null)
+    const controllerRef = useRef(null)
+
+    // New client/year: start a fresh conversation and stop any answer in flight
+    useEffect(() => {
+        setHistorico([])
+        setErro(null)
+        return () => controllerRef.current?.abort()
+    }, [cliente?.id, ano])
+
+    const enviar = async () => {
+        const texto = pergunta.trim()
+        if (!texto || parcial !== null || !cube) return
+
+        // The system prompt lives in the Edge Function; only the question and the data go out
+        const { text: contexto } = buildSalesContext(cube, { cliente: cliente.nome, ano, favoritos })
+
+        // Rankings/totals come straight from the cube; repeated questions from the answer cache.
+        // Follow-ups depend on the conversation, so only first questions are cached
+        const direta = respostaDireta(texto, cube)
+        const chave = direta === null && historico.length === 0
+            ? await chaveResposta(cliente.id, ano, texto, contexto)
+            : null
+        const pronta = direta ?? (chave && respostaEmCache(chave))
+        if (pronta || !chatService) {
+            setHistorico(h => [
+                ...h,
+                { role: 'user', content: texto },
+                {
+                    role: 'assistant',
+                    content: pronta || 'Assistente não configurado: só consigo responder perguntas diretas (mais vendidos, o que caiu/subiu, totais).',
+                    fonte: direta ? 'dados' : pronta ? 'cache' : null
+                }
+            ])
+            setPergunta('')
+            setErro(null)
+            return
+        }
+
+        const pedido = {
+            pergunta: texto,
+            contexto,
+            historico: historico.slice(-HISTORICO_MAX).map(({ role, content }) => ({ role, content }))
+        }
+
+        const controller = new AbortController()
+        controllerRef.current = controller
+        setHistorico(h => [...h, { role: 'user', content: texto }])
+        setPergunta('')
+        setParcial('')
+        setErro(null)
+
+        try {
+            const { text, metrics } = await chatService.ask(pedido, {
+                signal: controller.signal,
+                onToken: setParcial
+            })
+            setHistorico(h => [...h, { role: 'assistant', content: text, metrics }])
+            if (chave) guardarResposta(chave, text)
+        } catch (error) {
+            console.error('Erro no assistente:', error)
+            setErro(error.name === 'AbortError' ? error.message : 'Erro ao consultar o assistente.')
+        } finally {
+            controllerRef.current = null
+            setParcial(null)
+        }
+    }
+
+    return (
+        <Card className="assistant-card">
+            <div className="assistant-messages">
+                {historico.length === 0 && parcial === null && (
+                    <p className="assistant-hint">
+                        Pergunte sobre as vendas de {cliente.nome} em {ano} — ex.: "o que caiu no último mês?"
+                        {!chatService && ' (assistente não configurado, apenas perguntas diretas)'}
+                    </p>
+                )}
+                {historico.map((msg, idx) => (
+                    <div key={idx} className={`assistant-message ${msg.role}`}>
+                        {msg.content}
+                        {msg.fonte && (
+                            <span className="assistant-metrics">
+                                {msg.fonte === 'dados' ? '⚡ calculado dos dados' : '⚡ resposta em cache'}
+                            </span>
+                        )}
+                        {msg.metrics && (
+                            <span className="assistant-metrics">
+                                1º token {Math.round(msg.metrics.ttftMs)} ms · total {Math.round(msg.metrics.totalMs)} ms
+                            </span>
+                        )}
+                    </div>
+                ))}
+                {parcial !== null && (
+                    <div className="assistant-message assistant">{parcial || '…'}</div>
+                )}
+                {erro && <div className="assistant-error">{erro}</div>}
+            </div>
+
+            <div className="assistant-input">
+                <Input
+                    placeholder="Digite sua pergunta..."
+                    value={pergunta}
+                    onChange={(e) => setPergunta(e.target.value)}
+                    onKeyDown={(e) => { if (e.key === 'Enter') enviar() }}
+                    disabled={parcial !== null}
+                />
+                {parcial !== null ? (
+                    <Button variant="secondary" onClick={() => controllerRef.current?.abort()}>
+                        ⏹ Parar
+                    </Button>
+                ) : (
+                    <Button onClick={enviar} disabled={!pergunta.trim()}>
+                        Enviar
+                    </Button>
+                )}
+            </div>
+        </Card>
+    )
+}
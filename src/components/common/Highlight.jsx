@@ -0,0 +1,16 @@
+import { highlight } from '../../utils/textSearch'
+import './Highlight.css'
+
+// Text with the words matching the search marked
+export default function Highlight({ text, query }) {
+    if (!query?.trim()) return <>{text}</>
+
+    return (
+        <>
+            {highlight(text, query).map((parte, idx) => parte.match
+                ? <mark key={idx} className="search-highlight">{parte.text}</mark>
+                : parte.text
+            )}
+        </>
+    )
+}
@@ -1,6 +1,22 @@
 import { useState } from 'react'
+import { storageService } from '../../services/storage'
 import './ImageGallery.css'
 
+// Tiles show the small thumbnail; the original is only requested when the modal opens.
+// Images uploaded before thumbnails existed fall back to the original.
+function Thumbnail({ url, alt }) {
+    const [src, setSrc] = useState(() => storageService.thumbnailUrl(url))
+    return (
+        <img
+            src={src}
+            alt={alt}
+            loading="lazy"
+            decoding="async"
+            onError={() => { if (src !== url) setSrc(url) }}
+        />
+    )
+}
+
 export default function ImageGallery({ images = [] }) {
     const [selectedIndex, setSelectedIndex] = useState(null)
 
@@ -39,7 +55,7 @@ export default function ImageGallery({ images = [] }) {
                         className="gallery-image"
                         onClick={() => openModal(index)}
                     >
-                        <img src={url} alt={`Imagem ${index + 1}`} />
+                        <Thumbnail key={url} url={url} alt={`Imagem ${index + 1}`} />
                     </div>
                 ))}
             </div>
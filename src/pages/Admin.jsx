@@ -30,6 +30,12 @@ export default function Admin() {
     const [expandedReports, setExpandedReports] = useState([])
     const [reportSubtab, setReportSubtab] = useState('active')
     const [relatoriosArquivados, setRelatoriosArquivados] = useState([])
+    // Inbox pages: keyset cursors for "Carregar mais", counts from head queries
+    const [relatoriosCursor, setRelatoriosCursor] = useState(null)
+    const [arquivadosCursor, setArquivadosCursor] = useState(null)
+    const [contagemRelatorios, setContagemRelatorios] = useState({ total: 0, naoLidos: 0 })
+    const [loadingMoreReports, setLoadingMoreReports] = useState(false)
+    const [selectedReports, setSelectedReports] = useState([])
 
     // New states for Devemos/Materiais
     const [devemos, setDevemos] = useState([])
@@ -46,6 +52,48 @@ export default function Admin() {
         loadData()
     }, [activeTab])
 
+    // The employee filter is applied by the inbox query, so changing it reloads the first pages
+    useEffect(() => {
+        setSelectedReports([])
+        if (activeTab === 'relatorios') loadData()
+    }, [selectedUserForReports])
+
+    const filtroRelatorios = (arquivado) => ({
+        destinatario: 'admin',
+        arquivado,
+        usuarioId: selectedUserForReports === 'todos' ? null : selectedUserForReports
+    })
+
+    // First page (cursor null) replaces the list, later pages are appended; rows already
+    // listed are skipped, in case the list changed since the cursor was taken
+    const carregarRelatorios = async (arquivado, cursor = null) => {
+        const page = await db.getRelatoriosPage({ ...filtroRelatorios(arquivado), cursor })
+        const juntar = (prev) => {
+            if (!cursor) return page.rows
+            const listados = new Set(prev.map(r => r.id))
+            return [...prev, ...page.rows.filter(r => !listados.has(r.id))]
+        }
+        if (arquivado) {
+            setRelatoriosArquivados(juntar)
+            setArquivadosCursor(page.cursor)
+        } else {
+            setRelatorios(juntar)
+            setRelatoriosCursor(page.cursor)
+            if (!cursor) setSelectedReports([])
+        }
+    }
+
+    const handleLoadMoreReports = async (arquivado) => {
+        setLoadingMoreReports(true)
+        try {
+            await carregarRelatorios(arquivado, arquivado ? arquivadosCursor : relatoriosCursor)
+        } catch (error) {
+            console.error('Error loading reports:', error)
+        } finally {
+            setLoadingMoreReports(false)
+        }
+    }
+
     const loadData = async () => {
         setLoading(true)
         try {
@@ -55,16 +103,17 @@ export default function Admin() {
             const promises = []
 
             if (activeTab === 'overview') {
-                // For overview, we need counts. Fetching all is easiest for this scale.
+                // For overview, we need counts: head-only count queries, no report rows
                 promises.push(db.getUsuarios().then(setUsuarios))
-                promises.push(db.getRelatorios(null, 'admin', false).then(setRelatorios))
+                promises.push(db.contarRelatorios({ destinatario: 'admin' }).then(setContagemRelatorios))
                 // We don't strictly need archived for overview stats yet unless we add a card for it
             } else if (activeTab === 'usuarios') {
                 promises.push(db.getUsuarios().then(setUsuarios))
             } else if (activeTab === 'relatorios') {
                 promises.push(db.getUsuarios().then(setUsuarios))
-                promises.push(db.getRelatorios(null, 'admin', false).then(setRelatorios))
-                promises.push(db.getRelatorios(null, 'admin', true).then(setRelatoriosArquivados))
+                promises.push(carregarRelatorios(false))
+                promises.push(carregarRelatorios(true))
+                promises.push(db.contarRelatorios(filtroRelatorios(false)).then(setContagemRelatorios))
             } else if (activeTab === 'devemos') {
                 promises.push(db.getUsuarios().then(setUsuarios))
                 promises.push(db.getDevemos(null, false).then(setDevemos)) // Pending
@@ -153,26 +202,85 @@ export default function Admin() {
         }
     }
 
-    const handleMarkAsRead = async (id, currentStatus) => {
+    // Report actions update the loaded lists and counts right away and send one request
+    // for the whole selection; if it fails, the previous state is put back (returns false)
+    const aplicarOtimista = async (mudanca, requisicao) => {
+        const anterior = { relatorios, relatoriosArquivados, contagemRelatorios }
+        mudanca()
         try {
-            await db.updateRelatorio(id, { lido: !currentStatus })
-            loadData()
+            await requisicao()
+            return true
         } catch (error) {
-            console.error('Error updating report:', error)
+            console.error('Error updating reports:', error)
+            setRelatorios(anterior.relatorios)
+            setRelatoriosArquivados(anterior.relatoriosArquivados)
+            setContagemRelatorios(anterior.contagemRelatorios)
+            alert('Erro ao atualizar relatórios')
+            return false
         }
     }
 
-    const handleDeleteReport = async (id) => {
-        if (window.confirm('Deseja realmente excluir este relatório?')) {
-            try {
-                await db.deleteRelatorio(id)
-                loadData()
-            } catch (error) {
-                console.error('Error deleting report:', error)
-            }
+    const handleBulkMarkAsRead = (ids, lido) => {
+        const alvo = new Set(ids)
+        const mudam = relatorios.filter(r => alvo.has(r.id) && Boolean(r.lido) !== lido).length
+        return aplicarOtimista(() => {
+            setRelatorios(prev => prev.map(r => alvo.has(r.id) ? { ...r, lido } : r))
+            setContagemRelatorios(c => ({ ...c, naoLidos: c.naoLidos + (lido ? -mudam : mudam) }))
+            setSelectedReports([])
+        }, () => db.marcarRelatoriosLidos(ids, lido))
+    }
+
+    // The archived list is keyset-paged, so it is reloaded from its first page rather than spliced
+    const handleBulkArchive = async (ids) => {
+        const alvo = new Set(ids)
+        const originais = relatorios.filter(r => alvo.has(r.id))
+        const naoLidos = originais.filter(r => !r.lido).length
+        const ok = await aplicarOtimista(() => {
+            setRelatorios(prev => prev.filter(r => !alvo.has(r.id)))
+            setContagemRelatorios(c => ({ total: c.total - originais.length, naoLidos: c.naoLidos - naoLidos }))
+            setSelectedReports([])
+        }, () => db.arquivarRelatorios(ids))
+        if (!ok) return
+        try {
+            await carregarRelatorios(true)
+        } catch (error) {
+            console.error('Error loading reports:', error)
         }
     }
 
+    const handleBulkDelete = (ids) => {
+        const mensagem = ids.length === 1
+            ? 'Deseja realmente excluir este relatório?'
+            : `Deseja realmente excluir ${ids.length} relatórios?`
+        if (!window.confirm(mensagem)) return
+
+        const alvo = new Set(ids)
+        const ativos = relatorios.filter(r => alvo.has(r.id))
+        return aplicarOtimista(() => {
+            setRelatorios(prev => prev.filter(r => !alvo.has(r.id)))
+            setRelatoriosArquivados(prev => prev.filter(r => !alvo.has(r.id)))
+            setContagemRelatorios(c => ({
+                total: c.total - ativos.length,
+                naoLidos: c.naoLidos - ativos.filter(r => !r.lido).length
+            }))
+            setSelectedReports(prev => prev.filter(id => !alvo.has(id)))
+        }, () => db.deleteRelatorios(ids))
+    }
+
+    const handleMarkAsRead = (id, currentStatus) => handleBulkMarkAsRead([id], !currentStatus)
+
+    const handleDeleteReport = (id) => handleBulkDelete([id])
+
+    const toggleSelectedReport = (id) => {
+        setSelectedReports(prev =>
+            prev.includes(id)
+                ? prev.filter(rId => rId !== id)
+                : [...prev, id]
+        )
+    }
+
+    const todosSelecionados = relatorios.length > 0 && relatorios.every(r => selectedReports.includes(r.id))
+
     const toggleReport = (id) => {
         setExpandedReports(prev =>
             prev.includes(id)
@@ -181,15 +289,7 @@ export default function Admin() {
         )
     }
 
-    const handleArchiveReport = async (id) => {
-        try {
-            await db.arquivarRelatorio(id)
-            loadData()
-        } catch (error) {
-            console.error('Error archiving report:', error)
-            alert('Erro ao arquivar relatório')
-        }
-    }
+    const handleArchiveReport = (id) => handleBulkArchive([id])
 
     const handleUnarchiveReport = async (id) => {
         try {
@@ -277,7 +377,7 @@ export default function Admin() {
                                 <span className="stat-icon">📈</span>
                                 <div>
                                     <p className="stat-label">Relatórios Recebidos</p>
-                                    <h2 className="stat-value">{relatorios.length}</h2>
+                                    <h2 className="stat-value">{contagemRelatorios.total}</h2>
                                 </div>
                             </div>
                         </Card>
@@ -287,7 +387,7 @@ export default function Admin() {
                                 <span className="stat-icon">✅</span>
                                 <div>
                                     <p className="stat-label">Relatórios Lidos</p>
-                                    <h2 className="stat-value">{relatorios.filter(r => r.lido).length}</h2>
+                                    <h2 className="stat-value">{contagemRelatorios.total - contagemRelatorios.naoLidos}</h2>
                                 </div>
                             </div>
                         </Card>
@@ -297,7 +397,7 @@ export default function Admin() {
                                 <span className="stat-icon">📅</span>
                                 <div>
                                     <p className="stat-label">Não Lidos</p>
-                                    <h2 className="stat-value">{relatorios.filter(r => !r.lido).length}</h2>
+                                    <h2 className="stat-value">{contagemRelatorios.naoLidos}</h2>
                                 </div>
                             </div>
                         </Card>
@@ -472,23 +572,53 @@ export default function Admin() {
                                     className={`subtab ${reportSubtab === 'active' ? 'subtab--active' : ''}`}
                                     onClick={() => setReportSubtab('active')}
                                 >
-                                    📋 Ativos ({relatorios.filter(rel => selectedUserForReports === 'todos' || String(rel.usuario_id) === String(selectedUserForReports)).length})
+                                    📋 Ativos ({contagemRelatorios.total}{contagemRelatorios.naoLidos > 0 && ` · ${contagemRelatorios.naoLidos} não lidos`})
                                 </button>
                                 <button
                                     className={`subtab ${reportSubtab === 'archived' ? 'subtab--active' : ''}`}
                                     onClick={() => setReportSubtab('archived')}
                                 >
-                                    📦 Arquivados ({relatoriosArquivados.filter(rel => selectedUserForReports === 'todos' || String(rel.usuario_id) === String(selectedUserForReports)).length})
+                                    📦 Arquivados ({relatoriosArquivados.length}{arquivadosCursor ? '+' : ''})
                                 </button>
                             </div>
                         </div>
+                        {/* Bulk actions on the selected active reports */}
+                        {reportSubtab === 'active' && !loading && relatorios.length > 0 && (
+                            <div className="bulk-actions">
+                                <label className="bulk-select-all">
+                                    <input
+                                        type="checkbox"
+                                        checked={todosSelecionados}
+                                        onChange={() => setSelectedReports(todosSelecionados ? [] : relatorios.map(r => r.id))}
+                                    />
+                                    {selectedReports.length > 0 ? `${selectedReports.length} selecionados` : 'Selecionar todos'}
+                                </label>
+                                {selectedReports.length > 0 && (
+                                    <div className="report-actions">
+                                        <Button variant="outline" size="sm" onClick={() => handleBulkMarkAsRead(selectedReports, true)}>
+                                            ✅ Marcar como lidos
+                                        </Button>
+                                        <Button variant="outline" size="sm" onClick={() => handleBulkMarkAsRead(selectedReports, false)}>
+                                            📅 Marcar como não lidos
+                                        </Button>
+                                        <Button variant="primary" size="sm" onClick={() => handleBulkArchive(selectedReports)}>
+                                            📦 Arquivar
+                                        </Button>
+                                        <Button variant="danger" size="sm" onClick={() => handleBulkDelete(selectedReports)}>
+                                            🗑️ Excluir
+                                        </Button>
+                                    </div>
+                                )}
+                            </div>
+                        )}
+
                         {/* Active Reports */}
                         {reportSubtab === 'active' && (
                             loading ? (
                                 <div className="loading-container">
                                     <div className="loading-spinner"></div>
                                 </div>
-                            ) : relatorios.filter(rel => selectedUserForReports === 'todos' || String(rel.usuario_id) === String(selectedUserForReports)).length === 0 ? (
+                            ) : relatorios.length === 0 ? (
                                 <Card>
                                     <p style={{ textAlign: 'center', color: 'var(--color-text-muted)' }}>
                                         Nenhum relatório ativo
@@ -497,7 +627,6 @@ export default function Admin() {
                             ) : (
                                 <div className="reports-list">
                                     {relatorios
-                                        .filter(rel => selectedUserForReports === 'todos' || String(rel.usuario_id) === String(selectedUserForReports))
                                         .map((rel) => (
                                             <Card
                                                 key={rel.id}
@@ -509,6 +638,13 @@ export default function Admin() {
                                                 <div className="report-header">
                                                     <div>
                                                         <h3>
+                                                            <input
+                                                                type="checkbox"
+                                                                className="report-select"
+                                                                checked={selectedReports.includes(rel.id)}
+                                                                onClick={(e) => e.stopPropagation()}
+                                                                onChange={() => toggleSelectedReport(rel.id)}
+                                                            />
                                                             {expandedReports.includes(rel.id) ? '🔽' : '▶️'} {rel.lido ? '✅' : '📅'} {new Date(rel.data_relatorio + 'T12:00:00').toLocaleDateString('pt-BR')}
                                                         </h3>
                                                         <p className="report-author">
@@ -573,6 +709,11 @@ export default function Admin() {
                                                 )}
                                             </Card>
                                         ))}
+                                    {relatoriosCursor && (
+                                        <Button variant="outline" onClick={() => handleLoadMoreReports(false)} loading={loadingMoreReports}>
+                                            Carregar mais
+                                        </Button>
+                                    )}
                                 </div>
                             )
                         )}
@@ -583,7 +724,7 @@ export default function Admin() {
                                 <div className="loading-container">
                                     <div className="loading-spinner"></div>
                                 </div>
-                            ) : relatoriosArquivados.filter(rel => selectedUserForReports === 'todos' || String(rel.usuario_id) === String(selectedUserForReports)).length === 0 ? (
+                            ) : relatoriosArquivados.length === 0 ? (
                                 <Card>
                                     <p style={{ textAlign: 'center', color: 'var(--color-text-muted)' }}>
                                         Nenhum relatório arquivado
@@ -592,7 +733,6 @@ export default function Admin() {
                             ) : (
                                 <div className="reports-list">
                                     {relatoriosArquivados
-                                        .filter(rel => selectedUserForReports === 'todos' || String(rel.usuario_id) === String(selectedUserForReports))
                                         .map((rel) => (
                                             <Card
                                                 key={rel.id}
@@ -658,6 +798,11 @@ export default function Admin() {
                                                 )}
                                             </Card>
                                         ))}
+                                    {arquivadosCursor && (
+                                        <Button variant="outline" onClick={() => handleLoadMoreReports(true)} loading={loadingMoreReports}>
+                                            Carregar mais
+                                        </Button>
+                                    )}
                                 </div>
                             )
                         )}
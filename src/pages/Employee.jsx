@@ -1,13 +1,15 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { auth, db } from '../services/supabase'
 import { notesService } from '../services/notes'
 import { storageService } from '../services/storage'
+import { medirConsultas } from '../utils/queryMetrics'
 import Button from '../components/common/Button'
 import Card from '../components/common/Card'
 import Input from '../components/common/Input'
 import ImageUpload from '../components/common/ImageUpload'
 import ImageGallery from '../components/common/ImageGallery'
+import Highlight from '../components/common/Highlight'
 import CustomPaints from '../components/CustomPaints/CustomPaints'
 import './Admin.css'
 
@@ -21,6 +23,10 @@ export default function Employee() {
 
     const [relatorios, setRelatorios] = useState([])
     const [relatoriosEquipe, setRelatoriosEquipe] = useState([])
+    const [equipeCursor, setEquipeCursor] = useState(null)
+    const [equipeNaoLidos, setEquipeNaoLidos] = useState(0)
+    const [loadingMoreEquipe, setLoadingMoreEquipe] = useState(false)
+    const [selectedEquipe, setSelectedEquipe] = useState([])
     const [formRelatorio, setFormRelatorio] = useState({
         data_relatorio: new Date().toISOString().split('T')[0],
         observacoes: '',
@@ -29,8 +35,11 @@ export default function Employee() {
 
     // Notes state
     const [anotacoes, setAnotacoes] = useState([])
+    const [notesCursor, setNotesCursor] = useState(null)
+    const [loadingMoreNotes, setLoadingMoreNotes] = useState(false)
     const [editingNote, setEditingNote] = useState(null)
     const [searchTerm, setSearchTerm] = useState('')
+    const searchSeq = useRef(0)
     const [formNote, setFormNote] = useState({
         titulo: '',
         conteudo: ''
@@ -54,12 +63,19 @@ export default function Employee() {
                 // Vazio, apenas formulário
             } else if (activeTab === 'relatorios_equipe' && isLider) {
                 // Líder colorista (Nilton) recebe relatórios dos coloristas
-                const reports = await db.getRelatorios(null, 'lider')
-                setRelatoriosEquipe(reports)
+                const [page, contagem] = await Promise.all([
+                    db.getRelatoriosPage({ destinatario: 'lider' }),
+                    db.contarRelatorios({ destinatario: 'lider' })
+                ])
+                setRelatoriosEquipe(page.rows)
+                setEquipeCursor(page.cursor)
+                setEquipeNaoLidos(contagem.naoLidos)
+                setSelectedEquipe([])
             } else if (activeTab === 'anotacoes') {
-                // Load notes
-                const notes = await notesService.getAnotacoes(currentUser.id)
-                setAnotacoes(notes)
+                // First page of notes (one request; more pages on demand)
+                const page = await medirConsultas('anotacoes', () => notesService.getAnotacoesPage(currentUser.id))
+                setAnotacoes(page.rows)
+                setNotesCursor(page.cursor)
             }
         } catch (error) {
             console.error('Error loading data:', error)
@@ -68,6 +84,24 @@ export default function Employee() {
         }
     }
 
+    const handleLoadMoreEquipe = async () => {
+        if (!equipeCursor || loadingMoreEquipe) return
+        setLoadingMoreEquipe(true)
+        try {
+            const page = await db.getRelatoriosPage({ destinatario: 'lider', cursor: equipeCursor })
+            // Skip rows already listed, in case the list changed since the cursor was taken
+            setRelatoriosEquipe(prev => {
+                const listados = new Set(prev.map(r => r.id))
+                return [...prev, ...page.rows.filter(r => !listados.has(r.id))]
+            })
+            setEquipeCursor(page.cursor)
+        } catch (error) {
+            console.error('Error loading reports:', error)
+        } finally {
+            setLoadingMoreEquipe(false)
+        }
+    }
+
     const handleLogout = () => {
         auth.logout()
         navigate('/')
@@ -157,15 +191,31 @@ export default function Employee() {
         }
     }
 
-    const handleMarkAsRead = async (id, currentStatus) => {
+    // Marks the reports in the list right away and sends one request for all of them;
+    // the previous list comes back if it fails
+    const handleBulkMarkAsRead = async (ids, lido) => {
+        const anterior = { relatoriosEquipe, equipeNaoLidos }
+        const alvo = new Set(ids)
+        const mudam = relatoriosEquipe.filter(r => alvo.has(r.id) && Boolean(r.lido) !== lido).length
+        setRelatoriosEquipe(prev => prev.map(r => alvo.has(r.id) ? { ...r, lido } : r))
+        setEquipeNaoLidos(n => n + (lido ? -mudam : mudam))
+        setSelectedEquipe([])
         try {
-            await db.updateRelatorio(id, { lido: !currentStatus })
-            loadData()
+            await db.marcarRelatoriosLidos(ids, lido)
         } catch (error) {
             console.error('Error updating report:', error)
+            setRelatoriosEquipe(anterior.relatoriosEquipe)
+            setEquipeNaoLidos(anterior.equipeNaoLidos)
+            alert('Erro ao atualizar relatórios')
         }
     }
 
+    const handleMarkAsRead = (id, currentStatus) => handleBulkMarkAsRead([id], !currentStatus)
+
+    const toggleSelectedEquipe = (id) => {
+        setSelectedEquipe(prev => prev.includes(id) ? prev.filter(rId => rId !== id) : [...prev, id])
+    }
+
     // Notes handlers
     const handleSaveNote = async (e) => {
         e.preventDefault()
@@ -242,15 +292,35 @@ export default function Employee() {
         }
     }
 
+    const handleLoadMoreNotes = async () => {
+        if (!notesCursor || loadingMoreNotes) return
+        setLoadingMoreNotes(true)
+        try {
+            const page = await medirConsultas('anotacoes', () =>
+                notesService.getAnotacoesPage(currentUser.id, { cursor: notesCursor })
+            )
+            setAnotacoes(prev => [...prev, ...page.rows])
+            setNotesCursor(page.cursor)
+        } catch (error) {
+            console.error('Error loading notes:', error)
+        } finally {
+            setLoadingMoreNotes(false)
+        }
+    }
+
     const handleSearchNotes = async (term) => {
         setSearchTerm(term)
+        const seq = ++searchSeq.current
         if (!term.trim()) {
             loadData()
             return
         }
         try {
             const results = await notesService.searchAnotacoes(currentUser.id, term)
+            // Typing fires one search per key; only the latest one may fill the list
+            if (seq !== searchSeq.current) return
             setAnotacoes(results)
+            setNotesCursor(null)
         } catch (error) {
             console.error('Error searching notes:', error)
         }
@@ -416,18 +486,46 @@ export default function Employee() {
                 {/* Team Reports Tab (Líder only) */}
                 {activeTab === 'relatorios_equipe' && isLider && (
                     <div>
-                        <h2>Relatórios da Equipe</h2>
+                        <h2>Relatórios da Equipe{equipeNaoLidos > 0 && ` (${equipeNaoLidos} não lidos)`}</h2>
                         {loading ? (
                             <div className="loading-container"><div className="loading-spinner"></div></div>
                         ) : relatoriosEquipe.length === 0 ? (
                             <Card><p style={{ textAlign: 'center', color: 'var(--color-text-muted)' }}>Nenhum relatório recebido ainda</p></Card>
                         ) : (
                             <div className="reports-list">
+                                <div className="bulk-actions">
+                                    <label className="bulk-select-all">
+                                        <input
+                                            type="checkbox"
+                                            checked={relatoriosEquipe.every(r => selectedEquipe.includes(r.id))}
+                                            onChange={(e) => setSelectedEquipe(e.target.checked ? relatoriosEquipe.map(r => r.id) : [])}
+                                        />
+                                        {selectedEquipe.length > 0 ? `${selectedEquipe.length} selecionados` : 'Selecionar todos'}
+                                    </label>
+                                    {selectedEquipe.length > 0 && (
+                                        <div className="report-actions">
+                                            <Button variant="outline" size="sm" onClick={() => handleBulkMarkAsRead(selectedEquipe, true)}>
+                                                ✅ Marcar como lidos
+                                            </Button>
+                                            <Button variant="outline" size="sm" onClick={() => handleBulkMarkAsRead(selectedEquipe, false)}>
+                                                📅 Marcar como não lidos
+                                            </Button>
+                                        </div>
+                                    )}
+                                </div>
                                 {relatoriosEquipe.map((rel) => (
                                     <Card key={rel.id} className="report-card" hover>
                                         <div className="report-header">
                                             <div>
-                                                <h3>{rel.lido ? '✅' : '📅'} {rel.data_relatorio}</h3>
+                                                <h3>
+                                                    <input
+                                                        type="checkbox"
+                                                        className="report-select"
+                                                        checked={selectedEquipe.includes(rel.id)}
+                                                        onChange={() => toggleSelectedEquipe(rel.id)}
+                                                    />
+                                                    {rel.lido ? '✅' : '📅'} {rel.data_relatorio}
+                                                </h3>
                                                 <p className="report-author">De: {rel.usuarios?.nome || 'Desconhecido'}</p>
                                             </div>
                                             <Button
@@ -458,6 +556,11 @@ export default function Employee() {
                                         </div>
                                     </Card>
                                 ))}
+                                {equipeCursor && (
+                                    <Button variant="outline" onClick={handleLoadMoreEquipe} loading={loadingMoreEquipe}>
+                                        Carregar mais
+                                    </Button>
+                                )}
                             </div>
                         )}
                     </div>
@@ -484,7 +587,7 @@ export default function Employee() {
                         {/* Search bar */}
                         <div style={{ marginBottom: 'var(--space-6)' }}>
                             <Input
-                                placeholder="🔍 Buscar por título..."
+                                placeholder="🔍 Buscar no título e no conteúdo..."
                                 value={searchTerm}
                                 onChange={(e) => handleSearchNotes(e.target.value)}
                             />
@@ -557,7 +660,7 @@ export default function Employee() {
                                     <Card key={note.id} className="report-card" hover>
                                         <div className="report-header">
                                             <div>
-                                                <h3>📝 {note.titulo}</h3>
+                                                <h3>📝 <Highlight text={note.titulo} query={searchTerm} /></h3>
                                                 <p className="report-author">
                                                     Atualizado em: {new Date(note.atualizado_em).toLocaleDateString('pt-BR')}
                                                 </p>
@@ -583,7 +686,7 @@ export default function Employee() {
                                                 borderRadius: 'var(--radius-md)',
                                                 margin: 0
                                             }}>
-                                                {note.conteudo}
+                                                <Highlight text={note.conteudo} query={searchTerm} />
                                             </pre>
                                             {note.imagens && note.imagens.length > 0 && (
                                                 <ImageGallery images={note.imagens} />
@@ -591,6 +694,11 @@ export default function Employee() {
                                         </div>
                                     </Card>
                                 ))}
+                                {notesCursor && (
+                                    <Button variant="outline" onClick={handleLoadMoreNotes} loading={loadingMoreNotes}>
+                                        Carregar mais
+                                    </Button>
+                                )}
                             </div>
                         )}
                     </div>
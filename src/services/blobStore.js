@@ -0,0 +1,96 @@
+// Content-addressed image storage over a pluggable backend
+//
+// An image is stored once per bucket under the SHA-256 of its bytes, so uploading the
+// same file again (or the same picture in another note) reuses the existing object and
+// rows only need the hash. Objects never change once written, which also lets them be
+// cached by the browser for a year. The backend is an object with put/exists/remove/publicUrl:
+// supabaseBlobBackend for the app, memoryBlobBackend (here) and a filesystem backend
+// (migrate_images.js) as local stand-ins.
+
+export const CONTENT_PREFIX = 'cas'
+export const IMMUTABLE_CACHE = '31536000'
+
+// cas/ab/ab12…ef — two-character fan-out keeps folder listings small
+export const contentPath = (hash) => `${CONTENT_PREFIX}/${hash.slice(0, 2)}/${hash}`
+
+export const isContentPath = (path) => path.startsWith(`${CONTENT_PREFIX}/`)
+
+const jaExiste = (error) =>
+    String(error.statusCode) === '409' || /already exists|duplicate/i.test(error.message || '')
+
+// Supabase Storage; put() never overwrites, an existing object counts as a dedup hit
+export function supabaseBlobBackend(client) {
+    return {
+        name: 'supabase',
+
+        async put(bucket, path, data, { contentType, cacheControl = IMMUTABLE_CACHE } = {}) {
+            const { error } = await client.storage
+                .from(bucket)
+                .upload(path, data, { contentType, cacheControl, upsert: false })
+            if (!error) return { created: true }
+            if (jaExiste(error)) return { created: false }
+            throw error
+        },
+
+        async exists(bucket, path) {
+            const idx = path.lastIndexOf('/')
+            const nome = path.slice(idx + 1)
+            const { data, error } = await client.storage.from(bucket).list(path.slice(0, Math.max(idx, 0)), { search: nome })
+            if (error) throw error
+            return data.some(o => o.name === nome)
+        },
+
+        async remove(bucket, paths) {
+            const { error } = await client.storage.from(bucket).remove(paths)
+            if (error) throw error
+        },
+
+        publicUrl(bucket, path) {
+            return client.storage.from(bucket).getPublicUrl(path).data.publicUrl
+        }
+    }
+}
+
+// In-memory stand-in (scripts and offline runs)
+export function memoryBlobBackend(baseUrl = 'memory://') {
+    const objetos = new Map() // `${bucket}/${path}` -> { data, contentType }
+
+    return {
+        name: 'memory',
+        objetos,
+
+        async put(bucket, path, data, { contentType } = {}) {
+            const key = `${bucket}/${path}`
+            if (objetos.has(key)) return { created: false }
+            objetos.set(key, { data, contentType })
+            return { created: true }
+        },
+
+        async exists(bucket, path) {
+            return objetos.has(`${bucket}/${path}`)
+        },
+
+        async remove(bucket, paths) {
+            for (const path of paths) objetos.delete(`${bucket}/${path}`)
+        },
+
+        publicUrl(bucket, path) {
+            return `${baseUrl}${bucket}/${path}`
+        }
+    }
+}
+
+/**
+ * Grava um binário pelo hash do conteúdo
+ * @param {object} backend - supabaseBlobBackend(...), memoryBlobBackend(...)
+ * @param {string} bucket - Nome do bucket
+ * @param {string} hash - SHA-256 (hex) dos bytes
+ * @param {Blob|ArrayBuffer|Uint8Array} data - Conteúdo
+ * @param {object} options - contentType
+ * @returns {Promise<{ path: string, url: string, created: boolean }>} created=false quando o conteúdo já existia
+ */
+export async function putContent(backend, bucket, hash, data, { contentType } = {}) {
+    const path = contentPath(hash)
+    const { created } = await backend.put(bucket, path, data, { contentType })
+    return { path, url: backend.publicUrl(bucket, path), created }
+}
@@ -0,0 +1,113 @@
+// Chunked, parallel bulk insert with retry
+//
+// The client is passed in (the app uses the shared supabase client) so the
+// writer can also run against a local stand-in of the REST endpoint.
+//
+// A plain INSERT is only retried when the response proves nothing was written:
+// a timeout or a 502 may come after the server committed the chunk, and
+// replaying it would store the rows twice. With onConflict (a unique key on the
+// rows) chunks are written as upserts that ignore duplicates, so any transient
+// failure can be replayed safely.
+
+export const BULK_INSERT_DEFAULTS = {
+    chunkSize: 500,     // rows per request
+    minChunkSize: 50,   // 413 responses halve the chunk down to this size
+    concurrency: 4,     // requests in flight at once
+    retries: 4,         // extra attempts per chunk for transient errors
+    baseDelayMs: 400    // backoff: baseDelayMs * 2^attempt (+ jitter)
+}
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms))
+
+// Rejected before anything was written: rate limited, service unavailable, or the
+// statement was rolled back (cancelled by statement_timeout, serialization failure, deadlock)
+function neverWritten(error, status) {
+    if (status === 429 || status === 503) return true
+    return error?.code === '57014' || error?.code === '40001' || error?.code === '40P01'
+}
+
+// Also worth retrying when a replay cannot duplicate rows: network failures and other 5xx;
+// constraint/column errors (4xx with a Postgres code) never are
+function isTransient(error, status) {
+    if (neverWritten(error, status) || status >= 500) return true
+    return !status && !error?.code
+}
+
+/**
+ * Insere linhas em lotes paralelos
+ * @param {object} client - Cliente supabase (ou stand-in com from(table).insert(rows))
+ * @param {string} table - Nome da tabela
+ * @param {object[]} rows - Registros a inserir
+ * @param {object} options - chunkSize, concurrency, retries, baseDelayMs, onProgress({ done, total, chunks }),
+ *                           onConflict (colunas de uma chave única: grava com upsert e torna o retry seguro)
+ * @returns {Promise<{ inserted: number, chunks: number, retried: number }>}
+ */
+export async function bulkInsert(client, table, rows, options = {}) {
+    const { chunkSize, minChunkSize, concurrency, retries, baseDelayMs } = { ...BULK_INSERT_DEFAULTS, ...options }
+    const { onProgress, onConflict } = options
+    const retentavel = onConflict ? isTransient : neverWritten
+
+    const queue = []
+    for (let i = 0; i < rows.length; i += chunkSize) {
+        queue.push({ rows: rows.slice(i, i + chunkSize), attempt: 0 })
+    }
+
+    const total = rows.length
+    let inserted = 0
+    let chunks = 0
+    let retried = 0
+    let fatal = null
+
+    const insertChunk = async (chunk) => {
+        const { error, status } = onConflict
+            ? await client.from(table).upsert(chunk.rows, { onConflict, ignoreDuplicates: true })
+            : await client.from(table).insert(chunk.rows)
+        if (!error) return
+
+        // Payload too large: split and put both halves back in the queue
+        if (status === 413 && chunk.rows.length > minChunkSize) {
+            const half = Math.ceil(chunk.rows.length / 2)
+            queue.push({ rows: chunk.rows.slice(0, half), attempt: 0 })
+            queue.push({ rows: chunk.rows.slice(half), attempt: 0 })
+            return 'split'
+        }
+
+        if (chunk.attempt < retries && retentavel(error, status)) {
+            const delay = baseDelayMs * 2 ** chunk.attempt
+            await sleep(delay + Math.random() * delay * 0.25)
+            chunk.attempt++
+            retried++
+            return insertChunk(chunk)
+        }
+
+        throw error
+    }
+
+    const worker = async () => {
+        while (queue.length > 0 && !fatal) {
+            const chunk = queue.shift()
+            try {
+                const result = await insertChunk(chunk)
+                if (result === 'split') continue
+                inserted += chunk.rows.length
+                chunks++
+                if (onProgress) onProgress({ done: inserted, total, chunks })
+            } catch (error) {
+                fatal = fatal || error
+            }
+        }
+    }
+
+    // A worker may see an empty queue while another is about to split a chunk,
+    // so keep spawning until nothing is queued
+    while (queue.length > 0 && !fatal) {
+        await Promise.all(Array.from({ length: Math.min(concurrency, queue.length) }, worker))
+    }
+
+    if (fatal) {
+        fatal.inserted = inserted
+        throw fatal
+    }
+
+    return { inserted, chunks, retried }
+}
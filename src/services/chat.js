@@ -0,0 +1,173 @@
+// Sales assistant chat: one shared client, streaming, timeout/cancel and latency metrics
+//
+// The transport is a pluggable backend: async *stream({ pergunta, contexto, historico }, { signal })
+// yielding text pieces. edgeFunctionBackend goes through the assistente-vendas Edge Function,
+// which holds the model API key; fakeBackend answers locally with configurable delays so the
+// streaming path can be benchmarked offline (see bench_chat.js).
+
+export const CHAT_DEFAULTS = {
+    timeoutMs: 30000,   // whole answer, first token included
+    maxSamples: 200     // latency samples kept for the metrics summary
+}
+
+const abortError = (message) => {
+    const error = new Error(message)
+    error.name = 'AbortError'
+    return error
+}
+
+const sleep = (ms, signal) => new Promise((resolve, reject) => {
+    if (signal?.aborted) return reject(abortError('Cancelado'))
+    const onAbort = () => {
+        clearTimeout(timer)
+        reject(abortError('Cancelado'))
+    }
+    const timer = setTimeout(() => {
+        signal?.removeEventListener('abort', onAbort)
+        resolve()
+    }, ms)
+    signal?.addEventListener('abort', onAbort, { once: true })
+})
+
+// Yields the text pieces of an OpenAI-style Server-Sent Events response
+async function* lerEventos(res) {
+    const reader = res.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const linhas = buffer.split('\n')
+        buffer = linhas.pop()
+        for (const linha of linhas) {
+            if (!linha.startsWith('data:')) continue
+            const payload = linha.slice(5).trim()
+            if (payload === '[DONE]') return
+            const texto = JSON.parse(payload).choices?.[0]?.delta?.content
+            if (texto) yield texto
+        }
+    }
+}
+
+// Supabase Edge Function proxy (supabase/functions/assistente-vendas): the model API key
+// and the system prompt stay on the server, the browser only sends the question and the context.
+// sessao() returns the token of the logged-in user, which the function requires
+const ERROS_ASSISTENTE = {
+    401: 'Sessão expirada. Saia e entre novamente para usar o assistente.',
+    429: 'Limite de perguntas por hora atingido. Tente novamente mais tarde.'
+}
+
+export function edgeFunctionBackend({ url, anonKey, sessao = () => null, fetchImpl = globalThis.fetch }) {
+    return {
+        name: 'edge-function',
+        async *stream({ pergunta, contexto, historico = [] }, { signal }) {
+            const res = await fetchImpl(url, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    Authorization: `Bearer ${anonKey}`,
+                    apikey: anonKey,
+                    'x-sessao': sessao() || ''
+                },
+                body: JSON.stringify({ pergunta, contexto, historico }),
+                signal
+            })
+            if (!res.ok) throw new Error(ERROS_ASSISTENTE[res.status] || `Assistente respondeu ${res.status}`)
+            yield* lerEventos(res)
+        }
+    }
+}
+
+// Local stand-in: waits firstTokenMs, then yields the answer word by word every tokenMs
+export function fakeBackend({ firstTokenMs = 300, tokenMs = 20, resposta } = {}) {
+    return {
+        name: 'fake',
+        async *stream({ pergunta = '' }, { signal }) {
+            const texto = resposta ?? `Resposta simulada para: ${pergunta}`
+            await sleep(firstTokenMs, signal)
+            const partes = texto.split(/(?<=\s)/)
+            for (let i = 0; i < partes.length; i++) {
+                if (i > 0) await sleep(tokenMs, signal)
+                yield partes[i]
+            }
+        }
+    }
+}
+
+const percentil = (valores, p) => {
+    if (valores.length === 0) return null
+    const ordenados = [...valores].sort((a, b) => a - b)
+    return ordenados[Math.min(ordenados.length - 1, Math.floor((p / 100) * ordenados.length))]
+}
+
+/**
+ * Cria o serviço de chat sobre um backend
+ * @param {object} backend - edgeFunctionBackend(...) ou fakeBackend(...)
+ * @param {object} options - timeoutMs, maxSamples
+ */
+export function createChatService(backend, options = {}) {
+    const { timeoutMs, maxSamples } = { ...CHAT_DEFAULTS, ...options }
+    const amostras = [] // { ttftMs, totalMs, pieces, ok }
+
+    const registrar = (amostra) => {
+        amostras.push(amostra)
+        if (amostras.length > maxSamples) amostras.shift()
+    }
+
+    return {
+        backend: backend.name,
+
+        /**
+         * Envia a pergunta e acumula a resposta em streaming
+         * @param {object} pedido - pergunta, contexto (dados de vendas), historico ([{ role, content }])
+         * @param {object} opts - signal (cancelamento), onToken(texto parcial acumulado)
+         * @returns {Promise<{ text: string, metrics: { ttftMs: number, totalMs: number, pieces: number } }>}
+         */
+        async ask(pedido, { signal, onToken } = {}) {
+            const controller = new AbortController()
+            const timer = setTimeout(() => controller.abort(abortError('Tempo limite do assistente esgotado')), timeoutMs)
+            const cancelar = () => controller.abort(abortError('Cancelado'))
+            if (signal?.aborted) cancelar()
+            signal?.addEventListener('abort', cancelar, { once: true })
+
+            const inicio = performance.now()
+            let ttftMs = null
+            let pieces = 0
+            let text = ''
+            try {
+                for await (const parte of backend.stream(pedido, { signal: controller.signal })) {
+                    if (controller.signal.aborted) throw controller.signal.reason
+                    if (ttftMs === null) ttftMs = performance.now() - inicio
+                    pieces++
+                    text += parte
+                    if (onToken) onToken(text)
+                }
+                const metrics = { ttftMs: ttftMs ?? performance.now() - inicio, totalMs: performance.now() - inicio, pieces }
+                registrar({ ...metrics, ok: true })
+                return { text, metrics }
+            } catch (error) {
+                registrar({ ttftMs, totalMs: performance.now() - inicio, pieces, ok: false })
+                throw controller.signal.aborted ? controller.signal.reason : error
+            } finally {
+                clearTimeout(timer)
+                signal?.removeEventListener('abort', cancelar)
+            }
+        },
+
+        // p50/p95 of time-to-first-token and total latency over the recent requests
+        metrics() {
+            const ok = amostras.filter(a => a.ok)
+            const ttft = ok.map(a => a.ttftMs)
+            const total = ok.map(a => a.totalMs)
+            return {
+                requests: amostras.length,
+                failures: amostras.length - ok.length,
+                ttftP50: percentil(ttft, 50),
+                ttftP95: percentil(ttft, 95),
+                totalP50: percentil(total, 50),
+                totalP95: percentil(total, 95)
+            }
+        }
+    }
+}
@@ -1,4 +1,26 @@
 import { supabase } from './supabase'
+import { applyKeyset, keysetPage } from '../utils/keyset'
+import { buildTextIndex } from '../utils/textSearch'
+import { storageService } from './storage'
+
+export const NOTES_PAGE_SIZE = 20
+
+// PostgREST codes for "function not found" (RPC not installed on this database)
+const isMissingFunction = (error) => error?.code === 'PGRST202' || error?.code === '42883'
+
+// Set to false after the first "function not found" so the in-browser index is used directly
+let buscaRpcDisponivel = true
+
+// userId -> Promise of the in-browser search index over the user's notes (dropped on any write)
+const searchIndexes = new Map()
+
+// Images a note no longer uses, removed in the background once the row is written
+// (storageService keeps objects other rows still point at; a failure only leaves an orphan)
+const removerImagens = (urls) => {
+    if (urls.length === 0) return
+    storageService.deleteImages(urls, storageService.BUCKETS.NOTES)
+        .catch(error => console.warn('Could not remove note images:', error))
+}
 
 export const notesService = {
     // Get all notes for current user
@@ -13,6 +35,20 @@ export const notesService = {
         return data || []
     },
 
+    // One page of the user's notes, most recently updated first (images come inline, no extra query per note)
+    async getAnotacoesPage(userId, { cursor = null, limit = NOTES_PAGE_SIZE } = {}) {
+        const { data, error } = await applyKeyset(
+            supabase
+                .from('anotacoes')
+                .select('*')
+                .eq('usuario_id', userId),
+            { column: 'atualizado_em', cursor, limit }
+        )
+
+        if (error) throw error
+        return keysetPage(data || [], { column: 'atualizado_em', limit })
+    },
+
     // Get note by ID
     async getAnotacaoById(id) {
         const { data, error } = await supabase
@@ -39,11 +75,18 @@ export const notesService = {
             .single()
 
         if (error) throw error
+        searchIndexes.delete(userId)
         return data
     },
 
     // Update note
     async updateAnotacao(id, titulo, conteudo, imagens = []) {
+        const { data: anterior } = await supabase
+            .from('anotacoes')
+            .select('imagens')
+            .eq('id', id)
+            .single()
+
         const { data, error } = await supabase
             .from('anotacoes')
             .update({
@@ -57,30 +100,44 @@ export const notesService = {
             .single()
 
         if (error) throw error
+        searchIndexes.delete(data.usuario_id)
+        removerImagens((anterior?.imagens || []).filter(url => !imagens.includes(url)))
         return data
     },
 
     // Delete note
     async deleteAnotacao(id) {
-        const { error } = await supabase
+        const { data, error } = await supabase
             .from('anotacoes')
             .delete()
             .eq('id', id)
+            .select('imagens')
 
         if (error) throw error
+        searchIndexes.clear()
+        removerImagens(data.flatMap(n => n.imagens || []))
         return true
     },
 
-    // Search notes by title
+    // Search title and content, best matches first (Postgres full-text via buscar_anotacoes, or the in-browser index)
     async searchAnotacoes(userId, searchTerm) {
-        const { data, error } = await supabase
-            .from('anotacoes')
-            .select('*')
-            .eq('usuario_id', userId)
-            .ilike('titulo', `%${searchTerm}%`)
-            .order('atualizado_em', { ascending: false })
+        if (buscaRpcDisponivel) {
+            const { data, error } = await supabase.rpc('buscar_anotacoes', {
+                p_usuario_id: userId,
+                p_termo: searchTerm
+            })
+            if (!error) return data || []
+            if (!isMissingFunction(error)) throw error
+            console.warn('RPC buscar_anotacoes not installed, searching in the browser')
+            buscaRpcDisponivel = false
+        }
 
-        if (error) throw error
-        return data || []
+        if (!searchIndexes.has(userId)) {
+            const index = this.getAnotacoes(userId).then(notes => buildTextIndex(notes, { titulo: 3, conteudo: 1 }))
+            index.catch(() => searchIndexes.delete(userId))
+            searchIndexes.set(userId, index)
+        }
+        const index = await searchIndexes.get(userId)
+        return index.search(searchTerm).map(({ doc }) => doc)
     }
 }
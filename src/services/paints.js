@@ -1,4 +1,38 @@
 import { supabase } from './supabase'
+import { applyKeyset, keysetPage } from '../utils/keyset'
+import { buildTextIndex } from '../utils/textSearch'
+import { storageService } from './storage'
+
+export const PAINTS_PAGE_SIZE = 20
+
+// Author and comment count embedded in the same request as the paint
+const TINTA_COM_CONTAGEM = `
+        *,
+        usuarios:usuario_id (id, nome),
+        comentarios_tintas (count)
+      `
+
+const comContagem = (rows) => rows.map(({ comentarios_tintas, ...tinta }) => ({
+    ...tinta,
+    n_comentarios: comentarios_tintas?.[0]?.count ?? 0
+}))
+
+// PostgREST codes for "function not found" (RPC not installed on this database)
+const isMissingFunction = (error) => error?.code === 'PGRST202' || error?.code === '42883'
+
+// Set to false after the first "function not found" so the in-browser index is used directly
+let buscaRpcDisponivel = true
+
+// Promise of the in-browser search index over all paints (dropped on any write)
+let searchIndex = null
+
+// Images a paint no longer uses, removed in the background once the row is written
+// (storageService keeps objects other rows still point at; a failure only leaves an orphan)
+const removerImagens = (urls) => {
+    if (urls.length === 0) return
+    storageService.deleteImages(urls, storageService.BUCKETS.PAINTS)
+        .catch(error => console.warn('Could not remove paint images:', error))
+}
 
 export const paintsService = {
     // Get all paints
@@ -15,6 +49,20 @@ export const paintsService = {
         return data || []
     },
 
+    // One page of paints, most recently updated first, with author and comment count in the same query
+    async getTintasPage({ cursor = null, limit = PAINTS_PAGE_SIZE } = {}) {
+        const { data, error } = await applyKeyset(
+            supabase
+                .from('tintas_personalizadas')
+                .select(TINTA_COM_CONTAGEM),
+            { column: 'atualizado_em', cursor, limit }
+        )
+
+        if (error) throw error
+        const page = keysetPage(data || [], { column: 'atualizado_em', limit })
+        return { ...page, rows: comContagem(page.rows) }
+    },
+
     // Get paint by ID
     async getTintaById(id) {
         const { data, error } = await supabase
@@ -39,11 +87,16 @@ export const paintsService = {
             .single()
 
         if (error) throw error
+        searchIndex = null
         return data
     },
 
     // Update paint
     async updateTinta(id, tintaData) {
+        const anterior = 'imagens' in tintaData
+            ? (await supabase.from('tintas_personalizadas').select('imagens').eq('id', id).single()).data
+            : null
+
         const { data, error } = await supabase
             .from('tintas_personalizadas')
             .update({
@@ -55,17 +108,22 @@ export const paintsService = {
             .single()
 
         if (error) throw error
+        searchIndex = null
+        removerImagens((anterior?.imagens || []).filter(url => !(tintaData.imagens || []).includes(url)))
         return data
     },
 
     // Delete paint
     async deleteTinta(id) {
-        const { error } = await supabase
+        const { data, error } = await supabase
             .from('tintas_personalizadas')
             .delete()
             .eq('id', id)
+            .select('imagens')
 
         if (error) throw error
+        searchIndex = null
+        removerImagens(data.flatMap(t => t.imagens || []))
         return true
     },
 
@@ -114,19 +172,31 @@ export const paintsService = {
         return true
     },
 
-    // Search paints
+    // Search name, code, description and formula, best matches first
+    // (Postgres full-text via buscar_tintas, or the in-browser index when the function is missing)
     async searchTintas(query) {
-        const { data, error } = await supabase
-            .from('tintas_personalizadas')
-            .select(`
-        *,
-        usuarios:usuario_id (id, nome)
-      `)
-            .or(`nome.ilike.%${query}%,codigo.ilike.%${query}%,descricao.ilike.%${query}%`)
-            .order('criado_em', { ascending: false })
-
-        if (error) throw error
-        return data || []
+        if (buscaRpcDisponivel) {
+            const { data, error } = await supabase
+                .rpc('buscar_tintas', { p_termo: query })
+                .select(TINTA_COM_CONTAGEM)
+            if (!error) return comContagem(data || [])
+            if (!isMissingFunction(error)) throw error
+            console.warn('RPC buscar_tintas not installed, searching in the browser')
+            buscaRpcDisponivel = false
+        }
+
+        if (!searchIndex) {
+            searchIndex = supabase
+                .from('tintas_personalizadas')
+                .select(TINTA_COM_CONTAGEM)
+                .then(({ data, error }) => {
+                    if (error) throw error
+                    return buildTextIndex(comContagem(data || []), { nome: 3, codigo: 3, descricao: 1, formula: 1 })
+                })
+            searchIndex.catch(() => { searchIndex = null })
+        }
+        const index = await searchIndex
+        return index.search(query).map(({ doc }) => doc)
     },
 
     // Filter by category
@@ -0,0 +1,84 @@
+// Cached table reads keyed by (table, filters), invalidated by the writes to that table
+//
+// A read goes through cachedRead: the Promise of the first load is shared by every
+// caller until it expires (TTL) or is evicted (LRU), so screens that reload on each
+// tab switch stop hitting Supabase. A failed load is never cached. Every insert,
+// update or delete calls invalidateTable once it succeeds, dropping all cached reads
+// of that table whatever their filters.
+
+import { createLruCache } from '../utils/lruCache'
+
+export const REPOSITORY_DEFAULTS = {
+    maxEntries: 300,
+    ttlMs: 2 * 60 * 1000
+}
+
+const cache = createLruCache(REPOSITORY_DEFAULTS)
+const tabelas = new Map() // table -> { hits, misses, invalidations }
+
+const statsDe = (table) => {
+    let s = tabelas.get(table)
+    if (!s) tabelas.set(table, s = { hits: 0, misses: 0, invalidations: 0 })
+    return s
+}
+
+// Same filters in any key order -> same key (filters are flat: values are strings, numbers, booleans or null)
+const chave = (table, filters = {}) =>
+    `${table}|${JSON.stringify(filters, Object.keys(filters).sort())}`
+
+// Callers get their own copy of list results, so sorting or splicing one cannot change the cache
+const copia = (value) => Array.isArray(value) ? [...value] : value
+
+/**
+ * Leitura com cache
+ * @param {string} table - Tabela lida (chave de invalidação)
+ * @param {object} filters - Filtros que distinguem a consulta
+ * @param {Function} load - Consulta assíncrona; deve lançar o erro em caso de falha
+ * @param {number} ttlMs - Validade desta leitura (padrão REPOSITORY_DEFAULTS.ttlMs)
+ */
+export function cachedRead(table, filters, load, ttlMs = REPOSITORY_DEFAULTS.ttlMs) {
+    const key = chave(table, filters)
+    const s = statsDe(table)
+    let pending = cache.get(key)
+    if (pending) {
+        s.hits++
+    } else {
+        s.misses++
+        const carregando = cache.set(key, load(), ttlMs)
+        // Only drop this load: an invalidation may already have put a newer read under the key
+        carregando.catch(() => {
+            if (cache.get(key) === carregando) cache.delete(key)
+        })
+        pending = carregando
+    }
+    return pending.then(copia)
+}
+
+const ouvintes = new Set()
+
+// Other cache tiers (sharedCache) hear about this tab's writes; returns the unsubscribe
+export function onInvalidate(fn) {
+    ouvintes.add(fn)
+    return () => ouvintes.delete(fn)
+}
+
+// Drops the cached reads without notifying anyone (writes made elsewhere, e.g. in another tab)
+export function dropCached(...tables) {
+    for (const table of tables) {
+        cache.deleteWhere(key => key.startsWith(`${table}|`))
+        statsDe(table).invalidations++
+    }
+}
+
+// Called by the writes, after they succeed
+export function invalidateTable(...tables) {
+    dropCached(...tables)
+    for (const fn of ouvintes) fn(tables)
+}
+
+// { size, hits, misses, hitRate, tables: { tabela: { hits, misses, invalidations } } }
+export function repositoryStats() {
+    return { ...cache.stats(), tables: Object.fromEntries(tabelas) }
+}
+
+if (typeof window !== 'undefined') window.__repositoryStats = repositoryStats
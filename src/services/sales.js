@@ -1,4 +1,59 @@
-import { supabase } from './supabase'
+import { supabase, sharedCache } from './supabase'
+import { buildSalesCube, salesCube } from './salesCube'
+import { bulkInsert } from './bulkInsert'
+import { cachedRead, invalidateTable } from './repository'
+import { sha256Hex } from '../utils/hash'
+
+// PostgREST codes for "function not found" (RPC not installed on this database)
+const isMissingFunction = (error) => error?.code === 'PGRST202' || error?.code === '42883'
+
+// Set to false after the first "function not found" so the fallback is used directly
+let matrizRpcDisponivel = true
+let contagemRpcDisponivel = true
+
+// PostgREST / Postgres codes for a missing table (rollup not created yet)
+const isMissingTable = (error) => error?.code === 'PGRST205' || error?.code === '42P01'
+
+// vendas.chave_importacao (or its unique index) not created yet: column missing / no ON CONFLICT target
+const isMissingChave = (error) => ['42703', 'PGRST204', '42P10'].includes(error?.code)
+
+// Set to false after the first such error; vendas are then inserted without the key (and without ambiguous retries)
+let chaveImportacaoDisponivel = true
+
+const ROLLUP_CHAVE = 'cliente_id,ano,mes_ref,produto'
+
+// vendas_mensal_anos not created yet: no year counts as rolled up, so reads go to vendas
+let rollupAnosDisponivel = true
+
+// Full-year rebuilds in flight per `${clienteId}|${ano}`
+const completando = new Map()
+
+// Raw or already aggregated vendas rows -> one row per (mes_ref, produto), the vendas_mensal shape
+function agregarPorMesProduto(rows) {
+    const porCelula = new Map()
+    for (const r of rows) {
+        const key = `${r.mes_ref}\u0000${r.produto}`
+        const atual = porCelula.get(key)
+        if (atual) {
+            atual.quantidade += Number(r.quantidade) || 0
+            atual.valor += Number(r.valor) || 0
+            atual.registros += Number(r.registros ?? 1)
+        } else {
+            porCelula.set(key, {
+                mes_ref: r.mes_ref,
+                produto: r.produto,
+                produto_nome: r.produto_nome || r.produto,
+                quantidade: Number(r.quantidade) || 0,
+                valor: Number(r.valor) || 0,
+                registros: Number(r.registros ?? 1)
+            })
+        }
+    }
+    return [...porCelula.values()]
+}
+
+// Aggregate fingerprint used by the delta import: same quantity and value (to the cent) = unchanged
+const fingerprint = (agregado) => `${agregado.quantidade}|${agregado.valor.toFixed(2)}`
 
 // Sales-specific database operations
 export const salesService = {
@@ -21,7 +76,7 @@ export const salesService = {
 
             if (error) {
                 console.error('Error fetching sales page:', error)
-                return [] // Or throw?
+                throw error
             }
 
             if (data) {
@@ -46,14 +101,25 @@ export const salesService = {
             return []
         }
 
-        // Get all unique product codes from sales
-        const produtoCodigos = [...new Set(vendasData.map(v => v.produto))]
+        // Product names from the produtos table
+        const nomes = await this.getNomesProdutos(vendasData.map(v => v.produto))
+
+        // Transform data to include product name
+        return vendasData.map(venda => ({
+            ...venda,
+            produto_nome: nomes.get(venda.produto) || venda.produto,
+            produto_codigo: venda.produto
+        }))
+    },
 
-        // Fetch product names in batches to avoid URL length limit
-        const produtosMap = {}
+    // codigo -> produtos.nome, in batches to avoid URL length limit. Every path that names
+    // products (raw rows, vendas_matriz, the rollup) resolves them like this: COALESCE(nome, codigo)
+    async getNomesProdutos(codigos) {
+        const unicos = [...new Set(codigos)]
+        const nomes = new Map()
         const PROD_BATCH = 200
-        for (let i = 0; i < produtoCodigos.length; i += PROD_BATCH) {
-            const batch = produtoCodigos.slice(i, i + PROD_BATCH)
+        for (let i = 0; i < unicos.length; i += PROD_BATCH) {
+            const batch = unicos.slice(i, i + PROD_BATCH)
             const { data: produtosData, error: produtosError } = await supabase
                 .from('produtos')
                 .select('codigo, nome')
@@ -63,45 +129,381 @@ export const salesService = {
                 console.warn('Error fetching product names batch:', produtosError)
                 continue
             }
-            produtosData?.forEach(p => { produtosMap[p.codigo] = p.nome })
+            produtosData?.forEach(p => { if (p.nome) nomes.set(p.codigo, p.nome) })
         }
+        return nomes
+    },
 
-        // Transform data to include product name
-        return vendasData.map(venda => ({
-            ...venda,
-            produto_nome: produtosMap[venda.produto] || venda.produto,
-            produto_codigo: venda.produto
+    // Product × month aggregates computed in the database (RPC vendas_matriz, see supabase_schema.sql)
+    // Only one row per product/month crosses the network; falls back to the raw rows when the RPC is missing
+    async getVendasAgregadas(clienteId, ano) {
+        if (!matrizRpcDisponivel) return this.getVendas(clienteId, ano)
+
+        const rows = []
+        const pageSize = 1000
+        let page = 0
+
+        while (true) {
+            const { data, error } = await supabase
+                .rpc('vendas_matriz', { p_cliente_id: clienteId, p_ano: ano })
+                .order('produto')
+                .order('mes_ref')
+                .range(page * pageSize, (page + 1) * pageSize - 1)
+
+            if (error) {
+                if (isMissingFunction(error)) {
+                    console.warn('RPC vendas_matriz not installed, aggregating in the browser')
+                    matrizRpcDisponivel = false
+                    return this.getVendas(clienteId, ano)
+                }
+                throw error
+            }
+
+            rows.push(...data)
+            if (data.length < pageSize) break
+            page++
+        }
+
+        return rows.map(r => ({
+            ...r,
+            produto_nome: r.produto_nome || r.produto,
+            produto_codigo: r.produto
         }))
     },
 
-    // Get available years for a client
-    async getAnos(clienteId) {
-        // Obter anos da tabela de pastas (vendas_anos)
-        const { data: pastas, error: errorPastas } = await supabase
-            .from('vendas_anos')
+    // Get the product × month cube for a client and year (cached until a write invalidates it)
+    async getCube(clienteId, ano) {
+        const cached = salesCube.get(clienteId, ano)
+        if (cached) return cached
+
+        return salesCube.set(
+            clienteId,
+            ano,
+            this.getVendasConsolidadas(clienteId, ano).then(buildSalesCube)
+        )
+    },
+
+    // Cubes for several years of a client; the uncached years come from a single rollup query
+    async getCubes(clienteId, anos) {
+        const cubes = new Map()
+        const faltando = []
+        for (const ano of anos) {
+            const cached = salesCube.get(clienteId, ano)
+            if (cached) cubes.set(ano, cached)
+            else faltando.push(ano)
+        }
+
+        if (faltando.length > 0) {
+            const rollup = this.getAnosRollupCompletos(clienteId, faltando).then(async completos => ({
+                completos,
+                porAno: completos?.size > 0 ? await this.getVendasMensalAnos(clienteId, [...completos]) : null
+            }))
+            for (const ano of faltando) {
+                const vendas = rollup.then(({ completos, porAno }) =>
+                    porAno?.get(Number(ano)) || this.getVendasSemRollup(clienteId, ano, completos !== null))
+                cubes.set(ano, salesCube.set(clienteId, ano, vendas.then(buildSalesCube)))
+            }
+        }
+
+        const resolvidos = await Promise.all(anos.map(ano => cubes.get(ano)))
+        return new Map(anos.map((ano, i) => [ano, resolvidos[i]]))
+    },
+
+    // Dashboard source: the vendas_mensal rollup of a year flagged complete, else the RPC/raw
+    // rows (and the whole year is rolled up in the background). Having some rollup rows is not
+    // enough: importing one month into a year never rolled up writes only that month
+    async getVendasConsolidadas(clienteId, ano) {
+        const completos = await this.getAnosRollupCompletos(clienteId, [ano])
+        if (completos?.has(Number(ano))) {
+            const rollup = await this.getVendasMensal(clienteId, ano)
+            if (rollup) return rollup
+        }
+        return this.getVendasSemRollup(clienteId, ano, completos !== null)
+    },
+
+    async getVendasSemRollup(clienteId, ano, rollupExiste) {
+        const agregadas = await this.getVendasAgregadas(clienteId, ano)
+        if (rollupExiste && agregadas.length > 0) {
+            this.completarRollup(clienteId, ano)
+                .catch(error => console.warn('Could not backfill vendas_mensal:', error))
+        }
+        return agregadas
+    },
+
+    // ===== Rollup mensal (vendas_mensal) =====
+
+    // Years whose rollup is complete (Set of numbers), or null when vendas_mensal_anos does not exist
+    async getAnosRollupCompletos(clienteId, anos) {
+        if (!rollupAnosDisponivel) return null
+
+        const { data, error } = await supabase
+            .from('vendas_mensal_anos')
             .select('ano')
             .eq('cliente_id', clienteId)
+            .in('ano', anos)
 
-        // Opcional: também buscar da tabela de vendas para garantir legado
-        const { data: vendas, error: errorVendas } = await supabase
-            .from('vendas')
-            .select('ano_referencia')
+        if (error) {
+            if (isMissingTable(error)) {
+                console.warn('vendas_mensal_anos not created, reading sales without the rollup')
+                rollupAnosDisponivel = false
+                return null
+            }
+            throw error
+        }
+        return new Set(data.map(r => Number(r.ano)))
+    },
+
+    async marcarRollupCompleto(clienteId, ano) {
+        if (!rollupAnosDisponivel) return
+
+        const { error } = await supabase
+            .from('vendas_mensal_anos')
+            .upsert([{ cliente_id: clienteId, ano, completo_em: new Date().toISOString() }], { onConflict: 'cliente_id,ano' })
+
+        if (error && !isMissingTable(error)) throw error
+    },
+
+    /**
+     * Recalcula o rollup do ano inteiro e só então marca o ano como completo
+     * @param {number} clienteId
+     * @param {number} ano
+     * @param {boolean} novo - false: reaproveita um recálculo em andamento (leituras do painel);
+     *                         true: roda depois dele, para incluir vendas gravadas agora (importação)
+     */
+    completarRollup(clienteId, ano, novo = false) {
+        const key = `${clienteId}|${ano}`
+        const emAndamento = completando.get(key)
+        if (emAndamento && !novo) return emAndamento
+
+        const run = (emAndamento || Promise.resolve())
+            .catch(() => {})
+            .then(() => this.recalcularRollup(clienteId, ano))
+        completando.set(key, run)
+        run.catch(() => {}).finally(() => {
+            if (completando.get(key) === run) completando.delete(key)
+        })
+        return run
+    },
+
+    // Rows of the rollup for a year, or null when the table does not exist
+    async getVendasMensal(clienteId, ano) {
+        const porAno = await this.getVendasMensalAnos(clienteId, [ano])
+        return porAno && porAno.get(Number(ano))
+    },
+
+    // Rollup rows of several years in one query: Map ano -> rows, or null when the table does not exist
+    async getVendasMensalAnos(clienteId, anos) {
+        const porAno = new Map(anos.map(ano => [Number(ano), []]))
+        const pageSize = 1000
+        let page = 0
+
+        while (true) {
+            const { data, error } = await supabase
+                .from('vendas_mensal')
+                .select('ano, produto, produto_nome, mes_ref, quantidade, valor, registros')
+                .eq('cliente_id', clienteId)
+                .in('ano', anos)
+                .order('id')
+                .range(page * pageSize, (page + 1) * pageSize - 1)
+
+            if (error) {
+                if (isMissingTable(error)) return null
+                throw error
+            }
+
+            for (const r of data) {
+                porAno.get(Number(r.ano))?.push({ ...r, produto_codigo: r.produto })
+            }
+            if (data.length < pageSize) break
+            page++
+        }
+
+        return porAno
+    },
+
+    async gravarRollup(clienteId, ano, linhas) {
+        const registros = linhas.map(l => ({
+            cliente_id: clienteId,
+            ano,
+            mes_ref: l.mes_ref,
+            produto: l.produto,
+            produto_nome: l.produto_nome || l.produto,
+            quantidade: l.quantidade,
+            valor: Math.round(l.valor * 100) / 100,
+            registros: l.registros
+        }))
+        // Unique per cell, so a chunk whose response was lost can be replayed
+        await bulkInsert(supabase, 'vendas_mensal', registros, { onConflict: ROLLUP_CHAVE })
+    },
+
+    // Replace one month of the rollup with freshly aggregated rows
+    async substituirRollupMes(clienteId, ano, mesRef, linhas) {
+        const { error } = await supabase
+            .from('vendas_mensal')
+            .delete()
             .eq('cliente_id', clienteId)
+            .eq('ano', ano)
+            .eq('mes_ref', mesRef)
+
+        if (error) {
+            if (isMissingTable(error)) return
+            throw error
+        }
+        await this.gravarRollup(clienteId, ano, linhas.map(l => ({ ...l, mes_ref: mesRef })))
+    },
+
+    async limparRollup(clienteId, ano = null, mesRef = null) {
+        let query = supabase
+            .from('vendas_mensal')
+            .delete()
+            .eq('cliente_id', clienteId)
+
+        if (ano !== null) query = query.eq('ano', ano)
+        if (mesRef !== null) query = query.eq('mes_ref', mesRef)
+
+        const { error } = await query
+        if (error && !isMissingTable(error)) console.warn('Could not clear vendas_mensal:', error)
+
+        // A whole year (or client) gone: its next rollup starts from scratch
+        if (mesRef === null && rollupAnosDisponivel) {
+            let flags = supabase
+                .from('vendas_mensal_anos')
+                .delete()
+                .eq('cliente_id', clienteId)
+            if (ano !== null) flags = flags.eq('ano', ano)
+
+            const { error: errorFlags } = await flags
+            if (errorFlags && !isMissingTable(errorFlags)) console.warn('Could not clear vendas_mensal_anos:', errorFlags)
+        }
+    },
 
-        if (errorPastas && errorVendas) {
-            console.error('Error fetching years:', errorPastas || errorVendas)
+    // Rebuild the rollup of a year (or only some months) from the raw vendas table;
+    // rebuilding the whole year flags it complete
+    async recalcularRollup(clienteId, ano, meses = null) {
+        const matriz = await this.getVendasAgregadas(clienteId, ano)
+        const linhas = agregarPorMesProduto(matriz)
+        const alvo = meses || [...new Set(linhas.map(l => l.mes_ref))]
+
+        for (const mesRef of alvo) {
+            await this.substituirRollupMes(clienteId, ano, mesRef, linhas.filter(l => l.mes_ref === mesRef))
+        }
+        if (!meses) {
+            // Months that no longer exist in vendas
+            const rollup = await this.getVendasMensal(clienteId, ano)
+            const orfaos = new Set((rollup || []).map(r => r.mes_ref).filter(m => !alvo.includes(m)))
+            for (const mesRef of orfaos) await this.limparRollup(clienteId, ano, mesRef)
+            await this.marcarRollupCompleto(clienteId, ano)
+        }
+    },
+
+    /**
+     * Verifica se o rollup vendas_mensal bate com a tabela vendas
+     * @param {number} clienteId
+     * @param {number} ano
+     * @param {boolean} reparar - Recalcula os meses divergentes
+     * @returns {Promise<{ ok: boolean, divergencias: { mes_ref: string, produto: string, rollup: string, vendas: string }[] }>}
+     */
+    async verificarRollup(clienteId, ano, reparar = false) {
+        const rollup = await this.getVendasMensal(clienteId, ano)
+        if (rollup === null) throw new Error('Tabela vendas_mensal não existe. Execute o supabase_schema.sql.')
+
+        const esperado = agregarPorMesProduto(await this.getVendasAgregadas(clienteId, ano))
+        const atual = agregarPorMesProduto(rollup)
+
+        const chave = (l) => `${l.mes_ref}\u0000${l.produto}`
+        const atualMap = new Map(atual.map(l => [chave(l), l]))
+        const esperadoMap = new Map(esperado.map(l => [chave(l), l]))
+
+        const divergencias = []
+        for (const [key, l] of esperadoMap) {
+            const r = atualMap.get(key)
+            // Names too: the cube keys products by name, so a stale name splits a product in two
+            if (!r || fingerprint(r) !== fingerprint(l) || r.produto_nome !== l.produto_nome) {
+                divergencias.push({ mes_ref: l.mes_ref, produto: l.produto, rollup: r ? fingerprint(r) : '-', vendas: fingerprint(l) })
+            }
+        }
+        for (const [key, r] of atualMap) {
+            if (!esperadoMap.has(key)) {
+                divergencias.push({ mes_ref: r.mes_ref, produto: r.produto, rollup: fingerprint(r), vendas: '-' })
+            }
+        }
+
+        if (reparar && divergencias.length > 0) {
+            await this.recalcularRollup(clienteId, ano, [...new Set(divergencias.map(d => d.mes_ref))])
+            salesCube.invalidate(clienteId, ano)
+        }
+
+        return { ok: divergencias.length === 0, divergencias }
+    },
+
+    // Years of the client, newest first: folders (vendas_anos) plus any year that has sales
+    // [{ ano, registros }] newest first; folders without sales come with registros = 0
+    async getAnosComContagem(clienteId) {
+        const [{ data: pastas, error: errorPastas }, contagem] = await Promise.all([
+            cachedRead('vendas_anos', { clienteId }, () =>
+                sharedCache.read('vendas_anos', { clienteId }, async () => {
+                    const { data, error } = await supabase
+                        .from('vendas_anos')
+                        .select('ano')
+                        .eq('cliente_id', clienteId)
+                    if (error) throw error
+                    return data
+                })
+            ).then(data => ({ data, error: null }), error => ({ data: null, error })),
+            this.getContagemAnos(clienteId).catch(error => {
+                console.error('Error counting sales per year:', error)
+                return null
+            })
+        ])
+
+        if (errorPastas && !contagem) {
+            console.error('Error fetching years:', errorPastas)
             return []
         }
 
-        const anosPastas = pastas ? pastas.map(p => p.ano) : []
-        const anosVendas = vendas ? vendas.map(v => v.ano_referencia) : []
+        const anos = new Set([...(pastas || []).map(p => p.ano), ...(contagem?.keys() || [])].filter(Boolean))
+        return [...anos]
+            .sort((a, b) => b - a) // descending
+            .map(ano => ({ ano, registros: contagem?.get(ano) || 0 }))
+    },
+
+    // Map ano -> number of vendas rows, from one grouped count in the database (cached with the cubes)
+    async getContagemAnos(clienteId) {
+        const cached = salesCube.getContagem(clienteId)
+        if (cached) return cached
+        return salesCube.setContagem(clienteId, this.contarAnos(clienteId))
+    },
+
+    async contarAnos(clienteId) {
+        if (contagemRpcDisponivel) {
+            const { data, error } = await supabase.rpc('vendas_contagem_anos', { p_cliente_id: clienteId })
+            if (!error) return new Map(data.map(r => [Number(r.ano), Number(r.n_registros)]))
+            if (!isMissingFunction(error)) throw error
+            console.warn('RPC vendas_contagem_anos not installed, counting year by year')
+            contagemRpcDisponivel = false
+        }
 
-        // Merge and unique
-        const anos = [...new Set([...anosPastas, ...anosVendas].filter(Boolean))]
-        return anos.sort((a, b) => b - a) // descending
+        // Fallback (RPC not installed): the old distinct-years scan, then one head count per year
+        const [{ data: pastas }, { data: vendas }] = await Promise.all([
+            supabase.from('vendas_anos').select('ano').eq('cliente_id', clienteId),
+            supabase.from('vendas').select('ano_referencia').eq('cliente_id', clienteId)
+        ])
+        const anos = [...new Set([
+            ...(pastas || []).map(p => p.ano),
+            ...(vendas || []).map(v => v.ano_referencia)
+        ].filter(Boolean))]
+        const contagens = await Promise.all(anos.map(async ano => {
+            const { count, error } = await supabase
+                .from('vendas')
+                .select('id', { count: 'exact', head: true })
+                .eq('cliente_id', clienteId)
+                .eq('ano_referencia', ano)
+            if (error) throw error
+            return [ano, count || 0]
+        }))
+        return new Map(contagens.filter(([, count]) => count > 0))
     },
 
-    // Create year record
     async createAno(clienteId, ano) {
         try {
             const { data, error } = await supabase
@@ -114,6 +516,7 @@ export const salesService = {
                 .select()
 
             if (error) throw error
+            invalidateTable('vendas_anos')
             return data[0]
         } catch (error) {
             // Ignore if already exists
@@ -189,6 +592,11 @@ export const salesService = {
                         .from('produtos')
                         .update({ nome: produtosUnicos[codigo] })
                         .eq('codigo', codigo)
+                    // Rollup rows written under the old name (the code)
+                    await supabase
+                        .from('vendas_mensal')
+                        .update({ produto_nome: produtosUnicos[codigo] })
+                        .eq('produto', codigo)
                 }
                 console.log(`✅ Updated names for ${toUpdate.length} products`)
             }
@@ -197,43 +605,220 @@ export const salesService = {
         }
     },
 
-    // Import CSV data
-    async importVendas(clienteId, ano, vendasData, onProgress) {
+    /**
+     * Importação incremental (delta) de um mês
+     * Agrega o arquivo por produto, compara a impressão digital de cada agregado
+     * (quantidade|valor) com o que já está salvo e só grava o que mudou.
+     * Se o hash do mês for igual ao da última importação, nada é gravado.
+     * @param {number} clienteId
+     * @param {number} ano
+     * @param {string} mesRef - Ex: 'Mês 03'
+     * @param {string} arquivo - Nome do arquivo de origem
+     * @param {Iterable|AsyncIterable<object[]>} batches - Lotes de registros do parser (um único array ou o streaming)
+     * @param {function} onProgress
+     * @returns {Promise<{ success: boolean, skipped?: boolean, inserted?: number, deleted?: number, unchanged?: number, error?: string }>}
+     */
+    async importMesDelta(clienteId, ano, mesRef, arquivo, batches, onProgress) {
         try {
-            // Auto-register products FIRST
-            await this.autoRegisterProdutos(vendasData, onProgress)
+            // 1. Aggregate the file per product (bounded by the number of distinct products)
+            const agregado = new Map()
+            for await (const batch of batches) {
+                for (const v of batch) {
+                    const atual = agregado.get(v.produto)
+                    if (atual) {
+                        atual.quantidade += v.quantidade
+                        atual.valor += v.valor
+                    } else {
+                        agregado.set(v.produto, {
+                            produto: v.produto,
+                            produto_nome: v.produto_nome,
+                            quantidade: v.quantidade,
+                            valor: v.valor
+                        })
+                    }
+                }
+            }
 
-            // Then, ensure year exists
-            if (onProgress) onProgress('Verificando pasta do ano...')
-            await this.createAno(clienteId, ano)
+            // 2. Month hash: skip the whole file when it matches the last import
+            const linhas = [...agregado.values()].sort((a, b) => (a.produto < b.produto ? -1 : a.produto > b.produto ? 1 : 0))
+            const hash = await sha256Hex(`${mesRef}\n` + linhas.map(l => `${l.produto}\t${fingerprint(l)}`).join('\n'))
 
-            // Clean data for insertion (remove non-schema fields like produto_nome)
-            // We clone objects to avoid modifying the original array if it's used elsewhere
-            console.log('🧹 Cleaning data for import (removing extra columns)...')
-            const cleanedData = vendasData.map(({ produto_nome, ...rest }) => rest)
+            const ultima = await this.getUltimaImportacao(clienteId, ano, mesRef)
+            if (ultima?.hash_arquivo === hash) {
+                return { success: true, skipped: true, inserted: 0, deleted: 0, unchanged: linhas.length }
+            }
+
+            // 3. What is stored for this month, aggregated the same way
+            if (onProgress) onProgress(`${mesRef}: comparando com os dados salvos...`)
+            const salvo = await this.getAgregadoMes(clienteId, ano, mesRef)
 
-            // Insert in batches (Supabase has limits)
-            const batchSize = 500
-            const total = cleanedData.length
+            const novos = []
+            const idsRemover = []
+            let unchanged = 0
 
-            for (let i = 0; i < total; i += batchSize) {
-                if (onProgress) onProgress(`Salvando vendas: ${Math.min(i + batchSize, total)} / ${total}...`)
-                
-                const batch = cleanedData.slice(i, i + batchSize)
+            for (const linha of linhas) {
+                const atual = salvo.get(linha.produto)
+                if (atual && atual.fingerprint === fingerprint(linha)) {
+                    linha.registros = atual.ids.length
+                    unchanged++
+                    continue
+                }
+                if (atual) idsRemover.push(...atual.ids)
+                linha.registros = 1
+                novos.push(linha)
+            }
+            for (const [produto, atual] of salvo) {
+                if (!agregado.has(produto)) idsRemover.push(...atual.ids)
+            }
+
+            // 4. Write only the delta: new rows first, then the rows they replace. A failure in
+            // between leaves a product counted twice (never missing) and the month unrecorded in
+            // vendas_importacoes; the next import then sees the sum differ from the file, inserts
+            // again and deletes every stored row of that product, old and new
+            if (novos.length > 0) await this.autoRegisterProdutos(novos)
+            await this.createAno(clienteId, ano)
+
+            // One key per row of this attempt: replaying a chunk is a no-op, a later attempt never collides
+            const lote = crypto.randomUUID()
+            const registros = novos.map(l => ({
+                cliente_id: clienteId,
+                ano_referencia: ano,
+                arquivo_origem: arquivo,
+                mes_ref: mesRef,
+                produto: l.produto,
+                quantidade: l.quantidade,
+                valor: Math.round(l.valor * 100) / 100,
+                chave_importacao: `${clienteId}|${ano}|${mesRef}|${lote}|${l.produto}`
+            }))
+            const progresso = ({ done, total }) => {
+                if (onProgress) onProgress(`${mesRef}: salvando ${done} / ${total} alterações...`, { done, total })
+            }
+            const semChave = () => bulkInsert(supabase, 'vendas', registros.map(({ chave_importacao, ...r }) => r), { onProgress: progresso })
+            if (!chaveImportacaoDisponivel) {
+                await semChave()
+            } else {
+                try {
+                    await bulkInsert(supabase, 'vendas', registros, { onConflict: 'chave_importacao', onProgress: progresso })
+                } catch (error) {
+                    if (!isMissingChave(error) || error.inserted > 0) throw error
+                    console.warn('vendas.chave_importacao not installed, inserting without retries on ambiguous failures')
+                    chaveImportacaoDisponivel = false
+                    await semChave()
+                }
+            }
+
+            const ID_BATCH = 200
+            for (let i = 0; i < idsRemover.length; i += ID_BATCH) {
                 const { error } = await supabase
                     .from('vendas')
-                    .insert(batch)
-
+                    .delete()
+                    .in('id', idsRemover.slice(i, i + ID_BATCH))
                 if (error) throw error
             }
 
-            return { success: true }
+            // 5. Monthly rollup: this month is now exactly the aggregated file, named from
+            // produtos (not the CSV) so it matches the months written by recalcularRollup.
+            // A year not rolled up yet is rebuilt whole, or the other months would be missing
+            const completos = await this.getAnosRollupCompletos(clienteId, [ano])
+            if (completos?.has(Number(ano))) {
+                const nomes = await this.getNomesProdutos(linhas.map(l => l.produto))
+                await this.substituirRollupMes(clienteId, ano, mesRef,
+                    linhas.map(l => ({ ...l, produto_nome: nomes.get(l.produto) || l.produto })))
+            } else if (completos !== null) {
+                await this.completarRollup(clienteId, ano, true)
+            }
+
+            await this.salvarImportacao(clienteId, ano, mesRef, arquivo, hash)
+
+            return { success: true, inserted: registros.length, deleted: idsRemover.length, unchanged }
         } catch (error) {
-            console.error('Error importing sales:', error)
+            console.error('Error importing month delta:', error)
             return { success: false, error: error.message }
+        } finally {
+            salesCube.invalidate(clienteId, ano)
         }
     },
 
+    // Stored rows of one month aggregated per product: produto -> { ids, fingerprint }
+    async getAgregadoMes(clienteId, ano, mesRef) {
+        const porProduto = new Map()
+        const pageSize = 1000
+        let page = 0
+
+        while (true) {
+            const { data, error } = await supabase
+                .from('vendas')
+                .select('id, produto, quantidade, valor')
+                .eq('cliente_id', clienteId)
+                .eq('ano_referencia', ano)
+                .eq('mes_ref', mesRef)
+                .order('id')
+                .range(page * pageSize, (page + 1) * pageSize - 1)
+
+            if (error) throw error
+
+            for (const v of data) {
+                const atual = porProduto.get(v.produto) || { ids: [], quantidade: 0, valor: 0 }
+                atual.ids.push(v.id)
+                atual.quantidade += v.quantidade || 0
+                atual.valor += Number(v.valor) || 0
+                porProduto.set(v.produto, atual)
+            }
+
+            if (data.length < pageSize) break
+            page++
+        }
+
+        for (const atual of porProduto.values()) atual.fingerprint = fingerprint(atual)
+        return porProduto
+    },
+
+    async getUltimaImportacao(clienteId, ano, mesRef) {
+        const { data, error } = await supabase
+            .from('vendas_importacoes')
+            .select('hash_arquivo, arquivo, importado_em')
+            .eq('cliente_id', clienteId)
+            .eq('ano', ano)
+            .eq('mes_ref', mesRef)
+            .maybeSingle()
+
+        if (error) {
+            // Table not created yet: behave as if the month was never imported
+            console.warn('Could not read import history:', error)
+            return null
+        }
+        return data
+    },
+
+    // Forget import hashes so the next upload of the same file is written again
+    async limparImportacoes(clienteId, ano = null, mesRef = null) {
+        let query = supabase
+            .from('vendas_importacoes')
+            .delete()
+            .eq('cliente_id', clienteId)
+
+        if (ano !== null) query = query.eq('ano', ano)
+        if (mesRef !== null) query = query.eq('mes_ref', mesRef)
+
+        const { error } = await query
+        if (error) console.warn('Could not clear import hashes:', error)
+    },
+
+    async salvarImportacao(clienteId, ano, mesRef, arquivo, hash) {
+        const { error } = await supabase
+            .from('vendas_importacoes')
+            .upsert([{
+                cliente_id: clienteId,
+                ano,
+                mes_ref: mesRef,
+                arquivo,
+                hash_arquivo: hash,
+                importado_em: new Date().toISOString()
+            }], { onConflict: 'cliente_id,ano,mes_ref' })
+
+        if (error) console.warn('Could not save import hash:', error)
+    },
+
     // Delete sales for a specific month
     async deleteVendasMes(clienteId, ano, mesRef) {
         const { error } = await supabase
@@ -243,6 +828,10 @@ export const salesService = {
             .eq('ano_referencia', ano)
             .eq('mes_ref', mesRef)
 
+        salesCube.invalidate(clienteId, ano)
+        await this.limparImportacoes(clienteId, ano, mesRef)
+        await this.limparRollup(clienteId, ano, mesRef)
+
         if (error) {
             console.error('Error deleting sales:', error)
             return false
@@ -258,6 +847,10 @@ export const salesService = {
             .eq('cliente_id', clienteId)
             .eq('ano_referencia', ano)
 
+        salesCube.invalidate(clienteId, ano)
+        await this.limparImportacoes(clienteId, ano)
+        await this.limparRollup(clienteId, ano)
+
         if (error) {
             console.error('Error deleting year sales:', error)
             return false
@@ -274,6 +867,10 @@ export const salesService = {
             .eq('cliente_id', clienteId)
             .eq('ano_referencia', ano)
 
+        salesCube.invalidate(clienteId, ano)
+        await this.limparImportacoes(clienteId, ano)
+        await this.limparRollup(clienteId, ano)
+
         if (errorVendas) {
             console.error('Error deleting year sales:', errorVendas)
             return false
@@ -285,6 +882,7 @@ export const salesService = {
             .delete()
             .eq('cliente_id', clienteId)
             .eq('ano', ano)
+        invalidateTable('vendas_anos')
 
         if (errorAno) {
             console.error('Error deleting year folder:', errorAno)
@@ -296,16 +894,20 @@ export const salesService = {
 
     // Favorites (Essenciais)
     async getFavoritos(clienteId) {
-        const { data, error } = await supabase
-            .from('essenciais')
-            .select('produto')
-            .eq('cliente_id', clienteId)
+        try {
+            return await cachedRead('essenciais', { clienteId }, async () => {
+                const { data, error } = await supabase
+                    .from('essenciais')
+                    .select('produto')
+                    .eq('cliente_id', clienteId)
 
-        if (error) {
+                if (error) throw error
+                return data.map(f => f.produto)
+            })
+        } catch (error) {
             console.error('Error fetching favorites:', error)
             return []
         }
-        return data.map(f => f.produto)
     },
 
     async addFavorito(clienteId, produto) {
@@ -317,6 +919,7 @@ export const salesService = {
             console.error('Error adding favorite:', error)
             return false
         }
+        invalidateTable('essenciais')
         return true
     },
 
@@ -331,6 +934,7 @@ export const salesService = {
             console.error('Error removing favorite:', error)
             return false
         }
+        invalidateTable('essenciais')
         return true
     },
 
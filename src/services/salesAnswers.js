@@ -0,0 +1,132 @@
+// Assistant shortcuts: an answer cache and a deterministic path for questions the cube answers directly
+//
+// Cached answers are keyed by (cliente, ano, data versions, context, normalized question).
+// The client's 'vendas:<id>' token in cache_versoes changes on every write to its sales
+// by any user or tab (read through sharedCache, at most ~30 s old); salesCube's counter
+// covers this tab's own imports right away. The context hash covers everything else the
+// prompt is built from (favourites, summary options). Answers about old data are never served again
+// and simply age out of the LRU.
+
+import { createLruCache } from '../utils/lruCache'
+import { foldText } from '../utils/productSearch'
+import { sha256Hex } from '../utils/hash'
+import { salesCube } from './salesCube'
+import { sharedCache } from './supabase'
+
+export const answerCache = createLruCache({ maxEntries: 200, ttlMs: 30 * 60 * 1000 })
+
+// "Quais os TOP produtos do mês?!" -> "quais os top produtos do mes"
+export const normalizarPergunta = (pergunta) =>
+    foldText(pergunta).replace(/[^\p{L}\p{N}\s]/gu, ' ').replace(/\s+/g, ' ').trim()
+
+/**
+ * Chave da resposta, calculada antes de perguntar (a resposta fica com a versão dos dados que o modelo viu)
+ * @param {string} contexto - Texto de buildSalesContext enviado ao assistente
+ * @returns {Promise<string | null>} null quando a versão dos dados não pôde ser lida (sem cache)
+ */
+export async function chaveResposta(clienteId, ano, pergunta, contexto) {
+    let versao
+    try {
+        versao = await sharedCache.versao(`vendas:${clienteId}`)
+    } catch (error) {
+        console.warn('Could not read the sales data version, answer not cached:', error)
+        return null
+    }
+    const contextoHash = await sha256Hex(contexto)
+    return `${clienteId}|${ano}|${versao ?? '-'}|${salesCube.versao(clienteId)}|${contextoHash}|${normalizarPergunta(pergunta)}`
+}
+
+export function respostaEmCache(chave) {
+    return answerCache.get(chave)
+}
+
+export function guardarResposta(chave, resposta) {
+    answerCache.set(chave, resposta)
+}
+
+const NOMES_MESES = ['janeiro', 'fevereiro', 'marco', 'abril', 'maio', 'junho', 'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro']
+
+// Month the question refers to, as an index into cube.meses (last month by default; -1 when not in the data)
+function mesDaPergunta(q, cube) {
+    const porNumero = (n) => cube.meses.findIndex(mes => parseInt(mes.match(/\d+/)?.[0]) === n)
+
+    const numero = q.match(/\bmes (\d{1,2})\b/)
+    if (numero) return porNumero(parseInt(numero[1]))
+
+    const nome = NOMES_MESES.findIndex(n => new RegExp(`\\b${n}\\b`).test(q))
+    if (nome >= 0) return porNumero(nome + 1)
+
+    if (/\b(mes passado|penultimo mes)\b/.test(q)) return cube.meses.length - 2
+    return cube.meses.length - 1
+}
+
+// Every word a whole-month ranking or total question is made of. Any other word names a
+// product ("quanto vendeu a tinta X?") or narrows the question (a line, a customer, "em
+// valor", a year), which the cube's per-month rankings and totals do not answer
+const VOCABULARIO = new RegExp(`^(${[
+    'o', 'a', 'os', 'as', 'de', 'do', 'da', 'dos', 'das', 'em', 'no', 'na', 'nos', 'nas', 'e', 'que',
+    'qual', 'quais', 'quanto', 'foi', 'foram', 'teve', 'tiveram', 'tivemos', 'houve', 'me', 'mostre',
+    'mostra', 'liste', 'lista', 'diga', 'ver', 'com', 'para', 'pra', 'relacao', 'ao', 'anterior',
+    'produto', 'produtos', 'item', 'itens', 'venda', 'vendas', 'vend\\w*',
+    'mes', 'ano', 'este', 'esse', 'deste', 'desse', 'neste', 'nesse', 'ultimo', 'passado', 'penultimo', 'atual',
+    ...NOMES_MESES,
+    'top', 'mais', 'menos', 'piores', 'melhores', 'maiores', 'campe\\w*', 'cai\\w*', 'queda\\w*', 'piorou',
+    'diminu\\w*', 'subi\\w*', 'alta', 'altas', 'cresce\\w*', 'melhorou', 'aument\\w*', 'total', 'faturamento'
+].join('|')})$`)
+
+const un = (n) => `${Math.round(n).toLocaleString('pt-BR')} un`
+const reais = (n) => n.toLocaleString('pt-BR', { style: 'currency', currency: 'BRL' })
+
+const lista = (cube, indices, valores, formatar) =>
+    indices.map((p, i) => `${i + 1}. ${cube.produtos[p]} — ${formatar(valores[i])}`).join('\n')
+
+/**
+ * Resposta direta (sem LLM) para perguntas que os agregados do cubo respondem
+ * @returns {string | null} null quando a pergunta precisa do assistente
+ */
+export function respostaDireta(pergunta, cube) {
+    if (!cube || cube.meses.length === 0) return null
+    const q = normalizarPergunta(pergunta)
+    // Explanations and advice need the assistant even when they mention a ranking
+    if (/\b(por que|porque|explique|explica\w*|sugest\w*|sugira|recomend\w*|estrateg\w*)\b/.test(q)) return null
+    // Products and other qualifiers: only whole-month questions are answered here ("mes 3" is a month)
+    if (q.replace(/\bmes \d{1,2}\b/g, 'mes').split(' ').some(palavra => !VOCABULARIO.test(palavra))) return null
+
+    const intencao =
+        /\b(menos vendid\w*|piores vendas)\b/.test(q) ? 'baixas'
+            : /\b(top|mais vendid\w*|campe\w*|melhores)\b/.test(q) ? 'top'
+                : /\b(cai\w*|queda\w*|piorou|diminu\w*)\b/.test(q) ? 'queda'
+                    : /\b(subi\w*|alta|cresce\w*|melhorou|aument\w*)\b/.test(q) ? 'alta'
+                        : /\b(total|quanto vend\w*|faturamento)\b/.test(q) ? 'total'
+                            : null
+    if (!intencao) return null
+
+    if (intencao === 'total' && /\bano\b/.test(q) && !/\bmes\b/.test(q)) {
+        const qtd = cube.totalQtdMes.reduce((s, v) => s + v, 0)
+        const valor = cube.totalValorMes.reduce((s, v) => s + v, 0)
+        return `Total do ano: ${un(qtd)}, ${reais(valor)} em ${cube.meses.length} meses.`
+    }
+
+    const m = mesDaPergunta(q, cube)
+    if (m < 0) return null
+    const mes = cube.meses[m]
+    const r = cube.rankings[m]
+
+    switch (intencao) {
+        case 'top':
+            return r.top.length > 0 ? `Mais vendidos em ${mes}:\n${lista(cube, r.top, r.topQtd, un)}` : `Nenhuma venda em ${mes}.`
+        case 'baixas':
+            return r.baixas.length > 0 ? `Menos vendidos em ${mes} (com venda):\n${lista(cube, r.baixas, r.baixasQtd, un)}` : `Nenhuma venda em ${mes}.`
+        case 'queda':
+        case 'alta': {
+            if (m === 0) return `${mes} é o primeiro mês com dados, não há mês anterior para comparar.`
+            const anterior = cube.meses[m - 1]
+            const [indices, deltas] = intencao === 'queda' ? [r.queda, r.quedaDelta] : [r.alta, r.altaDelta]
+            if (indices.length === 0) return `Nenhum produto ${intencao === 'queda' ? 'caiu' : 'subiu'} em ${mes} em relação a ${anterior}.`
+            const titulo = intencao === 'queda' ? 'Maiores quedas' : 'Maiores altas'
+            return `${titulo} em ${mes} (vs ${anterior}):\n${lista(cube, indices, deltas, d => `${d > 0 ? '+' : ''}${un(d)}`)}`
+        }
+        default:
+            return `Total de ${mes}: ${un(cube.totalQtdMes[m])}, ${reais(cube.totalValorMes[m])} (${cube.vendidosMes[m]} produtos vendidos).`
+    }
+}
@@ -0,0 +1,115 @@
+// Compact text summary of a client's year, used as context for the sales assistant
+//
+// Built from the cached cube (no extra queries) and cached per cube, so it
+// lives exactly as long as the data it describes. Sections are added in
+// priority order until the token budget is used up.
+
+export const CONTEXT_DEFAULTS = {
+    maxTokens: 1500,    // budget for the whole summary
+    topProdutos: 20,    // best sellers of the year
+    essenciais: 30,     // favourites listed with their numbers
+    movers: 3           // risers/fallers per month
+}
+
+// cube -> Map<options key, summary>
+const contextCache = new WeakMap()
+
+// Rough token count for Portuguese text (~4 characters per token)
+export const estimateTokens = (text) => Math.ceil(text.length / 4)
+
+const fmtQtd = (n) => Math.round(n).toLocaleString('pt-BR')
+const fmtValor = (n) => Math.round(n).toLocaleString('pt-BR')
+
+/**
+ * Resumo compacto das vendas de um cliente/ano dentro de um orçamento de tokens
+ * @param {object} cube - Cubo de vendas (buildSalesCube)
+ * @param {object} info - { cliente, ano, favoritos }
+ * @param {object} options - maxTokens, topProdutos, essenciais, movers
+ * @returns {{ text: string, tokens: number, truncated: boolean }}
+ */
+export function buildSalesContext(cube, { cliente, ano, favoritos = [] }, options = {}) {
+    const opts = { ...CONTEXT_DEFAULTS, ...options }
+    const key = JSON.stringify([cliente, ano, favoritos, opts])
+
+    let porOpcoes = contextCache.get(cube)
+    if (!porOpcoes) {
+        porOpcoes = new Map()
+        contextCache.set(cube, porOpcoes)
+    }
+    if (!porOpcoes.has(key)) {
+        porOpcoes.set(key, montarContexto(cube, cliente, ano, favoritos, opts))
+    }
+    return porOpcoes.get(key)
+}
+
+function montarContexto(cube, cliente, ano, favoritos, opts) {
+    const { produtos, meses, qtd, totalQtdMes, totalValorMes, totalQtdProduto, rankings } = cube
+    const M = meses.length
+    const linhas = []
+    let usados = 0
+    let truncated = false
+
+    // Adds a line if it fits; false once the budget is exhausted
+    const adicionar = (linha) => {
+        const custo = estimateTokens(linha) + 1
+        if (usados + custo > opts.maxTokens) {
+            truncated = true
+            return false
+        }
+        linhas.push(linha)
+        usados += custo
+        return true
+    }
+
+    // Adds "titulo item; item; ..." with as many items as the budget allows
+    const adicionarLista = (titulo, itens) => {
+        if (itens.length === 0) return
+        let linha = titulo
+        for (let i = 0; i < itens.length; i++) {
+            const proxima = `${linha}${i === 0 ? ' ' : '; '}${itens[i]}`
+            if (usados + estimateTokens(proxima) + 1 > opts.maxTokens) {
+                truncated = true
+                break
+            }
+            linha = proxima
+        }
+        if (linha !== titulo) adicionar(linha)
+    }
+
+    adicionar(`Cliente: ${cliente} | Ano: ${ano} | Registros: ${cube.registros} | Produtos: ${produtos.length} | Meses: ${M}`)
+
+    adicionarLista(
+        'Total por mês (qtd / R$):',
+        meses.map((mes, m) => `${mes} ${fmtQtd(totalQtdMes[m])} / ${fmtValor(totalValorMes[m])}`)
+    )
+
+    const ordem = produtos.map((_, p) => p).sort((a, b) => totalQtdProduto[b] - totalQtdProduto[a])
+    adicionarLista(
+        'Mais vendidos no ano (qtd):',
+        ordem.slice(0, opts.topProdutos).filter(p => totalQtdProduto[p] > 0).map(p => `${produtos[p]} ${fmtQtd(totalQtdProduto[p])}`)
+    )
+
+    const ultimo = M - 1
+    adicionarLista(
+        `Essenciais (qtd no ano / ${meses[ultimo] ?? '-'}):`,
+        favoritos
+            .slice(0, opts.essenciais)
+            .map(nome => {
+                const p = cube.produtoIndex.get(nome)
+                if (p === undefined) return `${nome} sem vendas`
+                return `${nome} ${fmtQtd(totalQtdProduto[p])} / ${fmtQtd(qtd[p * M + ultimo])}`
+            })
+    )
+
+    // Most recent months first: they matter most when the budget is tight
+    for (let m = ultimo; m >= 1; m--) {
+        const r = rankings[m]
+        const sobe = r.alta.slice(0, opts.movers).map((p, i) => `${produtos[p]} +${fmtQtd(r.altaDelta[i])}`)
+        const cai = r.queda.slice(0, opts.movers).map((p, i) => `${produtos[p]} ${fmtQtd(r.quedaDelta[i])}`)
+        if (sobe.length === 0 && cai.length === 0) continue
+        if (!adicionar(`${meses[m]} vs ${meses[m - 1]}: sobe ${sobe.join(', ') || '-'}; cai ${cai.join(', ') || '-'}`)) break
+    }
+
+    const text = linhas.join('\n')
+    return { text, tokens: estimateTokens(text), truncated }
+}
@@ -0,0 +1,299 @@
+// Columnar sales cube: product × month quantity/value arrays per (cliente, ano)
+//
+// Built once from the raw `vendas` rows and kept in memory until one of the
+// write paths (import, month/year delete, client delete) invalidates it.
+
+import { buildProductSearchIndex } from '../utils/productSearch'
+
+// clienteId:ano -> Promise<cube> (promises so concurrent loads share one fetch)
+const cubeCache = new Map()
+
+const cubeKey = (clienteId, ano) => `${clienteId}:${ano}`
+
+// clienteId -> Promise<Map<ano, n_registros>> (row counts per year, same lifetime as the cubes)
+const contagemCache = new Map()
+
+// clienteId -> data version, bumped on every invalidation (keys derived caches such as assistant answers)
+const versoes = new Map()
+
+// Month-over-month trend codes stored in cube.tendencia, and the matrix cell class of each
+export const TENDENCIA_CLASSES = ['', 'cell-up', 'cell-down', 'cell-zero']
+const SUBIU = 1
+const CAIU = 2
+const ZEROU = 3
+
+// Size of the per-month rankings (Análise Mensal)
+const RANKING_K = 5
+
+// Bounded top-k insert: lista stays sorted best-first and never grows past k.
+// Ties keep the earlier product first, like a stable sort would.
+function inserirRanking(lista, chaves, p, chave, melhor) {
+    let pos = lista.length
+    while (pos > 0 && melhor(chave, chaves[pos - 1])) pos--
+    if (pos >= RANKING_K) return
+    lista.splice(pos, 0, p)
+    chaves.splice(pos, 0, chave)
+    if (lista.length > RANKING_K) {
+        lista.pop()
+        chaves.pop()
+    }
+}
+
+const maior = (a, b) => a > b
+const menor = (a, b) => a < b
+
+// Sort months (Mês 01, Mês 02, etc.)
+const mesNumero = (mes) => parseInt(mes.match(/\d+/)?.[0] || '0')
+
+export function buildSalesCube(vendas) {
+    const produtoIndex = new Map()
+    const produtos = []
+    const codigos = []
+    const mesesSet = new Set()
+    let registros = 0
+
+    // 1st pass: dimensions (rows are raw vendas or server-side aggregates carrying a `registros` count)
+    for (const v of vendas) {
+        registros += Number(v.registros ?? 1)
+        const produtoKey = v.produto_nome || v.produto
+        if (!produtoIndex.has(produtoKey)) {
+            produtoIndex.set(produtoKey, produtos.length)
+            produtos.push(produtoKey)
+            codigos.push(v.produto_codigo || v.produto)
+        }
+        mesesSet.add(v.mes_ref)
+    }
+
+    const meses = Array.from(mesesSet).sort((a, b) => mesNumero(a) - mesNumero(b))
+    const mesIndex = new Map(meses.map((mes, idx) => [mes, idx]))
+
+    const P = produtos.length
+    const M = meses.length
+
+    // Row-major matrices: cell (p, m) lives at p * M + m
+    const qtd = new Float64Array(P * M)
+    const valor = new Float64Array(P * M)
+
+    // 2nd pass: fill cells
+    for (const v of vendas) {
+        const cell = produtoIndex.get(v.produto_nome || v.produto) * M + mesIndex.get(v.mes_ref)
+        // Number(): NUMERIC/BIGINT aggregates may arrive as strings
+        qtd[cell] += Number(v.quantidade) || 0
+        valor[cell] += Number(v.valor_total || v.valor) || 0
+    }
+
+    const totalQtdMes = new Float64Array(M)
+    const totalValorMes = new Float64Array(M)
+    const totalQtdProduto = new Float64Array(P)
+    // Trend of each cell against the previous month (first month stays 0)
+    const tendencia = new Uint8Array(P * M)
+    // Per month: products sold, best/worst sellers and biggest risers/fallers vs the previous month
+    const vendidosMes = new Uint32Array(M)
+    const rankings = Array.from({ length: M }, () => ({
+        top: [], topQtd: [],
+        baixas: [], baixasQtd: [],
+        alta: [], altaDelta: [],
+        queda: [], quedaDelta: []
+    }))
+
+    for (let p = 0; p < P; p++) {
+        const base = p * M
+        for (let m = 0; m < M; m++) {
+            const atual = qtd[base + m]
+            totalQtdMes[m] += atual
+            totalValorMes[m] += valor[base + m]
+            totalQtdProduto[p] += atual
+
+            const r = rankings[m]
+            if (atual > 0) {
+                vendidosMes[m]++
+                inserirRanking(r.top, r.topQtd, p, atual, maior)
+                inserirRanking(r.baixas, r.baixasQtd, p, atual, menor)
+            }
+
+            if (m === 0) continue
+            const anterior = qtd[base + m - 1]
+            if (atual > anterior) tendencia[base + m] = SUBIU
+            else if (atual < anterior && atual > 0) tendencia[base + m] = CAIU
+            else if (atual === 0 && anterior > 0) tendencia[base + m] = ZEROU
+
+            const delta = atual - anterior
+            if (delta > 0) inserirRanking(r.alta, r.altaDelta, p, delta, maior)
+            else if (delta < 0) inserirRanking(r.queda, r.quedaDelta, p, delta, menor)
+        }
+    }
+
+    return {
+        produtos,
+        codigos,
+        meses,
+        produtoIndex,
+        mesIndex,
+        qtd,
+        valor,
+        tendencia,
+        vendidosMes,
+        rankings,
+        totalQtdMes,
+        totalValorMes,
+        totalQtdProduto,
+        registros,
+        // Shared by every product filter of this client/year (indexed on first use)
+        busca: buildProductSearchIndex(produtos),
+        matriz: P > 0 ? cubeToMatriz(produtos, codigos, meses, qtd) : null
+    }
+}
+
+// Row-object view ({ produto, codigo, 'Mês 01': n, ... }) consumed by the tables
+function cubeToMatriz(produtos, codigos, meses, qtd) {
+    const M = meses.length
+    const linhas = produtos.map((produto, p) => {
+        const row = { produto, codigo: codigos[p] }
+        meses.forEach((mes, m) => {
+            row[mes] = qtd[p * M + m]
+        })
+        return row
+    })
+    return { produtos: linhas, meses }
+}
+
+// Percent change from base to atual; NaN when there is no base to compare against
+const variacao = (atual, base) => (base > 0 ? ((atual - base) / base) * 100 : NaN)
+
+/**
+ * Alinha os cubos de vários anos em um único produto × mês e pré-calcula as variações
+ * @param {Map<number, object>} cubesPorAno - ano -> cube (buildSalesCube)
+ * @returns {object} anos (crescente), produtos, codigos, meses e, por ano, qtd/valor/totais;
+ *                   yoy[ano] traz as diferenças em relação ao ano anterior da lista
+ */
+export function buildYearComparison(cubesPorAno) {
+    const anos = [...cubesPorAno.keys()].sort((a, b) => a - b)
+
+    const produtoIndex = new Map()
+    const produtos = []
+    const codigos = []
+    const mesesSet = new Set()
+
+    for (const ano of anos) {
+        const cube = cubesPorAno.get(ano)
+        cube.produtos.forEach((produto, p) => {
+            if (!produtoIndex.has(produto)) {
+                produtoIndex.set(produto, produtos.length)
+                produtos.push(produto)
+                codigos.push(cube.codigos[p])
+            }
+        })
+        cube.meses.forEach(mes => mesesSet.add(mes))
+    }
+
+    const meses = Array.from(mesesSet).sort((a, b) => mesNumero(a) - mesNumero(b))
+    const mesIndex = new Map(meses.map((mes, idx) => [mes, idx]))
+    const P = produtos.length
+    const M = meses.length
+
+    const porAno = {}
+    for (const ano of anos) {
+        const cube = cubesPorAno.get(ano)
+        const cm = cube.meses.length
+        const qtd = new Float64Array(P * M)
+        const valor = new Float64Array(P * M)
+        const totalQtdProduto = new Float64Array(P)
+        const totalValorProduto = new Float64Array(P)
+        const totalQtdMes = new Float64Array(M)
+        const totalValorMes = new Float64Array(M)
+
+        // Map the year's own indices onto the aligned ones
+        const mesMap = cube.meses.map(mes => mesIndex.get(mes))
+        cube.produtos.forEach((produto, p) => {
+            const ap = produtoIndex.get(produto)
+            for (let m = 0; m < cm; m++) {
+                const q = cube.qtd[p * cm + m]
+                const v = cube.valor[p * cm + m]
+                const am = mesMap[m]
+                qtd[ap * M + am] = q
+                valor[ap * M + am] = v
+                totalQtdProduto[ap] += q
+                totalValorProduto[ap] += v
+                totalQtdMes[am] += q
+                totalValorMes[am] += v
+            }
+        })
+
+        porAno[ano] = { qtd, valor, totalQtdProduto, totalValorProduto, totalQtdMes, totalValorMes, registros: cube.registros }
+    }
+
+    // Year-over-year against the previous year in the list
+    const yoy = {}
+    for (let i = 1; i < anos.length; i++) {
+        const atual = porAno[anos[i]]
+        const base = porAno[anos[i - 1]]
+        const qtdProduto = new Float64Array(P)
+        const valorProduto = new Float64Array(P)
+        const pctQtdProduto = new Float64Array(P)
+        const qtdMes = new Float64Array(M)
+        const valorMes = new Float64Array(M)
+        const pctQtdMes = new Float64Array(M)
+
+        for (let p = 0; p < P; p++) {
+            qtdProduto[p] = atual.totalQtdProduto[p] - base.totalQtdProduto[p]
+            valorProduto[p] = atual.totalValorProduto[p] - base.totalValorProduto[p]
+            pctQtdProduto[p] = variacao(atual.totalQtdProduto[p], base.totalQtdProduto[p])
+        }
+        for (let m = 0; m < M; m++) {
+            qtdMes[m] = atual.totalQtdMes[m] - base.totalQtdMes[m]
+            valorMes[m] = atual.totalValorMes[m] - base.totalValorMes[m]
+            pctQtdMes[m] = variacao(atual.totalQtdMes[m], base.totalQtdMes[m])
+        }
+
+        yoy[anos[i]] = { base: anos[i - 1], qtdProduto, valorProduto, pctQtdProduto, qtdMes, valorMes, pctQtdMes }
+    }
+
+    return { anos, produtos, codigos, meses, produtoIndex, porAno, yoy }
+}
+
+export const salesCube = {
+    get(clienteId, ano) {
+        return cubeCache.get(cubeKey(clienteId, ano))
+    },
+
+    set(clienteId, ano, cubePromise) {
+        const key = cubeKey(clienteId, ano)
+        cubeCache.set(key, cubePromise)
+        // Never keep a failed load around
+        cubePromise.catch(() => {
+            if (cubeCache.get(key) === cubePromise) cubeCache.delete(key)
+        })
+        return cubePromise
+    },
+
+    versao(clienteId) {
+        return versoes.get(clienteId) || 0
+    },
+
+    getContagem(clienteId) {
+        return contagemCache.get(clienteId)
+    },
+
+    setContagem(clienteId, contagemPromise) {
+        contagemCache.set(clienteId, contagemPromise)
+        contagemPromise.catch(() => {
+            if (contagemCache.get(clienteId) === contagemPromise) contagemCache.delete(clienteId)
+        })
+        return contagemPromise
+    },
+
+    // Drop one year, or every year of the client when ano is omitted
+    // (the per-year counts of the client are dropped either way)
+    invalidate(clienteId, ano = null) {
+        versoes.set(clienteId, (versoes.get(clienteId) || 0) + 1)
+        contagemCache.delete(clienteId)
+        if (ano !== null && ano !== undefined) {
+            cubeCache.delete(cubeKey(clienteId, ano))
+            return
+        }
+        const prefix = `${clienteId}:`
+        for (const key of cubeCache.keys()) {
+            if (key.startsWith(prefix)) cubeCache.delete(key)
+        }
+    }
+}
@@ -0,0 +1,156 @@
+// Second cache tier for global reference data (clientes, usuarios, vendas_anos), shared by every tab
+//
+// Entries live in localStorage, stamped with their table's version token from cache_versoes,
+// which database triggers bump on every write from any session or device. A browser reads
+// the tokens at most once per versionTtlMs, in one small query that the open tabs share, and
+// serves any entry whose token still matches. So many open sessions cost one version check
+// rather than one list query each. Writes made in this browser drop the entries right away
+// and tell the other tabs over BroadcastChannel. Without the cache_versoes table,
+// fetchVersions returns null and entries simply expire after fallbackTtlMs.
+
+export const SHARED_DEFAULTS = {
+    versionTtlMs: 30 * 1000,
+    maxAgeMs: 60 * 60 * 1000,
+    fallbackTtlMs: 5 * 60 * 1000,
+    prefix: 'pauliceia_cache:'
+}
+
+const chave = (table, filters = {}) =>
+    `${table}|${JSON.stringify(filters, Object.keys(filters).sort())}`
+
+const ler = (storage, key) => {
+    try {
+        return JSON.parse(storage.getItem(key))
+    } catch {
+        return null
+    }
+}
+
+/**
+ * Cria o cache compartilhado
+ * @param {object} options - tables (tabelas globais), fetchVersions (async () => { tabela: versao } | null),
+ *                           onRemoteInvalidate(tabela) (escrita em outra aba), storage, channelName,
+ *                           versionTtlMs, maxAgeMs, fallbackTtlMs, prefix
+ */
+export function createSharedCache({
+    tables,
+    fetchVersions,
+    onRemoteInvalidate = () => {},
+    storage = globalThis.localStorage,
+    channelName = 'pauliceia-cache',
+    ...options
+}) {
+    const { versionTtlMs, maxAgeMs, fallbackTtlMs, prefix } = { ...SHARED_DEFAULTS, ...options }
+    const versoesKey = `${prefix}__versoes`
+    const channel = typeof BroadcastChannel !== 'undefined' ? new BroadcastChannel(channelName) : null
+    let versoes = null // { valores, lidoEm }
+    let pendente = null
+    let hits = 0
+    let misses = 0
+
+    const esquecerVersoes = () => {
+        versoes = null
+        storage?.removeItem(versoesKey)
+    }
+
+    const removerTabela = (table) => {
+        if (!storage) return
+        for (let i = storage.length - 1; i >= 0; i--) {
+            const key = storage.key(i)
+            if (key?.startsWith(`${prefix}${table}|`)) storage.removeItem(key)
+        }
+    }
+
+    // Version tokens: this tab's copy, else another tab's recent read, else one request
+    async function versoesAtuais() {
+        const fresco = (v) => v && Date.now() - v.lidoEm < versionTtlMs
+        if (fresco(versoes)) return versoes.valores
+        const outraAba = storage && ler(storage, versoesKey)
+        if (fresco(outraAba)) {
+            versoes = outraAba
+            return versoes.valores
+        }
+        if (!pendente) {
+            pendente = fetchVersions()
+                .then(valores => {
+                    versoes = { valores, lidoEm: Date.now() }
+                    try {
+                        storage?.setItem(versoesKey, JSON.stringify(versoes))
+                    } catch { /* storage full */ }
+                    return valores
+                })
+                .finally(() => { pendente = null })
+        }
+        return pendente
+    }
+
+    if (channel) {
+        channel.onmessage = ({ data }) => {
+            versoes = null
+            onRemoteInvalidate(data.table)
+        }
+    }
+
+    return {
+        /**
+         * Leitura pelo cache compartilhado (tabelas fora de `tables` vão direto para load)
+         * @param {string} table - Tabela global
+         * @param {object} filters - Filtros planos que distinguem a consulta
+         * @param {Function} load - Consulta assíncrona; o resultado precisa ser serializável em JSON
+         * @param {object} options - persist(valor) => boolean: false serve o resultado sem gravá-lo
+         */
+        async read(table, filters, load, { persist = () => true } = {}) {
+            if (!storage || !tables.includes(table)) return load()
+
+            let versao
+            try {
+                const valores = await versoesAtuais()
+                versao = valores ? (valores[table] ?? 0) : null
+            } catch (error) {
+                console.warn('Could not read cache versions, skipping the shared cache:', error)
+                return load()
+            }
+
+            const key = prefix + chave(table, filters)
+            const entry = ler(storage, key)
+            const validade = versao === null ? fallbackTtlMs : maxAgeMs
+            if (entry && entry.versao === versao && Date.now() - entry.salvoEm < validade) {
+                hits++
+                return entry.value
+            }
+
+            misses++
+            const value = await load()
+            if (!persist(value)) return value
+            try {
+                storage.setItem(key, JSON.stringify({ versao, salvoEm: Date.now(), value }))
+            } catch { /* storage full: serve without caching */ }
+            return value
+        },
+
+        // Token of any scope in cache_versoes (null without the table), for caches derived from that data
+        async versao(escopo) {
+            const valores = await versoesAtuais()
+            return valores ? (valores[escopo] ?? 0) : null
+        },
+
+        // After a write in this tab: drop the entries, re-read the tokens, tell the other tabs
+        invalidate(table) {
+            if (!tables.includes(table)) return
+            removerTabela(table)
+            esquecerVersoes()
+            channel?.postMessage({ table })
+        },
+
+        // Everything, e.g. on logout
+        clear() {
+            tables.forEach(removerTabela)
+            esquecerVersoes()
+        },
+
+        stats() {
+            const total = hits + misses
+            return { hits, misses, hitRate: total > 0 ? hits / total : 0, versoes: versoes?.valores ?? null }
+        }
+    }
+}
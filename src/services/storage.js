@@ -1,4 +1,6 @@
 import { supabase } from './supabase'
+import { supabaseBlobBackend, putContent, isContentPath, contentPath } from './blobStore'
+import { sha256Hex } from '../utils/hash'
 
 const BUCKETS = {
     REPORTS: 'relatorios',
@@ -6,32 +8,127 @@ const BUCKETS = {
     PAINTS: 'tintas'
 }
 
+const blobs = supabaseBlobBackend(supabase)
+
+// Columns that can point at an object of each bucket: URL arrays, or the content hash
+const REFERENCIAS = {
+    relatorios: [['relatorios', 'imagens']],
+    anotacoes: [['anotacoes', 'imagens'], ['anotacoes_imagens', 'imagem_hash']],
+    tintas: [['tintas_personalizadas', 'imagens'], ['formulas_imagens', 'imagem_hash']]
+}
+
+// Rows still using a content-addressed object (identical files share one object)
+async function contarReferencias(bucket, url, hash) {
+    const tabelas = REFERENCIAS[bucket]
+    if (!tabelas) return Infinity
+    const contagens = await Promise.all(tabelas.map(async ([table, column]) => {
+        const query = supabase.from(table).select('id', { count: 'exact', head: true })
+        const { count, error } = await (column === 'imagem_hash' ? query.eq(column, hash) : query.contains(column, [url]))
+        if (error) throw error
+        return count || 0
+    }))
+    return contagens.reduce((s, n) => s + n, 0)
+}
+
+// A form may reuse an object (dedup hit) and save its row only later, so an unreferenced
+// content-addressed object is removed only once GRACE_MS have passed since its last upload.
+// Until then imagens_enviadas holds the removal (remover_em) and a later sweep does it
+const GRACE_MS = 24 * 60 * 60 * 1000
+
+const isMissingTable = (error) => error?.code === 'PGRST205' || error?.code === '42P01'
+
+// Set to false after the first "table not found": shared objects are then kept, never removed
+let enviosDisponivel = true
+let varreduraFeita = false
+
+const semEnvios = () => {
+    console.warn('imagens_enviadas not created, shared images will not be removed')
+    enviosDisponivel = false
+}
+
+// Last upload of each object, written before the object itself
+async function registrarEnvio(bucket, hash) {
+    if (!enviosDisponivel) return
+    const { error } = await supabase
+        .from('imagens_enviadas')
+        .upsert([{ bucket, hash, enviado_em: new Date().toISOString(), remover_em: null }], { onConflict: 'bucket,hash' })
+    if (error) {
+        if (isMissingTable(error)) semEnvios()
+        else console.warn('⚠️ [Storage] Could not record upload:', error)
+    }
+}
+
+// Removes the object and its thumbnail if no row uses it (the caller has already claimed it
+// by deleting its imagens_enviadas row); a row written since then means it was uploaded again
+async function removerSemUso(bucket, filePath) {
+    const hash = filePath.split('/').pop()
+    if (await contarReferencias(bucket, blobs.publicUrl(bucket, filePath), hash) > 0) return
+
+    const { data: reenviado, error } = await supabase
+        .from('imagens_enviadas')
+        .select('hash')
+        .eq('bucket', bucket)
+        .eq('hash', hash)
+        .maybeSingle()
+    if (error) throw error
+    if (reenviado) return
+
+    await blobs.remove(bucket, [filePath, thumbPath(filePath)])
+}
+
+// Thumbnails live next to the original as <pasta>/thumbs/<arquivo>, so the URL is derived, not stored
+const THUMB_MAX = 320
+const THUMB_QUALITY = 0.75
+
+const thumbPath = (filePath) => {
+    const idx = filePath.lastIndexOf('/')
+    return idx >= 0 ? `${filePath.slice(0, idx)}/thumbs/${filePath.slice(idx + 1)}` : `thumbs/${filePath}`
+}
+
+// Dedup hits write the thumbnail too when it is missing (e.g. its first upload could not make one)
+async function temMiniatura(bucket, filePath) {
+    try {
+        return await blobs.exists(bucket, thumbPath(filePath))
+    } catch (error) {
+        console.warn('⚠️ [Storage] Could not check thumbnail:', error)
+        return true
+    }
+}
+
+// Downscaled WebP (JPEG where the browser cannot encode WebP) of an image file
+async function criarThumbnail(file) {
+    const bitmap = await createImageBitmap(file)
+    const escala = Math.min(1, THUMB_MAX / Math.max(bitmap.width, bitmap.height))
+    const canvas = document.createElement('canvas')
+    canvas.width = Math.round(bitmap.width * escala)
+    canvas.height = Math.round(bitmap.height * escala)
+    canvas.getContext('2d').drawImage(bitmap, 0, 0, canvas.width, canvas.height)
+    bitmap.close()
+
+    const toBlob = (type) => new Promise(resolve => canvas.toBlob(resolve, type, THUMB_QUALITY))
+    const webp = await toBlob('image/webp')
+    return webp && webp.type === 'image/webp' ? webp : toBlob('image/jpeg')
+}
+
 export const storageService = {
     /**
-     * Upload de uma imagem
+     * Upload de uma imagem (endereçada pelo conteúdo: arquivos iguais são gravados uma vez só)
      * @param {File} file - Arquivo da imagem
      * @param {string} bucket - Nome do bucket (REPORTS, NOTES, PAINTS)
-     * @param {string} folder - Pasta dentro do bucket (ex: userId)
+     * @param {string} folder - Mantido por compatibilidade; o caminho vem do hash do arquivo
      * @returns {Promise<string>} URL pública da imagem
      */
     async uploadImage(file, bucket, folder = '') {
         try {
             console.log(`📤 [Storage] Uploading to bucket: ${bucket}, folder: ${folder}, file: ${file.name}`)
 
-            const fileExt = file.name.split('.').pop()
-            const fileName = `${Math.random().toString(36).substring(2)}-${Date.now()}.${fileExt}`
-            const filePath = folder ? `${folder}/${fileName}` : fileName
-
-            console.log(`📤 [Storage] File path: ${filePath}`)
+            const hash = await sha256Hex(await file.arrayBuffer())
+            await registrarEnvio(bucket, hash)
 
-            const { data, error } = await supabase.storage
-                .from(bucket)
-                .upload(filePath, file, {
-                    cacheControl: '3600',
-                    upsert: false
-                })
-
-            if (error) {
+            let stored
+            try {
+                stored = await putContent(blobs, bucket, hash, file, { contentType: file.type })
+            } catch (error) {
                 console.error('❌ [Storage] Upload error:', error)
                 if (error.message && error.message.includes('not found')) {
                     throw new Error(`Bucket '${bucket}' não existe. Por favor, configure o Supabase Storage primeiro (veja supabase_storage_setup.md)`)
@@ -42,13 +139,21 @@ export const storageService = {
                 throw new Error(`Erro no upload: ${error.message || 'Erro desconhecido'}`)
             }
 
-            // Obter URL pública
-            const { data: urlData } = supabase.storage
-                .from(bucket)
-                .getPublicUrl(filePath)
+            if (!stored.created && await temMiniatura(bucket, stored.path)) {
+                // Mesmo conteúdo já enviado antes: objeto e miniatura já existem
+                return stored.url
+            }
 
-            console.log('✅ [Storage] Upload success:', urlData.publicUrl)
-            return urlData.publicUrl
+            // Thumbnail para as listagens (falha não impede o upload: a galeria usa a original)
+            try {
+                const thumb = await criarThumbnail(file)
+                await blobs.put(bucket, thumbPath(stored.path), thumb, { contentType: thumb.type })
+            } catch (thumbError) {
+                console.warn('⚠️ [Storage] Could not create thumbnail:', thumbError)
+            }
+
+            console.log('✅ [Storage] Upload success:', stored.url)
+            return stored.url
         } catch (error) {
             console.error('❌ [Storage] Error uploading image:', error)
             throw error
@@ -75,7 +180,8 @@ export const storageService = {
     },
 
     /**
-     * Deletar imagem
+     * Deletar imagem (chamar depois de gravar a linha que deixou de usá-la)
+     * Objetos endereçados pelo conteúdo só são removidos quando nenhuma outra linha os referencia
      * @param {string} url - URL da imagem
      * @param {string} bucket - Nome do bucket
      */
@@ -87,11 +193,36 @@ export const storageService = {
 
             const filePath = urlParts[1]
 
-            const { error } = await supabase.storage
-                .from(bucket)
-                .remove([filePath])
+            if (!isContentPath(filePath)) {
+                await blobs.remove(bucket, [filePath, thumbPath(filePath)])
+                return
+            }
+
+            // Content-addressed objects can be shared by several rows: keep them while any row uses them
+            const hash = filePath.split('/').pop()
+            if (!enviosDisponivel || await contarReferencias(bucket, url, hash) > 0) return
+
+            // Uploaded recently: a form may be about to save it, so queue the removal instead
+            const recente = await supabase
+                .from('imagens_enviadas')
+                .update({ remover_em: new Date(Date.now() + GRACE_MS).toISOString() })
+                .eq('bucket', bucket)
+                .eq('hash', hash)
+                .gt('enviado_em', new Date(Date.now() - GRACE_MS).toISOString())
+                .select('hash')
+            if (recente.error) {
+                if (isMissingTable(recente.error)) return semEnvios()
+                throw recente.error
+            }
+            if (recente.data.length > 0) return
 
+            const { error } = await supabase
+                .from('imagens_enviadas')
+                .delete()
+                .eq('bucket', bucket)
+                .eq('hash', hash)
             if (error) throw error
+            await removerSemUso(bucket, filePath)
         } catch (error) {
             console.error('Error deleting image:', error)
             throw error
@@ -104,6 +235,10 @@ export const storageService = {
      * @param {string} bucket - Nome do bucket
      */
     async deleteImages(urls, bucket) {
+        if (!varreduraFeita) {
+            varreduraFeita = true
+            this.removerPendentes().catch(error => console.warn('⚠️ [Storage] Could not remove queued images:', error))
+        }
         try {
             const deletePromises = urls.map(url =>
                 this.deleteImage(url, bucket)
@@ -115,6 +250,35 @@ export const storageService = {
         }
     },
 
+    /**
+     * Remove os objetos cuja remoção foi adiada por deleteImage e já venceu
+     * (no máximo uma vez por sessão, disparado por deleteImages)
+     */
+    async removerPendentes() {
+        if (!enviosDisponivel) return
+        // Deleting the rows claims them: concurrent sweeps never get the same object
+        const { data, error } = await supabase
+            .from('imagens_enviadas')
+            .delete()
+            .lt('remover_em', new Date().toISOString())
+            .select('bucket, hash')
+        if (error) {
+            if (isMissingTable(error)) return semEnvios()
+            throw error
+        }
+        for (const { bucket, hash } of data) await removerSemUso(bucket, contentPath(hash))
+    },
+
+    /**
+     * URL da miniatura de uma imagem enviada por uploadImage
+     * @param {string} url - URL pública da imagem original
+     * @returns {string} URL da miniatura (imagens antigas podem não ter; use a original como fallback)
+     */
+    thumbnailUrl(url) {
+        const idx = url.lastIndexOf('/')
+        return idx >= 0 ? `${url.slice(0, idx)}/thumbs/${url.slice(idx + 1)}` : url
+    },
+
     // Constantes para os buckets
     BUCKETS
 }
@@ -4,6 +4,292 @@ export function parseCSV(fileContent, filename) {
     const lines = fileContent.split('\n').filter(line => line.trim())
     if (lines.length === 0) return { data: [], mes: null }
 
+    const mesRef = extractMesRef(filename)
+
+    // Parse CSV (semicolon separated, common in Brazilian CSVs)
+    const rows = lines.map(line => {
+        // Handle both comma and semicolon delimiters
+        const delimiter = line.includes(';') ? ';' : ','
+        return line.split(delimiter).map(cell => cell.trim())
+    })
+
+    const headers = rows[0].map(h => h.toLowerCase())
+
+    const { indexCodigo, indexDescricao, indexQtd, indexValor } = detectColumns(headers)
+
+    // Parse data rows
+    const data = []
+    for (let i = 1; i < rows.length; i++) {
+        const row = rows[i]
+
+        // Skip if row doesn't have enough columns
+        if (row.length <= indexQtd) continue
+
+        // Determine code and name
+        let codigo = null
+        let nome = null
+
+        if (indexCodigo !== -1) codigo = row[indexCodigo]?.trim()
+        if (indexDescricao !== -1) nome = row[indexDescricao]?.trim()
+
+        // Fallback strategies
+        if (!codigo && nome) codigo = nome // Use name as code if no code
+        if (!nome && codigo) nome = codigo // Use code as name if no name
+
+        if (!codigo || codigo.toLowerCase() === 'nan') continue
+
+        const quantidade = parseQuantity(row[indexQtd])
+        if (quantidade <= 0) continue
+
+        const valor = indexValor !== -1 ? parseValue(row[indexValor]) : 0
+
+        data.push({
+            produto: codigo, // This is the ID/Link
+            produto_nome: nome, // This is the display name
+            quantidade,
+            valor,
+            mes_ref: mesRef
+        })
+    }
+
+    return { data, mes: mesRef }
+}
+
+// Column-oriented version of parseCSV used by the import flow.
+// Only the detected columns are sliced out of each line, and the quantity and
+// value columns are converted in one pass each into typed arrays before the
+// records are built. Output matches parseCSV, except that unparseable
+// quantities are dropped instead of being kept as NaN.
+export function parseCSVColumnar(fileContent, filename) {
+    const lines = fileContent.split('\n')
+    let first = 0
+    while (first < lines.length && !lines[first].trim()) first++
+    if (first === lines.length) return { data: [], mes: null }
+
+    const parser = createColumnarParser(lines[first], filename)
+    return { data: parser.parseLines(lines, first + 1), mes: parser.mes }
+}
+
+// Detects the columns from the header line once; parseLines can then be fed
+// the whole file or successive batches of lines (streaming import)
+function createColumnarParser(headerLine, filename) {
+    const mesRef = extractMesRef(filename)
+
+    const headers = headerLine
+        .split(headerLine.includes(';') ? ';' : ',')
+        .map(h => h.trim().toLowerCase())
+
+    const { indexCodigo, indexDescricao, indexQtd, indexValor } = detectColumns(headers)
+    const wanted = [indexCodigo, indexDescricao, indexQtd, indexValor]
+
+    const parseLines = (lines, from = 0) => {
+        // 1. Column extraction
+        const [codigos, nomes, qtdRaw, valorRaw] = extractColumns(lines, from, wanted, indexQtd)
+
+        // 2. Column conversion
+        const n = qtdRaw.length
+        const quantidades = new Float64Array(n)
+        const valores = new Float64Array(n)
+        for (let i = 0; i < n; i++) quantidades[i] = scanQuantity(qtdRaw[i])
+        if (indexValor !== -1) {
+            for (let i = 0; i < n; i++) valores[i] = scanValue(valorRaw[i])
+        }
+
+        // 3. Filter + record building
+        const data = []
+        for (let i = 0; i < n; i++) {
+            if (!(quantidades[i] > 0)) continue
+
+            const nome = nomes[i]?.trim()
+            const codigo = codigos[i]?.trim() || nome
+            if (!codigo || codigo.toLowerCase() === 'nan') continue
+
+            data.push({
+                produto: codigo,
+                produto_nome: nome || codigo,
+                quantidade: quantidades[i],
+                valor: valores[i],
+                mes_ref: mesRef
+            })
+        }
+        return data
+    }
+
+    return { mes: mesRef, parseLines }
+}
+
+/**
+ * Leitura em streaming para exportações grandes do ERP
+ * Lê o arquivo em blocos de bytes, decodifica em latin1 e entrega os registros
+ * já filtrados em lotes de até `batchRows` linhas, sem nunca carregar o arquivo inteiro
+ * @param {File|Blob} file - Arquivo CSV
+ * @param {string} filename - Nome usado para detectar o mês
+ * @param {object} options - batchRows (linhas por lote)
+ * @yields {{ data: object[], mes: string }}
+ */
+export async function* streamCSVColumnar(file, filename, { batchRows = 20000 } = {}) {
+    const reader = file.stream().getReader()
+    const decoder = new TextDecoder('iso-8859-1')
+
+    let parser = null
+    let pending = ''
+    let batch = []
+
+    const flush = () => {
+        const lines = batch.slice(0, batchRows)
+        batch = batch.slice(batchRows)
+        return { data: parser.parseLines(lines), mes: parser.mes }
+    }
+
+    const takeLines = (text) => {
+        const lines = text.split('\n')
+        for (const line of lines) {
+            if (!parser) {
+                if (line.trim()) parser = createColumnarParser(line, filename)
+                continue
+            }
+            batch.push(line)
+        }
+    }
+
+    while (true) {
+        const { value, done } = await reader.read()
+        if (done) break
+
+        pending += decoder.decode(value, { stream: true })
+        const lastBreak = pending.lastIndexOf('\n')
+        if (lastBreak === -1) continue
+
+        takeLines(pending.slice(0, lastBreak))
+        pending = pending.slice(lastBreak + 1)
+
+        while (parser && batch.length >= batchRows) yield flush()
+    }
+
+    pending += decoder.decode()
+    if (pending) takeLines(pending)
+    while (parser && batch.length > 0) yield flush()
+}
+
+// Slices the requested column indexes (-1 = not present) out of every non-empty
+// line without splitting the whole line. Lines that end before minIndex are skipped.
+function extractColumns(lines, from, wanted, minIndex) {
+    const columns = wanted.map(() => [])
+    const order = wanted
+        .map((col, pos) => ({ col, pos }))
+        .filter(w => w.col !== -1)
+        .sort((a, b) => a.col - b.col)
+
+    for (let i = from; i < lines.length; i++) {
+        const line = lines[i]
+        if (!line.trim()) continue
+
+        // Handle both comma and semicolon delimiters
+        const delimiter = line.includes(';') ? ';' : ','
+
+        // Count columns up to minIndex first so short lines are skipped as a whole
+        let pos = -1
+        let col = 0
+        while (col < minIndex && (pos = line.indexOf(delimiter, pos + 1)) !== -1) col++
+        if (col < minIndex) continue
+
+        let start = 0
+        col = 0
+        for (const w of order) {
+            while (col < w.col && start !== -1) {
+                const next = line.indexOf(delimiter, start)
+                start = next === -1 ? -1 : next + 1
+                col++
+            }
+            if (start === -1) {
+                columns[w.pos].push(undefined)
+                continue
+            }
+            const end = line.indexOf(delimiter, start)
+            columns[w.pos].push(line.slice(start, end === -1 ? line.length : end))
+        }
+    }
+
+    return columns
+}
+
+// Same result as parseQuantity: the integer digits before the first '.' or ','
+// (every other character is ignored); 0 when there are none
+function scanQuantity(str) {
+    if (!str) return 0
+    let num = 0
+    let digits = 0
+    for (let j = 0; j < str.length; j++) {
+        const ch = str.charCodeAt(j)
+        if (ch >= 48 && ch <= 57) {
+            num = num * 10 + (ch - 48)
+            digits++
+        } else if (ch === 44 || ch === 46) {
+            break
+        }
+    }
+    return digits > 0 ? num : 0
+}
+
+// 'R', '$', space, tab, CR, NBSP: the characters parseValue strips most often
+const isCurrencyOrSpace = (ch) => ch === 82 || ch === 36 || ch === 32 || ch === 9 || ch === 13 || ch === 160
+
+// Same result as parseValue for the usual "R$ -1.234,56" shapes; anything else
+// (exponents, stray letters, unusual whitespace) goes through parseValue itself
+function scanValue(str) {
+    if (!str) return 0
+
+    let hasComma = false
+    for (let j = 0; j < str.length; j++) {
+        const ch = str.charCodeAt(j)
+        if (ch === 44) hasComma = true
+        else if (!((ch >= 48 && ch <= 57) || ch === 46 || ch === 45 || isCurrencyOrSpace(ch))) {
+            return parseValue(str)
+        }
+    }
+
+    // With a comma, dots are thousands separators; otherwise the first dot is the decimal point
+    const decimalSep = hasComma ? 44 : 46
+    let intPart = 0
+    let fracPart = 0
+    let fracDigits = 0
+    let inFraction = false
+    let negative = false
+    let digits = 0
+    let started = false
+
+    for (let j = 0; j < str.length; j++) {
+        const ch = str.charCodeAt(j)
+        if (isCurrencyOrSpace(ch)) continue
+        if (ch === 46 && hasComma) continue
+
+        if (ch === 45) {
+            if (started) break
+            negative = true
+            started = true
+        } else if (ch >= 48 && ch <= 57) {
+            started = true
+            digits++
+            if (inFraction) {
+                fracPart = fracPart * 10 + (ch - 48)
+                fracDigits++
+            } else {
+                intPart = intPart * 10 + (ch - 48)
+            }
+        } else if (ch === decimalSep && !inFraction) {
+            started = true
+            inFraction = true
+        } else {
+            break
+        }
+    }
+
+    if (digits === 0) return 0
+    const value = fracDigits > 0 ? parseFloat(`${intPart}.${String(fracPart).padStart(fracDigits, '0')}`) : intPart
+    return negative ? -value : value
+}
+
+export function extractMesRef(filename) {
     // Extract month from filename
     // Strategy: Look for specific patterns first, then fallback to simple numbers
     // 1. Look for "_01.", " 01.", "-01." etc (number at end or before extension)
@@ -68,17 +354,10 @@ export function parseCSV(fileContent, filename) {
         }
     }
     
-    const mesRef = mesNum > 0 ? `Mês ${mesNum.toString().padStart(2, '0')}` : 'Geral'
-
-    // Parse CSV (semicolon separated, common in Brazilian CSVs)
-    const rows = lines.map(line => {
-        // Handle both comma and semicolon delimiters
-        const delimiter = line.includes(';') ? ';' : ','
-        return line.split(delimiter).map(cell => cell.trim())
-    })
-
-    const headers = rows[0].map(h => h.toLowerCase())
+    return mesNum > 0 ? `Mês ${mesNum.toString().padStart(2, '0')}` : 'Geral'
+}
 
+function detectColumns(headers) {
     // Find column indices
     // Prioritize specific 'code' columns, then generic 'produto'
     const indexCodigo = findColumnIndex(headers, ['código', 'codigo', 'cod', 'referencia', 'ref', 'item', 'produto'])
@@ -96,42 +375,7 @@ export function parseCSV(fileContent, filename) {
         throw new Error('Não foi possível identificar as colunas de produto/código e quantidade')
     }
 
-    // Parse data rows
-    const data = []
-    for (let i = 1; i < rows.length; i++) {
-        const row = rows[i]
-
-        // Skip if row doesn't have enough columns
-        if (row.length <= indexQtd) continue
-
-        // Determine code and name
-        let codigo = null
-        let nome = null
-
-        if (indexCodigo !== -1) codigo = row[indexCodigo]?.trim()
-        if (indexDescricao !== -1) nome = row[indexDescricao]?.trim()
-
-        // Fallback strategies
-        if (!codigo && nome) codigo = nome // Use name as code if no code
-        if (!nome && codigo) nome = codigo // Use code as name if no name
-
-        if (!codigo || codigo.toLowerCase() === 'nan') continue
-
-        const quantidade = parseQuantity(row[indexQtd])
-        if (quantidade <= 0) continue
-
-        const valor = indexValor !== -1 ? parseValue(row[indexValor]) : 0
-
-        data.push({
-            produto: codigo, // This is the ID/Link
-            produto_nome: nome, // This is the display name
-            quantidade,
-            valor,
-            mes_ref: mesRef
-        })
-    }
-
-    return { data, mes: mesRef }
+    return { indexCodigo, indexDescricao, indexQtd, indexValor }
 }
 
 function findColumnIndex(headers, keywords) {
@@ -177,6 +421,11 @@ function parseValue(str) {
     }
 }
 
+// Reads only the first bytes of a file (header + a few rows), enough to validate it
+export async function readFileHead(file, bytes = 64 * 1024) {
+    return readFileAsText(file.slice(0, bytes))
+}
+
 export async function readFileAsText(file) {
     return new Promise((resolve, reject) => {
         const reader = new FileReader()
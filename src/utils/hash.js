@@ -0,0 +1,16 @@
+// Content hashing helpers
+
+const toHex = (buffer) => Array.from(new Uint8Array(buffer))
+    .map(b => b.toString(16).padStart(2, '0'))
+    .join('')
+
+/**
+ * SHA-256 em hexadecimal
+ * @param {string|ArrayBuffer|Uint8Array} content - Texto ou bytes
+ * @returns {Promise<string>}
+ */
+export async function sha256Hex(content) {
+    const bytes = typeof content === 'string' ? new TextEncoder().encode(content) : content
+    const digest = await crypto.subtle.digest('SHA-256', bytes)
+    return toHex(digest)
+}
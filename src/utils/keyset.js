@@ -0,0 +1,33 @@
+// Keyset (cursor) pagination for lists ordered by a timestamp, newest first
+//
+// Pages are ordered by (column DESC, id DESC) and the next page starts strictly after
+// the last row seen, so deep pages cost the same as the first one and rows inserted
+// meanwhile do not shift the page boundaries the way offsets do.
+
+/**
+ * Aplica ordenação, cursor e limite a uma consulta do Supabase
+ * @param {object} query - supabase.from(...).select(...)
+ * @param {object} options - column (ex.: 'atualizado_em'), cursor (de keysetPage), limit
+ * @returns {object} consulta pedindo limit + 1 linhas (a extra indica se há próxima página)
+ */
+export function applyKeyset(query, { column, cursor = null, limit }) {
+    let q = query
+        .order(column, { ascending: false })
+        .order('id', { ascending: false })
+    if (cursor) {
+        q = q.or(`${column}.lt."${cursor.valor}",and(${column}.eq."${cursor.valor}",id.lt.${cursor.id})`)
+    }
+    return q.limit(limit + 1)
+}
+
+/**
+ * Separa a página e o cursor da próxima
+ * @param {object[]} rows - Resultado de applyKeyset
+ * @returns {{ rows: object[], cursor: object | null }} cursor null na última página
+ */
+export function keysetPage(rows, { column, limit }) {
+    if (rows.length <= limit) return { rows, cursor: null }
+    const page = rows.slice(0, limit)
+    const ultima = page[page.length - 1]
+    return { rows: page, cursor: { valor: ultima[column], id: ultima.id } }
+}
@@ -0,0 +1,56 @@
+// In-memory cache with TTL and least-recently-used eviction, plus hit/miss counters
+
+/**
+ * Cria um cache LRU com expiração
+ * @param {object} options - maxEntries, ttlMs, now (relógio, para testes)
+ */
+export function createLruCache({ maxEntries = 100, ttlMs = 5 * 60 * 1000, now = () => Date.now() } = {}) {
+    // Map keeps insertion order: the first key is the least recently used
+    const entries = new Map()
+    let hits = 0
+    let misses = 0
+
+    return {
+        get(key) {
+            const entry = entries.get(key)
+            if (!entry || entry.expires <= now()) {
+                if (entry) entries.delete(key)
+                misses++
+                return undefined
+            }
+            entries.delete(key)
+            entries.set(key, entry)
+            hits++
+            return entry.value
+        },
+
+        set(key, value, ttl = ttlMs) {
+            entries.delete(key)
+            entries.set(key, { value, expires: now() + ttl })
+            while (entries.size > maxEntries) {
+                entries.delete(entries.keys().next().value)
+            }
+            return value
+        },
+
+        delete(key) {
+            entries.delete(key)
+        },
+
+        // Drop every entry whose key matches (e.g. all keys of one client)
+        deleteWhere(predicate) {
+            for (const key of [...entries.keys()]) {
+                if (predicate(key)) entries.delete(key)
+            }
+        },
+
+        clear() {
+            entries.clear()
+        },
+
+        stats() {
+            const total = hits + misses
+            return { size: entries.size, hits, misses, hitRate: total > 0 ? hits / total : 0 }
+        }
+    }
+}
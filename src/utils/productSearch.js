@@ -0,0 +1,78 @@
+// Substring search over product names, built once per sales cube
+//
+// Names are lowercased and accent-folded ("MÁQUINA" matches "maquina") and
+// indexed by trigram. A query is split into words; every word must appear in
+// the name. Words of 3+ letters narrow the candidates through the trigram
+// posting lists, the remaining candidates are confirmed with includes().
+
+const NGRAM = 3
+
+// Lowercase without accents
+export function foldText(text) {
+    return String(text).normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase()
+}
+
+/**
+ * Monta o índice de busca dos produtos
+ * @param {string[]} nomes - Nomes dos produtos (posição = índice do produto no cubo)
+ * @returns {{ search: (query: string) => number[] | null }} search devolve os índices em ordem crescente,
+ *          ou null quando a busca está vazia (todos os produtos)
+ */
+export function buildProductSearchIndex(nomes) {
+    let folded = null
+    let postings = null // trigram -> ascending product indices
+
+    // Built on the first search, so cubes that are never searched pay nothing
+    const indexar = () => {
+        folded = nomes.map(foldText)
+        postings = new Map()
+        folded.forEach((nome, i) => {
+            const vistos = new Set()
+            for (let j = 0; j + NGRAM <= nome.length; j++) {
+                const gram = nome.slice(j, j + NGRAM)
+                if (vistos.has(gram)) continue
+                vistos.add(gram)
+                const lista = postings.get(gram)
+                if (lista) lista.push(i)
+                else postings.set(gram, [i])
+            }
+        })
+    }
+
+    // Smallest posting list among the word's trigrams ([] when one is missing = no match)
+    const candidatosDe = (palavra) => {
+        let menor = null
+        for (let j = 0; j + NGRAM <= palavra.length; j++) {
+            const lista = postings.get(palavra.slice(j, j + NGRAM))
+            if (!lista) return []
+            if (!menor || lista.length < menor.length) menor = lista
+        }
+        return menor
+    }
+
+    return {
+        search(query) {
+            const palavras = foldText(query || '').split(/\s+/).filter(Boolean)
+            if (palavras.length === 0) return null
+            if (!postings) indexar()
+
+            let candidatos = null
+            for (const palavra of palavras) {
+                if (palavra.length < NGRAM) continue
+                const lista = candidatosDe(palavra)
+                if (!candidatos || lista.length < candidatos.length) candidatos = lista
+                if (candidatos.length === 0) return []
+            }
+
+            const matches = (i) => palavras.every(palavra => folded[i].includes(palavra))
+            if (candidatos) return candidatos.filter(matches)
+
+            // Only 1-2 letter words: scan the folded names
+            const resultado = []
+            for (let i = 0; i < folded.length; i++) {
+                if (matches(i)) resultado.push(i)
+            }
+            return resultado
+        }
+    }
+}
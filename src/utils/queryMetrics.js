@@ -0,0 +1,48 @@
+// Request counters for the Supabase client, per screen load
+//
+// countingFetch is installed as the client's fetch, so every PostgREST/Storage call is
+// counted without the services having to report it. medirConsultas wraps a load and
+// records how many requests it issued; going over the screen's budget logs a warning,
+// which is how a per-item query (N+1) creeping back into a list shows up. Loads that
+// overlap are attributed each other's requests, so the numbers are an upper bound.
+
+let total = 0
+const telas = new Map() // tela -> { loads, queries, max, last }
+
+export const countingFetch = (...args) => {
+    total++
+    return fetch(...args)
+}
+
+/**
+ * Executa um carregamento contando as requisições feitas
+ * @param {string} tela - Nome da tela/lista (ex.: 'anotacoes')
+ * @param {Function} fn - Carregamento assíncrono
+ * @param {number} limite - Requisições esperadas por carregamento
+ */
+export async function medirConsultas(tela, fn, limite = 1) {
+    const inicio = total
+    try {
+        return await fn()
+    } finally {
+        const queries = total - inicio
+        const s = telas.get(tela) || { loads: 0, queries: 0, max: 0, last: 0 }
+        s.loads++
+        s.queries += queries
+        s.max = Math.max(s.max, queries)
+        s.last = queries
+        telas.set(tela, s)
+        if (queries > limite) {
+            console.warn(`⚠️ [Queries] ${tela}: ${queries} requisições em um carregamento (esperado ≤ ${limite})`)
+        }
+    }
+}
+
+// { tela: { loads, queries, max, last, perLoad } } — also exposed as window.__queryMetrics in the browser
+export function queryMetrics() {
+    const out = {}
+    for (const [tela, s] of telas) out[tela] = { ...s, perLoad: s.queries / s.loads }
+    return out
+}
+
+if (typeof window !== 'undefined') window.__queryMetrics = queryMetrics
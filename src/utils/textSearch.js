@@ -0,0 +1,122 @@
+// Ranked full-text search over small document sets (notes, paints), plus highlighting
+//
+// Used when the database search functions are not installed: the documents are
+// indexed once in an inverted index (accent-folded word -> postings with per-field
+// weights) and scored with BM25. Every query word must match the start of a word in
+// the document ("azul oce" finds "Azul Oceano"), the same rule as the Postgres
+// prefix tsquery in supabase_schema.sql.
+
+import { foldText } from './productSearch'
+
+const K1 = 1.2
+const B = 0.75
+
+// "Fórmula Azul-Oceano 2" -> ['formula', 'azul', 'oceano', '2']
+export const tokenize = (text) => foldText(text || '').match(/[\p{L}\p{N}]+/gu) || []
+
+/**
+ * Monta o índice invertido
+ * @param {object[]} docs - Documentos (linhas do banco)
+ * @param {object} fields - Campo -> peso, ex.: { titulo: 3, conteudo: 1 }
+ * @returns {{ search: (query: string, limit?: number) => { doc: object, score: number }[] }}
+ */
+export function buildTextIndex(docs, fields) {
+    const postings = new Map() // word -> Map(docIdx -> weighted term frequency)
+    const tamanhos = new Float64Array(docs.length)
+
+    docs.forEach((doc, i) => {
+        for (const [campo, peso] of Object.entries(fields)) {
+            for (const palavra of tokenize(doc[campo])) {
+                let lista = postings.get(palavra)
+                if (!lista) postings.set(palavra, lista = new Map())
+                lista.set(i, (lista.get(i) || 0) + peso)
+                tamanhos[i] += peso
+            }
+        }
+    })
+
+    const mediaTamanho = tamanhos.reduce((s, v) => s + v, 0) / (docs.length || 1) || 1
+    const vocabulario = [...postings.keys()].sort()
+
+    // Words of the vocabulary starting with the prefix (binary search on the sorted list)
+    const comPrefixo = (prefixo) => {
+        let lo = 0
+        let hi = vocabulario.length
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1
+            if (vocabulario[mid] < prefixo) lo = mid + 1
+            else hi = mid
+        }
+        const palavras = []
+        for (let i = lo; i < vocabulario.length && vocabulario[i].startsWith(prefixo); i++) {
+            palavras.push(vocabulario[i])
+        }
+        return palavras
+    }
+
+    return {
+        search(query, limit = 50) {
+            const termos = tokenize(query)
+            if (termos.length === 0) return []
+
+            let scores = null // docIdx -> score, only docs matching every term so far
+            for (const termo of termos) {
+                const doTermo = new Map()
+                for (const palavra of comPrefixo(termo)) {
+                    const lista = postings.get(palavra)
+                    const idf = Math.log(1 + (docs.length - lista.size + 0.5) / (lista.size + 0.5))
+                    for (const [i, tf] of lista) {
+                        if (scores && !scores.has(i)) continue
+                        const norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * tamanhos[i] / mediaTamanho))
+                        doTermo.set(i, (doTermo.get(i) || 0) + idf * norm)
+                    }
+                }
+                if (scores) for (const [i, s] of doTermo) doTermo.set(i, s + scores.get(i))
+                scores = doTermo
+                if (scores.size === 0) return []
+            }
+
+            return [...scores]
+                .sort((a, b) => b[1] - a[1])
+                .slice(0, limit)
+                .map(([i, score]) => ({ doc: docs[i], score }))
+        }
+    }
+}
+
+/**
+ * Divide um texto em trechos, marcando as palavras que começam por um termo da busca
+ * @param {string} text - Texto original
+ * @param {string} query - Busca digitada
+ * @returns {{ text: string, match: boolean }[]}
+ */
+export function highlight(text, query) {
+    const original = String(text ?? '')
+    // Longest term first, so "azul a" marks all of "azul"
+    const termos = tokenize(query).sort((a, b) => b.length - a.length)
+    if (termos.length === 0 || !original) return [{ text: original, match: false }]
+
+    // Fold char by char so positions in the folded text map back to the original
+    let folded = ''
+    const origem = []
+    for (let i = 0; i < original.length; i++) {
+        const f = foldText(original[i])
+        for (let k = 0; k < f.length; k++) origem.push(i)
+        folded += f
+    }
+    origem.push(original.length)
+
+    const partes = []
+    let ultimo = 0
+    for (const m of folded.matchAll(/[\p{L}\p{N}]+/gu)) {
+        const termo = termos.find(t => m[0].startsWith(t))
+        if (!termo) continue
+        const inicio = origem[m.index]
+        const fim = origem[m.index + termo.length]
+        if (inicio > ultimo) partes.push({ text: original.slice(ultimo, inicio), match: false })
+        partes.push({ text: original.slice(inicio, fim), match: true })
+        ultimo = fim
+    }
+    if (ultimo < original.length) partes.push({ text: original.slice(ultimo), match: false })
+    return partes
+}
@@ -0,0 +1,109 @@
+// Sales assistant proxy: holds the model API key and streams the answer back to the browser
+//
+// The app (edgeFunctionBackend in src/services/chat.js) sends { pergunta, contexto, historico }
+// with its session token (from criar_sessao at login) in the x-sessao header; the system prompt
+// and the key never leave this function. Only the app's own origins get CORS headers, and each
+// user may ask LIMITE_POR_HORA questions per hour (registrar_uso_assistente, see
+// supabase_schema.sql). The model's Server-Sent Events are passed through unchanged, so the
+// browser parses the same stream as before.
+// Deploy:  supabase functions deploy assistente-vendas
+//          supabase secrets set CHAT_API_KEY=... ALLOWED_ORIGINS=https://app.example.com[,...]
+//                              [CHAT_API_URL=... CHAT_MODEL=... CHAT_LIMITE_POR_HORA=...]
+
+import { createClient } from 'jsr:@supabase/supabase-js@2'
+
+const API_URL = Deno.env.get('CHAT_API_URL') ?? 'https://api.openai.com/v1'
+const MODEL = Deno.env.get('CHAT_MODEL') ?? 'gpt-4o-mini'
+const HISTORICO_MAX = 6
+const CONTEXTO_MAX = 24000 // characters, well above what buildSalesContext produces
+const LIMITE_POR_HORA = Number(Deno.env.get('CHAT_LIMITE_POR_HORA') ?? 30)
+
+const PROMPT = 'Você é um assistente de vendas. Responda em português, de forma curta, usando apenas os dados abaixo.\n\n'
+
+const ORIGENS = (Deno.env.get('ALLOWED_ORIGINS') ?? '').split(',').map(o => o.trim()).filter(Boolean)
+
+// SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are set by the Edge Functions runtime
+const admin = createClient(Deno.env.get('SUPABASE_URL')!, Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!, {
+    auth: { persistSession: false }
+})
+
+const corsDe = (origem: string) => ({
+    'Access-Control-Allow-Origin': origem,
+    'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type, x-sessao',
+    Vary: 'Origin'
+})
+
+const erro = (cors: Record<string, string>, status: number, message: string, extra: Record<string, string> = {}) =>
+    new Response(JSON.stringify({ error: message }), {
+        status,
+        headers: { ...cors, ...extra, 'Content-Type': 'application/json' }
+    })
+
+type Mensagem = { role: string, content: string }
+
+Deno.serve(async (req) => {
+    // Other sites get no CORS headers, so browsers never hand them the response
+    const origem = req.headers.get('Origin') ?? ''
+    if (!ORIGENS.includes(origem)) return erro({ Vary: 'Origin' }, 403, 'Origem não permitida')
+    const cors = corsDe(origem)
+
+    if (req.method === 'OPTIONS') return new Response('ok', { headers: cors })
+    if (req.method !== 'POST') return erro(cors, 405, 'Use POST')
+
+    const apiKey = Deno.env.get('CHAT_API_KEY')
+    if (!apiKey) return erro(cors, 500, 'CHAT_API_KEY não configurada')
+
+    // The anon key alone is public: every question needs a live app session, and counts against its user
+    const sessao = req.headers.get('x-sessao') ?? ''
+    if (!/^[0-9a-f-]{36}$/i.test(sessao)) return erro(cors, 401, 'Sessão inválida')
+    const { data: uso, error: usoError } = await admin.rpc('registrar_uso_assistente', {
+        p_token: sessao,
+        p_limite: LIMITE_POR_HORA,
+        p_janela: '1 hour'
+    })
+    if (usoError) {
+        console.error('Session check error:', usoError)
+        return erro(cors, 500, 'Não foi possível validar a sessão')
+    }
+    if (uso === 'sessao') return erro(cors, 401, 'Sessão inválida ou expirada')
+    if (uso === 'limite') return erro(cors, 429, 'Limite de perguntas por hora atingido', { 'Retry-After': '600' })
+
+    let body
+    try {
+        body = await req.json()
+    } catch {
+        return erro(cors, 400, 'JSON inválido')
+    }
+    const { pergunta, contexto = '', historico = [] } = body ?? {}
+    if (typeof pergunta !== 'string' || !pergunta.trim()) return erro(cors, 400, 'Pergunta vazia')
+
+    // Only plain user/assistant turns from the client; the system role is ours
+    const anteriores = (Array.isArray(historico) ? historico : [])
+        .filter((m: Mensagem) => (m?.role === 'user' || m?.role === 'assistant') && typeof m.content === 'string')
+        .slice(-HISTORICO_MAX)
+        .map(({ role, content }: Mensagem) => ({ role, content }))
+
+    const messages = [
+        { role: 'system', content: PROMPT + String(contexto).slice(0, CONTEXTO_MAX) },
+        ...anteriores,
+        { role: 'user', content: pergunta }
+    ]
+
+    const res = await fetch(`${API_URL}/chat/completions`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            Authorization: `Bearer ${apiKey}`
+        },
+        body: JSON.stringify({ model: MODEL, messages, stream: true }),
+        signal: req.signal
+    })
+    if (!res.ok) {
+        console.error('Model API error:', res.status, await res.text())
+        return erro(cors, 502, `Modelo respondeu ${res.status}`)
+    }
+
+    return new Response(res.body, {
+        headers: { ...cors, 'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache' }
+    })
+})
@@ -21,6 +21,12 @@ CREATE TABLE IF NOT EXISTS vendas (
     ano_referencia INTEGER DEFAULT 2025
 );
 
+-- Chave de cada linha gravada pela importação (cliente|ano|mês|lote|produto, um lote novo
+-- a cada tentativa): com ela o app grava por upsert e pode repetir um pedaço cuja resposta
+-- se perdeu sem duplicar vendas. Linhas antigas ficam com NULL (não conflitam entre si)
+ALTER TABLE vendas ADD COLUMN IF NOT EXISTS chave_importacao TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vendas_chave_importacao ON vendas(chave_importacao);
+
 -- Tabela de Anos de Vendas
 CREATE TABLE IF NOT EXISTS vendas_anos (
     id SERIAL PRIMARY KEY,
@@ -31,6 +37,48 @@ CREATE TABLE IF NOT EXISTS vendas_anos (
     UNIQUE(cliente_id, ano)
 );
 
+-- Resumo Mensal de Vendas (rollup produto × mês mantido pela importação)
+CREATE TABLE IF NOT EXISTS vendas_mensal (
+    id SERIAL PRIMARY KEY,
+    cliente_id INTEGER NOT NULL REFERENCES clientes(id) ON DELETE CASCADE,
+    ano INTEGER NOT NULL,
+    mes_ref TEXT NOT NULL,
+    produto TEXT NOT NULL,
+    produto_nome TEXT,
+    quantidade BIGINT NOT NULL DEFAULT 0,
+    valor NUMERIC(14,2) NOT NULL DEFAULT 0,
+    registros INTEGER NOT NULL DEFAULT 0,
+    UNIQUE(cliente_id, ano, mes_ref, produto)
+);
+
+-- Anos com rollup completo (todos os meses de vendas_mensal recalculados de vendas)
+-- Sem esta linha o painel ignora vendas_mensal do ano, mesmo com meses já gravados
+CREATE TABLE IF NOT EXISTS vendas_mensal_anos (
+    cliente_id INTEGER NOT NULL REFERENCES clientes(id) ON DELETE CASCADE,
+    ano INTEGER NOT NULL,
+    completo_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (cliente_id, ano)
+);
+
+-- Histórico de Importações (hash do conteúdo de cada mês importado)
+CREATE TABLE IF NOT EXISTS vendas_importacoes (
+    id SERIAL PRIMARY KEY,
+    cliente_id INTEGER NOT NULL REFERENCES clientes(id) ON DELETE CASCADE,
+    ano INTEGER NOT NULL,
+    mes_ref TEXT NOT NULL,
+    arquivo TEXT,
+    hash_arquivo TEXT NOT NULL,
+    importado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(cliente_id, ano, mes_ref)
+);
+
+-- Tabela de Produtos (cadastrada automaticamente na importação)
+CREATE TABLE IF NOT EXISTS produtos (
+    codigo TEXT PRIMARY KEY,
+    nome TEXT,
+    descricao TEXT
+);
+
 -- Tabela de Produtos Essenciais
 CREATE TABLE IF NOT EXISTS essenciais (
     id SERIAL PRIMARY KEY,
@@ -78,7 +126,8 @@ CREATE TABLE IF NOT EXISTS anotacoes (
 CREATE TABLE IF NOT EXISTS anotacoes_imagens (
     id SERIAL PRIMARY KEY,
     anotacao_id INTEGER NOT NULL REFERENCES anotacoes(id) ON DELETE CASCADE,
-    imagem BYTEA NOT NULL,
+    imagem BYTEA,                -- legado: migrate_images.js move o conteúdo para o Storage
+    imagem_hash TEXT,            -- SHA-256 do conteúdo, objeto em <bucket>/cas/<2 primeiros>/<hash>
     criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -97,7 +146,8 @@ CREATE TABLE IF NOT EXISTS formulas (
 CREATE TABLE IF NOT EXISTS formulas_imagens (
     id SERIAL PRIMARY KEY,
     formula_id INTEGER NOT NULL REFERENCES formulas(id) ON DELETE CASCADE,
-    imagem BYTEA NOT NULL,
+    imagem BYTEA,                -- legado: migrate_images.js move o conteúdo para o Storage
+    imagem_hash TEXT,            -- SHA-256 do conteúdo, objeto em <bucket>/cas/<2 primeiros>/<hash>
     criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -114,6 +164,348 @@ ON CONFLICT (cliente_id, ano) DO NOTHING;
 -- Índices para performance
 CREATE INDEX IF NOT EXISTS idx_vendas_cliente ON vendas(cliente_id);
 CREATE INDEX IF NOT EXISTS idx_vendas_ano ON vendas(ano_referencia);
+CREATE INDEX IF NOT EXISTS idx_vendas_cliente_ano_mes ON vendas(cliente_id, ano_referencia, mes_ref);
 CREATE INDEX IF NOT EXISTS idx_relatorios_usuario ON relatorios(usuario_id);
 CREATE INDEX IF NOT EXISTS idx_relatorios_data ON relatorios(data_relatorio);
 CREATE INDEX IF NOT EXISTS idx_anotacoes_usuario ON anotacoes(usuario_id);
+-- Listas paginadas por (atualizado_em DESC, id DESC): anotações e tintas
+CREATE INDEX IF NOT EXISTS idx_anotacoes_usuario_atualizado ON anotacoes(usuario_id, atualizado_em DESC, id DESC);
+
+-- =============================================
+-- AGREGAÇÃO NO BANCO (RPC)
+-- =============================================
+
+-- Matriz produto × mês de um cliente/ano, já somada no banco.
+-- Chamada pelo app via supabase.rpc('vendas_matriz', { p_cliente_id, p_ano })
+CREATE OR REPLACE FUNCTION vendas_matriz(p_cliente_id INTEGER, p_ano INTEGER)
+RETURNS TABLE (
+    produto TEXT,
+    produto_nome TEXT,
+    mes_ref TEXT,
+    quantidade BIGINT,
+    valor NUMERIC,
+    registros BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        v.produto,
+        COALESCE(MAX(p.nome), v.produto) AS produto_nome,
+        v.mes_ref,
+        SUM(v.quantidade)::BIGINT AS quantidade,
+        COALESCE(SUM(v.valor), 0) AS valor,
+        COUNT(*) AS registros
+    FROM vendas v
+    LEFT JOIN produtos p ON p.codigo = v.produto
+    WHERE v.cliente_id = p_cliente_id
+      AND v.ano_referencia = p_ano
+    GROUP BY v.produto, v.mes_ref
+    ORDER BY v.produto, v.mes_ref
+$$;
+
+-- Quantidade de registros por ano de um cliente, em uma única consulta agrupada.
+-- Chamada pelo app via supabase.rpc('vendas_contagem_anos', { p_cliente_id })
+CREATE OR REPLACE FUNCTION vendas_contagem_anos(p_cliente_id INTEGER)
+RETURNS TABLE (
+    ano INTEGER,
+    n_registros BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT v.ano_referencia AS ano, COUNT(*) AS n_registros
+    FROM vendas v
+    WHERE v.cliente_id = p_cliente_id
+    GROUP BY v.ano_referencia
+    ORDER BY v.ano_referencia DESC
+$$;
+
+-- Imagens das anotações/fórmulas no Storage, endereçadas pelo hash do conteúdo.
+-- Para bancos já existentes; depois rode `node migrate_images.js` para mover os BYTEA.
+ALTER TABLE anotacoes_imagens ADD COLUMN IF NOT EXISTS imagem_hash TEXT;
+ALTER TABLE anotacoes_imagens ALTER COLUMN imagem DROP NOT NULL;
+ALTER TABLE formulas_imagens ADD COLUMN IF NOT EXISTS imagem_hash TEXT;
+ALTER TABLE formulas_imagens ALTER COLUMN imagem DROP NOT NULL;
+-- Contagem de referências por hash antes de remover um objeto compartilhado (storageService.deleteImage)
+CREATE INDEX IF NOT EXISTS idx_anotacoes_imagens_hash ON anotacoes_imagens(imagem_hash);
+CREATE INDEX IF NOT EXISTS idx_formulas_imagens_hash ON formulas_imagens(imagem_hash);
+
+-- Paginação das tintas por atualizado_em: linhas antigas sem data usam a de criação
+UPDATE tintas_personalizadas SET atualizado_em = criado_em WHERE atualizado_em IS NULL;
+CREATE INDEX IF NOT EXISTS idx_tintas_atualizado ON tintas_personalizadas(atualizado_em DESC, id DESC);
+-- Contagem de comentários embutida na listagem de tintas
+CREATE INDEX IF NOT EXISTS idx_comentarios_tintas_tinta ON comentarios_tintas(tinta_id);
+
+-- Busca de texto em anotações e tintas (título + conteúdo), ordenada por relevância.
+-- Cada palavra digitada precisa casar com o início de uma palavra ("azul oce" acha
+-- "Azul Oceano"), sem diferenciar acentos; o título pesa mais que o corpo. Índices
+-- GIN por expressão, para não acrescentar colunas às linhas lidas pelo app.
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() não é IMMUTABLE, o que os índices por expressão exigem
+CREATE OR REPLACE FUNCTION f_unaccent(p_texto TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, p_texto)
+$$;
+
+CREATE OR REPLACE FUNCTION texto_busca(p_titulo TEXT, p_corpo TEXT)
+RETURNS tsvector
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT setweight(to_tsvector('simple', f_unaccent(COALESCE(p_titulo, ''))), 'A')
+        || setweight(to_tsvector('simple', f_unaccent(COALESCE(p_corpo, ''))), 'B')
+$$;
+
+-- 'azul oce' -> 'azul':* & 'oce':*
+CREATE OR REPLACE FUNCTION consulta_busca(p_termo TEXT)
+RETURNS tsquery
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT to_tsquery('simple', string_agg(quote_literal(w) || ':*', ' & '))
+    FROM regexp_split_to_table(lower(f_unaccent(COALESCE(p_termo, ''))), '[^[:alnum:]]+') AS w
+    WHERE w <> ''
+$$;
+
+-- Termo digitado como texto literal em LIKE ... ESCAPE '\': '50%' não vira curinga
+CREATE OR REPLACE FUNCTION escape_like(p_termo TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT replace(replace(replace(p_termo, '\', '\\'), '%', '\%'), '_', '\_')
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_anotacoes_busca
+    ON anotacoes USING GIN (texto_busca(titulo, conteudo));
+CREATE INDEX IF NOT EXISTS idx_anotacoes_titulo_trgm
+    ON anotacoes USING GIN (lower(f_unaccent(titulo)) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tintas_busca
+    ON tintas_personalizadas USING GIN (texto_busca(nome || ' ' || COALESCE(codigo, ''), COALESCE(descricao, '') || ' ' || COALESCE(formula, '')));
+CREATE INDEX IF NOT EXISTS idx_tintas_nome_trgm
+    ON tintas_personalizadas USING GIN (lower(f_unaccent(nome || ' ' || COALESCE(codigo, ''))) gin_trgm_ops);
+
+-- Chamada pelo app via supabase.rpc('buscar_anotacoes', { p_usuario_id, p_termo })
+-- Palavras completas pelo índice de texto; trechos do meio do título pelo índice de trigramas
+CREATE OR REPLACE FUNCTION buscar_anotacoes(p_usuario_id INTEGER, p_termo TEXT, p_limite INTEGER DEFAULT 50)
+RETURNS SETOF anotacoes
+LANGUAGE sql STABLE
+AS $$
+    SELECT a.*
+    FROM anotacoes a, consulta_busca(p_termo) q
+    WHERE a.usuario_id = p_usuario_id
+      AND (texto_busca(a.titulo, a.conteudo) @@ q
+           OR lower(f_unaccent(a.titulo)) LIKE '%' || escape_like(lower(f_unaccent(p_termo))) || '%' ESCAPE '\')
+    ORDER BY ts_rank(texto_busca(a.titulo, a.conteudo), q) DESC, a.atualizado_em DESC
+    LIMIT p_limite
+$$;
+
+-- Chamada pelo app via supabase.rpc('buscar_tintas', { p_termo }).select(...)
+CREATE OR REPLACE FUNCTION buscar_tintas(p_termo TEXT, p_limite INTEGER DEFAULT 50)
+RETURNS SETOF tintas_personalizadas
+LANGUAGE sql STABLE
+AS $$
+    SELECT t.*
+    FROM tintas_personalizadas t, consulta_busca(p_termo) q
+    WHERE texto_busca(t.nome || ' ' || COALESCE(t.codigo, ''), COALESCE(t.descricao, '') || ' ' || COALESCE(t.formula, '')) @@ q
+       OR lower(f_unaccent(t.nome || ' ' || COALESCE(t.codigo, ''))) LIKE '%' || escape_like(lower(f_unaccent(p_termo))) || '%' ESCAPE '\'
+    ORDER BY ts_rank(texto_busca(t.nome || ' ' || COALESCE(t.codigo, ''), COALESCE(t.descricao, '') || ' ' || COALESCE(t.formula, '')), q) DESC,
+             t.atualizado_em DESC
+    LIMIT p_limite
+$$;
+
+-- Caixa de relatórios (admin e líder): colunas usadas pelo app, paginação por
+-- (data_relatorio, id) e contagem de não lidos por índice parcial
+ALTER TABLE relatorios ADD COLUMN IF NOT EXISTS lido BOOLEAN DEFAULT FALSE;
+ALTER TABLE relatorios ADD COLUMN IF NOT EXISTS arquivado BOOLEAN DEFAULT FALSE;
+ALTER TABLE relatorios ADD COLUMN IF NOT EXISTS data_arquivamento TIMESTAMP;
+ALTER TABLE relatorios ADD COLUMN IF NOT EXISTS imagens TEXT[];
+CREATE INDEX IF NOT EXISTS idx_relatorios_caixa
+    ON relatorios(destinatario, arquivado, data_relatorio DESC, id DESC);
+-- Não lidos contam só a caixa ativa (arquivado = FALSE); substitui idx_relatorios_nao_lidos
+DROP INDEX IF EXISTS idx_relatorios_nao_lidos;
+CREATE INDEX IF NOT EXISTS idx_relatorios_nao_lidos_ativos
+    ON relatorios(destinatario, usuario_id) WHERE lido = FALSE AND arquivado = FALSE;
+
+-- Imagens por URL: contagem de referências (array @> '{url}') antes de remover um objeto compartilhado
+ALTER TABLE anotacoes ADD COLUMN IF NOT EXISTS imagens TEXT[];
+CREATE INDEX IF NOT EXISTS idx_anotacoes_imagens_urls ON anotacoes USING GIN (imagens);
+CREATE INDEX IF NOT EXISTS idx_tintas_imagens_urls ON tintas_personalizadas USING GIN (imagens);
+CREATE INDEX IF NOT EXISTS idx_relatorios_imagens_urls ON relatorios USING GIN (imagens);
+
+-- Último envio de cada objeto endereçado pelo conteúdo (src/services/storage.js). Um objeto
+-- sem referências enviado há menos de 24 h pode estar num formulário ainda não salvo: a
+-- remoção fica agendada em remover_em e é feita depois, se nenhuma linha passou a usá-lo
+CREATE TABLE IF NOT EXISTS imagens_enviadas (
+    bucket TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    enviado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+    remover_em TIMESTAMPTZ,
+    PRIMARY KEY (bucket, hash)
+);
+CREATE INDEX IF NOT EXISTS idx_imagens_enviadas_remover
+    ON imagens_enviadas(remover_em) WHERE remover_em IS NOT NULL;
+
+-- Versões do cache compartilhado (src/services/sharedCache.js): cada escrita em uma
+-- tabela global incrementa sua versão, e o app só relê a tabela quando a versão muda
+CREATE TABLE IF NOT EXISTS cache_versoes (
+    escopo TEXT PRIMARY KEY,
+    versao BIGINT NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION bump_cache_versao()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO cache_versoes (escopo, versao) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (escopo) DO UPDATE
+        SET versao = cache_versoes.versao + 1, atualizado_em = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_cache_versao ON clientes;
+CREATE TRIGGER trg_cache_versao AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON clientes
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_versao();
+DROP TRIGGER IF EXISTS trg_cache_versao ON usuarios;
+CREATE TRIGGER trg_cache_versao AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON usuarios
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_versao();
+DROP TRIGGER IF EXISTS trg_cache_versao ON vendas_anos;
+CREATE TRIGGER trg_cache_versao AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON vendas_anos
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_versao();
+
+-- vendas: uma versão por cliente ('vendas:<cliente_id>'), chave do cache de respostas do
+-- assistente (src/services/salesAnswers.js). Uma importação só invalida as respostas do
+-- próprio cliente e as escritas de clientes diferentes não disputam a mesma linha
+CREATE OR REPLACE FUNCTION bump_cache_versao_vendas()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    ids INTEGER[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT cliente_id) INTO ids FROM novas;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT cliente_id) INTO ids FROM antigas;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(DISTINCT cliente_id) INTO ids
+        FROM (SELECT cliente_id FROM novas UNION SELECT cliente_id FROM antigas) t;
+    ELSE
+        -- TRUNCATE: todos os clientes
+        UPDATE cache_versoes SET versao = versao + 1, atualizado_em = CURRENT_TIMESTAMP
+        WHERE escopo LIKE 'vendas:%';
+        RETURN NULL;
+    END IF;
+
+    -- Ordem fixa: duas transações que tocam os mesmos clientes travam as linhas na mesma ordem
+    INSERT INTO cache_versoes (escopo, versao)
+    SELECT 'vendas:' || id, 1 FROM unnest(ids) AS id WHERE id IS NOT NULL ORDER BY id
+    ON CONFLICT (escopo) DO UPDATE
+        SET versao = cache_versoes.versao + 1, atualizado_em = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_cache_versao ON vendas;
+DELETE FROM cache_versoes WHERE escopo = 'vendas';
+DROP TRIGGER IF EXISTS trg_cache_versao_ins ON vendas;
+CREATE TRIGGER trg_cache_versao_ins AFTER INSERT ON vendas
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_versao_vendas();
+DROP TRIGGER IF EXISTS trg_cache_versao_upd ON vendas;
+CREATE TRIGGER trg_cache_versao_upd AFTER UPDATE ON vendas
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_versao_vendas();
+DROP TRIGGER IF EXISTS trg_cache_versao_del ON vendas;
+CREATE TRIGGER trg_cache_versao_del AFTER DELETE ON vendas
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_versao_vendas();
+DROP TRIGGER IF EXISTS trg_cache_versao_trunc ON vendas;
+CREATE TRIGGER trg_cache_versao_trunc AFTER TRUNCATE ON vendas
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_versao_vendas();
+
+-- =============================================
+-- SESSÕES E ASSISTENTE DE VENDAS
+-- =============================================
+
+-- Sessão do app, criada no login (auth.login): a Edge Function assistente-vendas só
+-- atende quem manda um token válido. RLS sem políticas: a chave anon não lê a tabela,
+-- só as funções abaixo (SECURITY DEFINER) e a service role da Edge Function
+CREATE TABLE IF NOT EXISTS sessoes (
+    token UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    usuario_id INTEGER NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    criado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expira_em TIMESTAMPTZ NOT NULL DEFAULT now() + INTERVAL '30 days'
+);
+ALTER TABLE sessoes ENABLE ROW LEVEL SECURITY;
+
+-- Login + sessão: chamada pelo app via supabase.rpc('criar_sessao', { p_login, p_senha })
+CREATE OR REPLACE FUNCTION criar_sessao(p_login TEXT, p_senha TEXT)
+RETURNS TABLE (id INTEGER, nome TEXT, tipo TEXT, cargo TEXT, token UUID)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH usuario AS (
+        SELECT u.id, u.nome, u.tipo, u.cargo
+        FROM usuarios u
+        WHERE lower(u.login) = lower(p_login) AND u.senha = p_senha AND u.ativo = 1
+    ), nova AS (
+        INSERT INTO sessoes (usuario_id) SELECT usuario.id FROM usuario
+        RETURNING sessoes.token
+    )
+    SELECT usuario.id, usuario.nome, usuario.tipo, usuario.cargo, nova.token FROM usuario, nova
+$$;
+
+CREATE OR REPLACE FUNCTION encerrar_sessao(p_token UUID)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    DELETE FROM sessoes WHERE token = p_token OR expira_em < now()
+$$;
+
+-- Perguntas ao assistente por usuário (limite por hora na Edge Function)
+CREATE TABLE IF NOT EXISTS assistente_uso (
+    id BIGSERIAL PRIMARY KEY,
+    usuario_id INTEGER NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    criado_em TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_assistente_uso_usuario ON assistente_uso(usuario_id, criado_em);
+ALTER TABLE assistente_uso ENABLE ROW LEVEL SECURITY;
+
+-- Valida a sessão e conta a pergunta: 'ok', 'sessao' (token inválido ou vencido) ou 'limite'.
+-- O lock por usuário impede que pedidos simultâneos passem todos do limite
+CREATE OR REPLACE FUNCTION registrar_uso_assistente(p_token UUID, p_limite INTEGER, p_janela INTERVAL)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_usuario INTEGER;
+BEGIN
+    SELECT s.usuario_id INTO v_usuario
+    FROM sessoes s JOIN usuarios u ON u.id = s.usuario_id
+    WHERE s.token = p_token AND s.expira_em > now() AND u.ativo = 1;
+    IF v_usuario IS NULL THEN
+        RETURN 'sessao';
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('assistente_uso'), v_usuario);
+    IF (SELECT count(*) FROM assistente_uso
+        WHERE usuario_id = v_usuario AND criado_em > now() - p_janela) >= p_limite THEN
+        RETURN 'limite';
+    END IF;
+
+    INSERT INTO assistente_uso (usuario_id) VALUES (v_usuario);
+    DELETE FROM assistente_uso WHERE usuario_id = v_usuario AND criado_em < now() - INTERVAL '1 day';
+    RETURN 'ok';
+END
+$$;
+-- Só a Edge Function (service role) conta perguntas
+REVOKE EXECUTE ON FUNCTION registrar_uso_assistente(UUID, INTEGER, INTERVAL) FROM PUBLIC, anon, authenticated;
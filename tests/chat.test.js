@@ -0,0 +1,36 @@
+import { test } from 'node:test'
+import assert from 'node:assert/strict'
+import { edgeFunctionBackend } from '../src/services/chat.js'
+
+const consumir = async (iterador) => {
+    const partes = []
+    for await (const parte of iterador) partes.push(parte)
+    return partes
+}
+
+test('the edge function backend sends the session token and reads the stream', async () => {
+    let pedido
+    const backend = edgeFunctionBackend({
+        url: 'https://fn.test/assistente-vendas',
+        anonKey: 'anon',
+        sessao: () => 'token-1',
+        fetchImpl: async (url, init) => {
+            pedido = init
+            return new Response('data: {"choices":[{"delta":{"content":"Olá"}}]}\n\ndata: [DONE]\n\n')
+        }
+    })
+
+    assert.deepEqual(await consumir(backend.stream({ pergunta: 'oi' }, {})), ['Olá'])
+    assert.equal(pedido.headers['x-sessao'], 'token-1')
+})
+
+test('an expired session and the rate limit get their own messages', async () => {
+    for (const [status, mensagem] of [[401, /Sessão expirada/], [429, /Limite de perguntas/]]) {
+        const backend = edgeFunctionBackend({
+            url: 'https://fn.test/assistente-vendas',
+            anonKey: 'anon',
+            fetchImpl: async () => new Response('{}', { status })
+        })
+        await assert.rejects(consumir(backend.stream({ pergunta: 'oi' }, {})), mensagem)
+    }
+})
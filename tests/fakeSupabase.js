@@ -0,0 +1,177 @@
+// In-memory stand-in for src/services/supabase.js
+//
+// supabase.from(table) answers the query-builder calls the services make (select, insert,
+// upsert, update, delete, eq, in, gt, lt, contains, order, range, maybeSingle) against plain
+// arrays in `db`; supabase.storage keeps objects as keys of `objetos` ('<bucket>/<path>').
+// A table that is not in `db` answers like PostgREST for a missing relation (PGRST205),
+// and every RPC like a missing function (PGRST202), so the services take their fallbacks.
+
+export const db = {}
+export const objetos = new Set()
+
+let proximoId = 1
+
+// Empty tables for the given names (the others count as not created)
+export function resetDb(tabelas) {
+    for (const key of Object.keys(db)) delete db[key]
+    for (const tabela of tabelas) db[tabela] = []
+    objetos.clear()
+    proximoId = 1
+}
+
+const erroTabela = (table) => ({ code: 'PGRST205', message: `Could not find the table 'public.${table}'` })
+
+class Consulta {
+    constructor(table) {
+        this.table = table
+        this.op = 'select'
+        this.filtros = []
+        this.ordens = []
+        this.faixa = null
+        this.unico = false
+    }
+
+    select(colunas, { count = null, head = false } = {}) {
+        if (this.op === 'select') Object.assign(this, { contar: count !== null, head })
+        return this
+    }
+    insert(rows) { return Object.assign(this, { op: 'insert', payload: rows }) }
+    upsert(rows, { onConflict, ignoreDuplicates = false } = {}) {
+        return Object.assign(this, { op: 'upsert', payload: rows, onConflict, ignoreDuplicates })
+    }
+    update(values) { return Object.assign(this, { op: 'update', payload: values }) }
+    delete() { return Object.assign(this, { op: 'delete' }) }
+
+    eq(coluna, valor) {
+        this.filtros.push(r => r[coluna] === valor)
+        return this
+    }
+
+    in(coluna, valores) {
+        this.filtros.push(r => valores.includes(r[coluna]))
+        return this
+    }
+
+    gt(coluna, valor) {
+        this.filtros.push(r => r[coluna] !== null && r[coluna] > valor)
+        return this
+    }
+
+    lt(coluna, valor) {
+        this.filtros.push(r => r[coluna] !== null && r[coluna] < valor)
+        return this
+    }
+
+    contains(coluna, valores) {
+        this.filtros.push(r => valores.every(v => (r[coluna] || []).includes(v)))
+        return this
+    }
+
+    order(coluna) {
+        this.ordens.push(coluna)
+        return this
+    }
+
+    range(de, ate) {
+        this.faixa = [de, ate]
+        return this
+    }
+
+    maybeSingle() {
+        this.unico = true
+        return this
+    }
+
+    then(resolve, reject) {
+        return Promise.resolve().then(() => this.executar()).then(resolve, reject)
+    }
+
+    executar() {
+        const rows = db[this.table]
+        if (!rows) return { data: null, error: erroTabela(this.table), status: 404 }
+        const casa = (r) => this.filtros.every(f => f(r))
+
+        if (this.op === 'insert' || this.op === 'upsert') {
+            const chaves = this.onConflict?.split(',')
+            const mesmaChave = (a, b) => chaves.every(c => a[c] === b[c])
+            const gravados = []
+            for (const row of this.payload) {
+                const existente = chaves && rows.find(r => mesmaChave(r, row))
+                if (existente) {
+                    if (!this.ignoreDuplicates) Object.assign(existente, row)
+                    continue
+                }
+                const novo = { id: proximoId++, ...row }
+                rows.push(novo)
+                gravados.push(novo)
+            }
+            return { data: gravados, error: null, status: 201 }
+        }
+
+        if (this.op === 'update') {
+            const alterados = rows.filter(casa)
+            alterados.forEach(r => Object.assign(r, this.payload))
+            return { data: alterados, error: null, status: 200 }
+        }
+
+        if (this.op === 'delete') {
+            const removidos = rows.filter(casa)
+            db[this.table] = rows.filter(r => !casa(r))
+            return { data: removidos, error: null, status: 200 }
+        }
+
+        let data = rows.filter(casa).map(r => ({ ...r }))
+        if (this.contar) return { data: this.head ? null : data, count: data.length, error: null, status: 200 }
+        for (const coluna of [...this.ordens].reverse()) {
+            data.sort((a, b) => (a[coluna] < b[coluna] ? -1 : a[coluna] > b[coluna] ? 1 : 0))
+        }
+        if (this.faixa) data = data.slice(this.faixa[0], this.faixa[1] + 1)
+        if (this.unico) data = data[0] ?? null
+        return { data, error: null, status: 200 }
+    }
+}
+
+class Rpc {
+    order() { return this }
+    range() { return this }
+    then(resolve, reject) {
+        return Promise.resolve({ data: null, error: { code: 'PGRST202', message: 'Could not find the function' }, status: 404 })
+            .then(resolve, reject)
+    }
+}
+
+const bucketFake = (bucket) => ({
+    async upload(path) {
+        const key = `${bucket}/${path}`
+        if (objetos.has(key)) return { data: null, error: { statusCode: '409', message: 'The resource already exists' } }
+        objetos.add(key)
+        return { data: { path }, error: null }
+    },
+    async remove(paths) {
+        paths.forEach(path => objetos.delete(`${bucket}/${path}`))
+        return { data: paths, error: null }
+    },
+    async list(pasta, { search = '' } = {}) {
+        const prefixo = `${bucket}/${pasta ? `${pasta}/` : ''}`
+        const data = [...objetos]
+            .filter(key => key.startsWith(prefixo) && !key.slice(prefixo.length).includes('/'))
+            .map(key => ({ name: key.slice(prefixo.length) }))
+            .filter(o => o.name.includes(search))
+        return { data, error: null }
+    },
+    getPublicUrl: (path) => ({ data: { publicUrl: `https://storage.test/${bucket}/${path}` } })
+})
+
+export const supabase = {
+    from: (table) => new Consulta(table),
+    rpc: () => new Rpc(),
+    storage: { from: bucketFake }
+}
+
+// No shared tier in the tests: every read goes to the loader
+export const sharedCache = {
+    read: (table, filters, load) => load(),
+    versao: async () => null,
+    invalidate() {},
+    clear() {}
+}
@@ -0,0 +1,15 @@
+// Module hooks for the tests
+//
+// The sources use Vite's extensionless relative imports, and src/services/supabase.js builds
+// the real client from import.meta.env. Relative specifiers without an extension get '.js',
+// and the supabase module is swapped for the in-memory stand-in in fakeSupabase.js.
+
+const FAKE_SUPABASE = new URL('./fakeSupabase.js', import.meta.url).href
+
+export async function resolve(specifier, context, nextResolve) {
+    const relativo = specifier.startsWith('./') || specifier.startsWith('../')
+    const semExtensao = !/\.[cm]?[jt]sx?$/.test(specifier)
+    const resolved = await nextResolve(relativo && semExtensao ? `${specifier}.js` : specifier, context)
+    if (resolved.url.endsWith('/src/services/supabase.js')) return { ...resolved, url: FAKE_SUPABASE }
+    return resolved
+}
@@ -0,0 +1,34 @@
+import { test } from 'node:test'
+import assert from 'node:assert/strict'
+import { respostaDireta } from '../src/services/salesAnswers.js'
+import { buildSalesCube } from '../src/services/salesCube.js'
+
+const linha = (mes_ref, produto_nome, quantidade) => ({ mes_ref, produto: produto_nome, produto_nome, quantidade, valor: quantidade * 10 })
+
+const cube = buildSalesCube([
+    linha('Mês 02', 'Tinta Acrílica Branca', 40),
+    linha('Mês 02', 'Verniz Marítimo', 10),
+    linha('Mês 03', 'Tinta Acrílica Branca', 25),
+    linha('Mês 03', 'Verniz Marítimo', 30)
+])
+
+test('whole-month rankings and totals are answered from the cube', () => {
+    assert.match(respostaDireta('Quais os produtos mais vendidos em março?', cube), /^Mais vendidos em Mês 03/)
+    assert.match(respostaDireta('Quais produtos caíram no mês 3?', cube), /^Maiores quedas em Mês 03/)
+    assert.match(respostaDireta('Qual o total do ano?', cube), /^Total do ano/)
+    assert.match(respostaDireta('Quanto vendemos em fevereiro?', cube), /^Total de Mês 02/)
+})
+
+test('questions that name a product go to the assistant', () => {
+    assert.equal(respostaDireta('O produto Verniz Marítimo caiu em março?', cube), null)
+    assert.equal(respostaDireta('Quanto vendeu a tinta acrílica?', cube), null)
+    assert.equal(respostaDireta('A Tinta Acrílica Branca subiu?', cube), null)
+    assert.equal(respostaDireta('Top verniz do mês', cube), null)
+})
+
+test('questions with other qualifiers go to the assistant', () => {
+    assert.equal(respostaDireta('Quais os mais vendidos em valor?', cube), null)
+    assert.equal(respostaDireta('Total de 2023', cube), null)
+    assert.equal(respostaDireta('Top 10 produtos da linha automotiva', cube), null)
+    assert.equal(respostaDireta('Por que as vendas caíram em março?', cube), null)
+})
@@ -0,0 +1,76 @@
+import { test, beforeEach } from 'node:test'
+import assert from 'node:assert/strict'
+import { db, resetDb } from './fakeSupabase.js'
+import { salesService } from '../src/services/sales.js'
+import { salesCube } from '../src/services/salesCube.js'
+
+const CLIENTE = 1
+const ANO = 2024
+
+const venda = (mes_ref, produto, quantidade, valor) =>
+    ({ cliente_id: CLIENTE, ano_referencia: ANO, mes_ref, produto, quantidade, valor })
+
+const mesesDe = (rows) => [...new Set(rows.map(r => r.mes_ref))].sort()
+
+beforeEach(() => {
+    resetDb(['vendas', 'vendas_mensal', 'vendas_mensal_anos', 'vendas_importacoes', 'vendas_anos', 'produtos'])
+    salesCube.invalidate(CLIENTE)
+    db.vendas.push(
+        { id: 1001, ...venda('Mês 01', 'A', 10, 100) },
+        { id: 1002, ...venda('Mês 02', 'A', 20, 200) },
+        { id: 1003, ...venda('Mês 02', 'B', 5, 75) }
+    )
+})
+
+test('importing one month into a year with no rollup rolls up the whole year', async () => {
+    const res = await salesService.importMesDelta(CLIENTE, ANO, 'Mês 03', 'marco.csv',
+        [[{ produto: 'A', produto_nome: 'Tinta A', quantidade: 7, valor: 70 }]])
+    assert.equal(res.success, true)
+
+    assert.deepEqual(mesesDe(db.vendas_mensal), ['Mês 01', 'Mês 02', 'Mês 03'])
+    assert.deepEqual(db.vendas_mensal_anos.map(r => [r.cliente_id, r.ano]), [[CLIENTE, ANO]])
+
+    const rows = await salesService.getVendasConsolidadas(CLIENTE, ANO)
+    assert.deepEqual(mesesDe(rows), ['Mês 01', 'Mês 02', 'Mês 03'])
+    assert.equal(rows.reduce((s, r) => s + Number(r.quantidade), 0), 42)
+})
+
+test('a year with some rollup rows but no completeness flag is read from vendas', async () => {
+    // Left by an earlier import that only wrote its own month
+    db.vendas_mensal.push({ cliente_id: CLIENTE, ano: ANO, mes_ref: 'Mês 02', produto: 'A', produto_nome: 'A', quantidade: 20, valor: 200, registros: 1 })
+
+    const cubes = await salesService.getCubes(CLIENTE, [ANO])
+    assert.ok(cubes.get(ANO))
+    const rows = await salesService.getVendasConsolidadas(CLIENTE, ANO)
+    assert.deepEqual(mesesDe(rows), ['Mês 01', 'Mês 02'])
+
+    // The background backfill rebuilds every month before flagging the year
+    await salesService.completarRollup(CLIENTE, ANO)
+    assert.deepEqual(mesesDe(db.vendas_mensal), ['Mês 01', 'Mês 02'])
+    assert.equal(db.vendas_mensal.length, 3)
+    assert.equal(db.vendas_mensal_anos.length, 1)
+})
+
+test('importing into a complete year replaces only that month of the rollup', async () => {
+    await salesService.recalcularRollup(CLIENTE, ANO)
+    const mes01 = db.vendas_mensal.find(r => r.mes_ref === 'Mês 01')
+
+    const res = await salesService.importMesDelta(CLIENTE, ANO, 'Mês 02', 'fevereiro.csv',
+        [[{ produto: 'A', produto_nome: 'A', quantidade: 25, valor: 250 }]])
+    assert.equal(res.success, true)
+
+    assert.equal(db.vendas_mensal.find(r => r.mes_ref === 'Mês 01'), mes01)
+    assert.deepEqual(
+        db.vendas_mensal.filter(r => r.mes_ref === 'Mês 02').map(r => [r.produto, r.quantidade]),
+        [['A', 25]]
+    )
+})
+
+test('deleting the year clears its completeness flag', async () => {
+    await salesService.recalcularRollup(CLIENTE, ANO)
+    assert.equal(db.vendas_mensal_anos.length, 1)
+
+    await salesService.deleteVendasAno(CLIENTE, ANO)
+    assert.equal(db.vendas_mensal.length, 0)
+    assert.equal(db.vendas_mensal_anos.length, 0)
+})
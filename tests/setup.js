@@ -0,0 +1,4 @@
+// Loaded with --import before the tests: lets node run the Vite-style sources (see hooks.js)
+import { register } from 'node:module'
+
+register('./hooks.js', import.meta.url)
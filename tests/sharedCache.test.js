@@ -0,0 +1,41 @@
+import { test } from 'node:test'
+import assert from 'node:assert/strict'
+import { createSharedCache } from '../src/services/sharedCache.js'
+
+// localStorage stand-in
+function memoryStorage() {
+    const itens = new Map()
+    return {
+        get length() { return itens.size },
+        key: (i) => [...itens.keys()][i] ?? null,
+        getItem: (k) => itens.get(k) ?? null,
+        setItem: (k, v) => itens.set(k, String(v)),
+        removeItem: (k) => itens.delete(k)
+    }
+}
+
+// No BroadcastChannel: an open channel would keep the test process alive
+function criarCache(storage) {
+    const canal = globalThis.BroadcastChannel
+    globalThis.BroadcastChannel = undefined
+    try {
+        return createSharedCache({ tables: ['clientes'], fetchVersions: async () => ({ clientes: 1 }), storage })
+    } finally {
+        globalThis.BroadcastChannel = canal
+    }
+}
+
+test('results rejected by persist are served but not stored', async () => {
+    const storage = memoryStorage()
+    const cache = criarCache(storage)
+    const persist = ({ fallback }) => !fallback
+    let loads = 0
+
+    const fallback = { lista: [{ id: 1 }, { id: 2 }], fallback: true }
+    assert.deepEqual(await cache.read('clientes', { usuarioId: 7 }, async () => { loads++; return fallback }, { persist }), fallback)
+
+    const normal = { lista: [{ id: 1 }], fallback: false }
+    assert.deepEqual(await cache.read('clientes', { usuarioId: 7 }, async () => { loads++; return normal }, { persist }), normal)
+    assert.deepEqual(await cache.read('clientes', { usuarioId: 7 }, async () => { loads++; return fallback }, { persist }), normal)
+    assert.equal(loads, 2)
+})
@@ -0,0 +1,56 @@
+import { test, beforeEach } from 'node:test'
+import assert from 'node:assert/strict'
+import { db, objetos, resetDb } from './fakeSupabase.js'
+import { storageService } from '../src/services/storage.js'
+import { contentPath } from '../src/services/blobStore.js'
+
+const BUCKET = 'anotacoes'
+const HASH = 'ab'.repeat(32)
+const PATH = contentPath(HASH)
+const URL_IMAGEM = `https://storage.test/${BUCKET}/${PATH}`
+const THUMB = `${BUCKET}/cas/ab/thumbs/${HASH}`
+const HORA = 60 * 60 * 1000
+
+const iso = (deslocamentoMs) => new Date(Date.now() + deslocamentoMs).toISOString()
+
+beforeEach(() => {
+    resetDb(['anotacoes', 'anotacoes_imagens', 'imagens_enviadas'])
+    objetos.add(`${BUCKET}/${PATH}`)
+    objetos.add(THUMB)
+})
+
+test('an unreferenced object uploaded recently is kept and its removal queued', async () => {
+    // Another form reused it a minute ago and has not saved its row yet
+    db.imagens_enviadas.push({ bucket: BUCKET, hash: HASH, enviado_em: iso(-60 * 1000), remover_em: null })
+
+    await storageService.deleteImage(URL_IMAGEM, BUCKET)
+    assert.ok(objetos.has(`${BUCKET}/${PATH}`))
+    assert.ok(db.imagens_enviadas[0].remover_em > iso(23 * HORA))
+
+    // The form saves its row before the queued removal is due: the sweep keeps the object
+    db.anotacoes.push({ id: 1, imagens: [URL_IMAGEM] })
+    db.imagens_enviadas[0].remover_em = iso(-1000)
+    await storageService.removerPendentes()
+    assert.ok(objetos.has(`${BUCKET}/${PATH}`))
+    assert.equal(db.imagens_enviadas.length, 0)
+})
+
+test('an unreferenced object past the grace period is removed with its thumbnail', async () => {
+    db.imagens_enviadas.push({ bucket: BUCKET, hash: HASH, enviado_em: iso(-25 * HORA), remover_em: null })
+
+    await storageService.deleteImage(URL_IMAGEM, BUCKET)
+    assert.equal(objetos.has(`${BUCKET}/${PATH}`), false)
+    assert.equal(objetos.has(THUMB), false)
+})
+
+test('a queued removal is done by the sweep once due', async () => {
+    db.imagens_enviadas.push({ bucket: BUCKET, hash: HASH, enviado_em: iso(-25 * HORA), remover_em: iso(-1000) })
+    await storageService.removerPendentes()
+    assert.equal(objetos.has(`${BUCKET}/${PATH}`), false)
+})
+
+test('a referenced object is never removed', async () => {
+    db.anotacoes_imagens.push({ id: 1, anotacao_id: 1, imagem_hash: HASH })
+    await storageService.deleteImage(URL_IMAGEM, BUCKET)
+    assert.ok(objetos.has(`${BUCKET}/${PATH}`))
+})